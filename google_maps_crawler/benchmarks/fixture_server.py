@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""本地 HTTP 伺服器，產生與 Google Maps 地點頁相同選擇器的測試頁面
+
+頁面網址: /place/<place_id>?hl=en&size=<評論數>&batch=<每批數量>&latency=<毫秒>
+"""
+
+import html
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 1x1 透明 GIF，作為評論照片
+PIXEL_GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+             b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+
+WORDS = ("great food friendly staff noodles broth spicy fresh sushi pasta service cozy "
+         "price portion dessert coffee wait table crispy sauce flavor would return").split()
+
+def make_review(place_id, index):
+    """產生一條可重現的評論"""
+    length = 20 + (index * 7) % 60
+    text = " ".join(WORDS[(index + i * 3) % len(WORDS)] for i in range(length)).capitalize() + "."
+    return {
+        "reviewer_name": f"Reviewer {place_id}-{index}",
+        "rating": (index % 5) + 1,
+        "date": f"{(index % 11) + 1} months ago",
+        "text": text,
+        "photos": [f"/photo/{place_id}/{index}/{n}.gif" for n in range(index % 3)],
+        "tags": ["Dine in"] if index % 4 == 0 else []
+    }
+
+def render_place_page(place_id, size, batch=10, latency_ms=150):
+    """產生地點頁面 HTML，評論在滾動到底部時分批延遲載入"""
+    reviews = [make_review(place_id, i) for i in range(size)]
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Fixture Place {html.escape(place_id)}</title>
+<style>
+  body {{ margin: 0; font-family: sans-serif; }}
+  div.m6QErb.DxyBCb.kA9KIf.dS8AEf {{ height: 700px; overflow-y: auto; }}
+  div.jftiEf {{ padding: 12px; border-bottom: 1px solid #ddd; min-height: 120px; }}
+  img.STQFb {{ width: 40px; height: 40px; }}
+</style>
+</head>
+<body>
+<h1 class="DUwDvf">Fixture Place {html.escape(place_id)}</h1>
+<button data-item-id="address">1 Fixture Street, Test City</button>
+<div class="F7nice"><span class="ceNzKf">4.3</span> <span class="HHrUdb">({size:,})</span></div>
+<button aria-label="Reviews for Fixture Place {html.escape(place_id)}">Reviews</button>
+<div class="m6QErb DxyBCb kA9KIf dS8AEf" id="reviews"></div>
+<script>
+var REVIEWS = {json.dumps(reviews)};
+var BATCH = {batch};
+var LATENCY = {latency_ms};
+var container = document.getElementById('reviews');
+var rendered = 0;
+var loading = false;
+
+function renderReview(review, index) {{
+  var node = document.createElement('div');
+  node.className = 'jftiEf';
+  node.setAttribute('data-review-id', 'fixture-' + index);
+  var truncated = review.text.length > 120;
+  var shown = truncated ? review.text.slice(0, 120) + '…' : review.text;
+  var photos = review.photos.map(function(src) {{
+    return '<img class="STQFb" src="' + src + '">';
+  }}).join('');
+  var tags = review.tags.map(function(tag) {{
+    return '<div class="NGLBjb">' + tag + '</div>';
+  }}).join('');
+  node.innerHTML =
+    '<div class="d4r55">' + review.reviewer_name + '</div>' +
+    '<span class="kvMYJc" aria-label="' + review.rating + (review.rating === 1 ? ' star' : ' stars') + '"></span>' +
+    '<span class="rsqaWe">' + review.date + '</span>' +
+    '<div class="MyEned"><span class="wiI7pd">' + shown + '</span>' +
+    (truncated ? '<button class="w8nwRe">More</button>' : '') + '</div>' +
+    (photos ? '<div class="KtCyie">' + photos + '</div>' : '') +
+    (tags ? '<div class="m6QErb">' + tags + '</div>' : '');
+  var button = node.querySelector('button.w8nwRe');
+  if (button) {{
+    button.addEventListener('click', function() {{
+      setTimeout(function() {{
+        node.querySelector('span.wiI7pd').textContent = review.text;
+        button.remove();
+      }}, 20);
+    }});
+  }}
+  return node;
+}}
+
+function loadBatch() {{
+  if (loading || rendered >= REVIEWS.length) {{ return; }}
+  loading = true;
+  setTimeout(function() {{
+    var end = Math.min(rendered + BATCH, REVIEWS.length);
+    for (; rendered < end; rendered++) {{
+      container.appendChild(renderReview(REVIEWS[rendered], rendered));
+    }}
+    loading = false;
+  }}, LATENCY);
+}}
+
+container.addEventListener('scroll', function() {{
+  if (container.scrollTop + container.clientHeight >= container.scrollHeight - 200) {{
+    loadBatch();
+  }}
+}});
+loadBatch();
+</script>
+</body>
+</html>"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        if parsed.path.startswith("/place/"):
+            place_id = parsed.path.split("/")[2]
+            size = int(query.get("size", ["100"])[0])
+            batch = int(query.get("batch", ["10"])[0])
+            latency = int(query.get("latency", ["150"])[0])
+            body = render_place_page(place_id, size, batch, latency).encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        elif parsed.path.startswith("/photo/"):
+            body = PIXEL_GIF
+            content_type = "image/gif"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """在背景執行緒中運行的測試頁面伺服器"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def place_url(self, place_id, size, batch=10, latency_ms=150):
+        """測試地點頁面的網址 (已含 hl=en，且沒有地點 ID，爬蟲會原樣載入)"""
+        return f"{self.base_url}/place/{place_id}?hl=en&size={size}&batch={batch}&latency={latency_ms}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""正規化基準測試：比較逐條呼叫 utils 的純量路徑與 src.normalize 的批量路徑
+
+用法 (在 google_maps_crawler 目錄下，需安裝 numpy 與 pandas):
+    python -m benchmarks.normalize_benchmark --sizes 100000 1000000 10000000 --scalar-limit 1000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.normalize import normalize_ratings, normalize_relative_dates
+from src.utils import extract_rating_value, parse_relative_date, parse_crawl_time, CHINESE_DATE_UNITS
+
+RATINGS = ["1 star", "2 stars", "3 stars", "4 stars", "5 stars", "No rating", "無評分"]
+DATE_UNITS = ["minute", "hour", "day", "week", "month", "year"]
+
+def make_reviews(size, places=None, seed=0):
+    """產生 size 條評論的原始欄位 (與爬蟲輸出相同的文字格式)"""
+    rng = random.Random(seed)
+    dates = ["Unknown date", "未知日期"]
+    for unit in DATE_UNITS:
+        dates.append(f"a {unit} ago" if unit != "hour" else "an hour ago")
+        dates.extend(f"{n} {unit}s ago" for n in range(2, 12))
+    # 中文界面的相對日期
+    dates.extend(f"{n} {unit}前" for unit in CHINESE_DATE_UNITS for n in range(2, 12))
+    dates.extend(f"一{unit}前" for unit in CHINESE_DATE_UNITS)
+    crawl_times = [f"2024-{month:02d}-{day:02d} 12:00:00" for month in range(1, 13) for day in range(1, 29)]
+
+    places = places or max(1, size // 200)
+    # 同一家餐廳的評論共用 crawl_time
+    place_times = [rng.choice(crawl_times) for _ in range(places)]
+    return pd.DataFrame({
+        "rating": [rng.choice(RATINGS) for _ in range(size)],
+        "date": [rng.choice(dates) for _ in range(size)],
+        "crawl_time": [place_times[i * places // size] for i in range(size)]
+    })
+
+def run_scalar(reviews):
+    """逐條解析 (utils 中的純量函數)"""
+    ratings = [extract_rating_value(rating) for rating in reviews["rating"]]
+    dates = [parse_relative_date(date, parse_crawl_time(crawl_time))
+             for date, crawl_time in zip(reviews["date"], reviews["crawl_time"])]
+    return ratings, dates
+
+def run_vectorized(reviews):
+    """批量解析"""
+    ratings = normalize_ratings(reviews["rating"])
+    _, latest = normalize_relative_dates(reviews["date"], reviews["crawl_time"].to_numpy())
+    return ratings, latest
+
+def check_agreement(scalar, vectorized):
+    """確認兩條路徑的結果一致 (批量路徑的 date_latest 對應純量路徑的日期)"""
+    scalar_ratings, scalar_dates = scalar
+    ratings, latest = vectorized
+    expected_ratings = np.array([np.nan if value is None else value for value in scalar_ratings], dtype=np.float64)
+    if not np.array_equal(expected_ratings, ratings, equal_nan=True):
+        return False
+    expected_dates = np.array([np.datetime64("NaT", "ns") if value is None else np.datetime64(value, "ns")
+                               for value in scalar_dates], dtype="datetime64[ns]")
+    # 月與年以浮點天數換算，允許 1 毫秒誤差
+    difference = np.abs((expected_dates - latest).astype(np.int64))
+    both_missing = np.isnat(expected_dates) & np.isnat(latest)
+    return bool(np.all(both_missing | (~np.isnat(expected_dates) & ~np.isnat(latest) & (difference < 1_000_000))))
+
+def run_benchmark(sizes, scalar_limit):
+    results = []
+    for size in sizes:
+        reviews = make_reviews(size)
+
+        start = time.perf_counter()
+        vectorized = run_vectorized(reviews)
+        vectorized_seconds = time.perf_counter() - start
+
+        result = {
+            "size": size,
+            "vectorized_seconds": round(vectorized_seconds, 4),
+            "vectorized_reviews_per_second": round(size / vectorized_seconds)
+        }
+
+        if size <= scalar_limit:
+            start = time.perf_counter()
+            scalar = run_scalar(reviews)
+            scalar_seconds = time.perf_counter() - start
+            result.update({
+                "scalar_seconds": round(scalar_seconds, 4),
+                "scalar_reviews_per_second": round(size / scalar_seconds),
+                "speedup": round(scalar_seconds / vectorized_seconds, 1),
+                "results_match": check_agreement(scalar, vectorized)
+            })
+
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized normalization benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000],
+                        help="number of reviews per run")
+    parser.add_argument("--scalar-limit", type=int, default=1000000,
+                        help="skip the scalar path above this size")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # 絕對耗時取決於機器，報告中記錄執行環境以便比較
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": f"{platform.machine()}, {os.cpu_count()} CPUs",
+        "results": run_benchmark(args.sizes, args.scalar_limit)
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
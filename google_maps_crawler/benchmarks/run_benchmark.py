@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""離線基準測試：以無頭 Chrome 對本地測試頁面執行真實的爬蟲程式碼
+
+用法 (在 google_maps_crawler 目錄下):
+    python -m benchmarks.run_benchmark --sizes 10 100 1000 5000 --output bench.json
+    python -m benchmarks.run_benchmark --compare bench.json
+    python -m benchmarks.run_benchmark --workers 1 2 4 --places 12 --place-size 50
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from src.browser_manager import BrowserManager
+from src.crawler import RestaurantCrawler
+from src.pacing import NoPacing
+from src.parallel_crawler import ParallelCrawler
+from src.rate_limiter import AdaptiveRateLimiter
+from .fixture_server import FixtureServer
+
+class PhaseTimer:
+    """記錄各階段耗時"""
+
+    def __init__(self):
+        self.phases = {}
+
+    def measure(self, phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.phases[phase] = self.phases.get(phase, 0) + time.perf_counter() - start
+        return result
+
+def run_place(crawler, driver, url, size, batch, bulk_extraction, stream_reviews=False):
+    """對單一測試頁面執行各個階段並返回結果"""
+    timer = PhaseTimer()
+    max_scrolls = math.ceil(size / batch) + 10
+
+    restaurant_data = timer.measure("page_load", crawler.open_restaurant_page, driver, url)
+    if stream_reviews:
+        reviews = timer.measure("harvest", crawler.harvest_reviews, driver, target_count=size)
+        loaded = len(reviews)
+        reviews.close()
+    else:
+        loaded = timer.measure("scroll", crawler.slow_scroll, driver, max_scrolls=max_scrolls, target_count=size)
+        timer.measure("expand", crawler.expand_all_reviews, driver)
+        if bulk_extraction:
+            reviews = timer.measure("extract", crawler.extract_reviews_bulk, driver)
+        else:
+            reviews = timer.measure("extract", crawler.extract_reviews_by_element, driver)
+
+    total = sum(timer.phases.values())
+    return {
+        "size": size,
+        "reviews_loaded": loaded,
+        "reviews_extracted": len(reviews),
+        "name": restaurant_data["name"],
+        "phases": {phase: round(seconds, 4) for phase, seconds in timer.phases.items()},
+        "total_seconds": round(total, 4),
+        "reviews_per_second": round(len(reviews) / total, 2) if total else None
+    }
+
+def run_benchmark(sizes, batch=10, latency_ms=150, repeat=1, bulk_extraction=True, stream_reviews=False):
+    """啟動測試伺服器與瀏覽器，依序測試每個評論數量"""
+    server = FixtureServer().start()
+    crawler = RestaurantCrawler(bulk_extraction=bulk_extraction, pacing=NoPacing())
+    browser_manager = BrowserManager()
+
+    start = time.perf_counter()
+    driver = browser_manager.create_browser(headless=True)
+    startup_seconds = time.perf_counter() - start
+
+    results = []
+    try:
+        for size in sizes:
+            for run in range(repeat):
+                url = server.place_url(f"bench{size}r{run}", size, batch, latency_ms)
+                results.append(run_place(crawler, driver, url, size, batch, bulk_extraction, stream_reviews))
+                driver.get("about:blank")
+    finally:
+        browser_manager.close_browser(driver)
+        server.stop()
+
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {
+            "batch": batch,
+            "latency_ms": latency_ms,
+            "repeat": repeat,
+            "bulk_extraction": bulk_extraction,
+            "stream_reviews": stream_reviews
+        },
+        "browser_startup_seconds": round(startup_seconds, 4),
+        "browser_startup": browser_manager.last_startup,
+        "results": results
+    }
+
+def run_parallel(worker_counts, places=12, size=50, batch=10, latency_ms=150, tabs=1):
+    """以 ParallelCrawler 爬取同一組測試地點，比較不同工作執行緒數的吞吐量 (地點/分鐘)
+
+    每次執行都在獨立的暫存目錄中 (全新的進度資料庫與輸出文件)，速率控制器不限制導航。
+    """
+    server = FixtureServer().start()
+    cwd = os.getcwd()
+    results = []
+    try:
+        for workers in worker_counts:
+            with tempfile.TemporaryDirectory() as workdir:
+                os.chdir(workdir)
+                try:
+                    crawler = RestaurantCrawler(pacing=NoPacing(), stream_reviews=True, tabs=tabs,
+                                                rate_limiter=AdaptiveRateLimiter(initial_rate=6000, max_rate=6000))
+                    crawler.browser_pool.headless = True
+                    urls = [server.place_url(f"par{workers}w{i}", size, batch, latency_ms) for i in range(places)]
+
+                    start = time.perf_counter()
+                    ParallelCrawler(crawler, workers=workers).crawl_restaurants(urls)
+                    seconds = time.perf_counter() - start
+
+                    done = crawler.open_progress().counts().get("done", 0)
+                    crawler.progress_store.close()
+                    if crawler.review_index is not None:
+                        crawler.review_index.close()
+                finally:
+                    os.chdir(cwd)
+
+            results.append({
+                "workers": workers,
+                "tabs": tabs,
+                "places": places,
+                "places_done": done,
+                "total_seconds": round(seconds, 4),
+                "places_per_minute": round(done * 60 / seconds, 2) if seconds else None
+            })
+    finally:
+        server.stop()
+
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.machine()}, {os.cpu_count()} CPUs",
+        "settings": {
+            "size": size,
+            "batch": batch,
+            "latency_ms": latency_ms,
+            "tabs": tabs
+        },
+        "parallel": results
+    }
+
+def compare(previous, current):
+    """比較兩次結果中相同評論數量的耗時，返回每個數量的加速比"""
+    def by_size(report):
+        totals = {}
+        for result in report["results"]:
+            totals.setdefault(result["size"], []).append(result["total_seconds"])
+        return {size: sum(values) / len(values) for size, values in totals.items()}
+
+    old, new = by_size(previous), by_size(current)
+    return {
+        str(size): {
+            "previous_seconds": round(old[size], 4),
+            "current_seconds": round(new[size], 4),
+            "speedup": round(old[size] / new[size], 2) if new[size] else None
+        }
+        for size in sorted(set(old) & set(new))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline crawler benchmark against generated fixture pages")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                        help="number of reviews per fixture place")
+    parser.add_argument("--batch", type=int, default=10, help="reviews loaded per lazy-load batch")
+    parser.add_argument("--latency", type=int, default=150, help="lazy-load latency in milliseconds")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size")
+    parser.add_argument("--per-element", action="store_true",
+                        help="use the per-element extraction loop instead of the bulk script")
+    parser.add_argument("--stream-reviews", action="store_true",
+                        help="harvest reviews while scrolling and prune processed nodes instead of scroll/expand/extract")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="crawl --places fixture places with ParallelCrawler once per worker count "
+                             "and report places/min instead of the per-size phase timings")
+    parser.add_argument("--places", type=int, default=12, help="fixture places per --workers run")
+    parser.add_argument("--place-size", type=int, default=50, help="reviews per fixture place in --workers runs")
+    parser.add_argument("--tabs", type=int, default=1, help="tabs per browser in --workers runs")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.workers:
+        report = run_parallel(args.workers, args.places, args.place_size, args.batch, args.latency, args.tabs)
+    else:
+        report = run_benchmark(args.sizes, args.batch, args.latency, args.repeat, not args.per_element,
+                               args.stream_reviews)
+
+    if args.compare and not args.workers:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(json.load(f), report)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import argparse
 import os
 import logging
 from src.crawler import RestaurantCrawler
+from src.parallel_crawler import ParallelCrawler
 from src.data_processor import DataProcessor
+from src.pacing import HumanPacing, NoPacing
+from src.rate_limiter import AdaptiveRateLimiter, FixedRestLimiter
+from src.metrics import METRICS
+from src.url_collector import UrlCollector
+from src.search_planner import SearchPlanner
+from src.coordinator import open_coordinator
 
 def setup_directories():
     """設置必要的目錄結構"""
@@ -13,7 +20,68 @@ def setup_directories():
     os.makedirs('data/processed', exist_ok=True)
     os.makedirs('logs', exist_ok=True)
 
+def parse_args():
+    """解析命令列參數"""
+    parser = argparse.ArgumentParser(description="Google Maps restaurant review crawler")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of parallel crawl workers, each with its own browser (default: 1). "
+                             "With --rate-limit adaptive every worker and every tab paces itself (0.5 to 6 "
+                             "places/min each), so the total grows with --workers x --tabs; all of them share "
+                             "one IP, so a CAPTCHA pauses them all. Use --ip-max-rate to cap the total")
+    parser.add_argument("--capture-reviews", action="store_true",
+                        help="decode reviews from the Maps review RPC responses instead of the rendered DOM")
+    parser.add_argument("--stream-reviews", action="store_true",
+                        help="extract reviews while scrolling and drop processed review nodes from the page, "
+                             "so very large places are crawled within a fixed browser memory budget")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="restaurant tabs driven concurrently in each browser, max 8 (default: 1)")
+    parser.add_argument("--pacing", choices=["human", "none"], default="human",
+                        help="human-like delays between page actions, or none for local/benchmark pages (default: human)")
+    parser.add_argument("--rate-limit", choices=["adaptive", "fixed"], default="adaptive",
+                        help="adaptive (AIMD, backs off on CAPTCHA/empty pages/timeouts) or the old fixed rests (default: adaptive)")
+    parser.add_argument("--ip-max-rate", type=float, default=None,
+                        help="cap on the combined places/min of all workers and tabs of this process, "
+                             "which share one IP (adaptive rate limit only; default: no cap)")
+    parser.add_argument("--lean", action="store_true",
+                        help="block images, map tiles, fonts and media and disable GPU rendering")
+    parser.add_argument("--measure-traffic", action="store_true",
+                        help="log the bytes transferred for every place")
+    parser.add_argument("--collect-mode", choices=["feed", "click"], default="feed",
+                        help="feed: scroll each result list and read every card in one script; "
+                             "click: open the first results one by one (default: feed)")
+    parser.add_argument("--max-results-per-query", type=int, default=None,
+                        help="cap on places collected per search (default: the whole result list, 10 in click mode)")
+    parser.add_argument("--collect-workers", type=int, default=1,
+                        help="number of parallel URL collection workers, each with its own browser (default: 1)")
+    parser.add_argument("--tiles", action="store_true",
+                        help="search each city tile by tile with map-centred searches, splitting tiles whose results hit the cap")
+    parser.add_argument("--tile-depth", type=int, default=3,
+                        help="how many times a capped tile may be split into four (default: 3)")
+    parser.add_argument("--stream", action="store_true",
+                        help="start crawling places as soon as each search finishes instead of after the whole grid")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-visit already crawled restaurants and store only their new reviews")
+    parser.add_argument("--coordinator",
+                        help="share the crawl queue across hosts: sqlite:////shared/path/coordinator.db or redis://host:6379/0")
+    parser.add_argument("--lease-batch", type=int, default=5,
+                        help="places leased from the coordinator at a time (default: 5)")
+    parser.add_argument("--lease-ttl", type=int, default=300,
+                        help="seconds before an unrenewed lease goes back to the queue (default: 300)")
+    parser.add_argument("--worker-only", action="store_true",
+                        help="with --coordinator, skip URL collection and only crawl places leased from the shared queue")
+    parser.add_argument("--coordinator-status", action="store_true",
+                        help="only print the coordinator queue counts and per-host throughput and exit")
+    parser.add_argument("--metrics-file", default="logs/metrics.prom",
+                        help="Prometheus text file updated after every place; empty string disables it (default: logs/metrics.prom)")
+    parser.add_argument("--export", action="store_true",
+                        help="only compact the JSONL store into all_restaurants.json and exit")
+    parser.add_argument("--export-parquet", action="store_true",
+                        help="only export typed places/reviews Parquet datasets (needs pyarrow) and exit")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     # Setup directories
     setup_directories()
     
@@ -28,10 +96,44 @@ def main():
     )
     logger = logging.getLogger("MainApp")
     
-    # Initialize crawler
-    crawler = RestaurantCrawler()
     data_processor = DataProcessor()
     
+    if args.export:
+        data_processor.export_master_file()
+        return
+    
+    if args.export_parquet:
+        data_processor.export_parquet()
+        return
+    
+    if args.coordinator and (args.workers > 1 or args.stream):
+        logger.warning("--coordinator crawls with one browser per process, run one process per worker instead "
+                       "(--workers and --stream are ignored)")
+    coordinator = open_coordinator(args.coordinator, lease_ttl=args.lease_ttl) if args.coordinator else None
+    if args.coordinator_status:
+        if coordinator is None:
+            logger.error("--coordinator-status needs --coordinator")
+            return
+        logger.info(f"Queue: {coordinator.counts()}")
+        for stats in coordinator.host_stats():
+            logger.info(f"{stats['host']}: {stats['leases']} leases, {stats['done']} done, {stats['failed']} failed, "
+                        f"{stats['expired']} expired, {stats['reviews']} reviews, {stats['places_per_minute']} places/min")
+        return
+    
+    # Initialize crawler
+    pacing = HumanPacing() if args.pacing == "human" else NoPacing()
+    rate_limiter = (AdaptiveRateLimiter(ip_max_rate=args.ip_max_rate) if args.rate_limit == "adaptive"
+                    else FixedRestLimiter())
+    crawler = RestaurantCrawler(capture_reviews=args.capture_reviews, pacing=pacing,
+                                lean=args.lean, measure_traffic=args.measure_traffic,
+                                rate_limiter=rate_limiter, stream_reviews=args.stream_reviews,
+                                tabs=args.tabs)
+    crawler.metrics_file = args.metrics_file
+    if args.stream_reviews and args.capture_reviews:
+        logger.warning("--stream-reviews harvests reviews from the DOM, --capture-reviews is ignored for new places")
+    if args.tabs > 1 and (args.capture_reviews or args.measure_traffic):
+        logger.warning("--tabs harvests reviews from the DOM of each tab, --capture-reviews and --measure-traffic are ignored")
+    
     # City list
     cities = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", 
               "San Antonio", "San Diego", "Dallas", "San Francisco"]
@@ -40,23 +142,43 @@ def main():
     restaurant_types = ["Japanese Restaurant", "Chinese Restaurant", "Italian Restaurant", 
                       "Vegetarian Restaurant", "Korean Restaurant", "Cafe"]
     
-    # Phase 1: Collect restaurant URLs
-    try:
-        # Try to load saved URL list
-        with open("data/raw/restaurant_urls.json", "r", encoding='utf-8') as f:
-            restaurant_urls = json.load(f)
-        logger.info(f"Loaded {len(restaurant_urls)} restaurant URLs from file")
-    except:
-        # If no saved URLs, collect new ones
-        restaurant_urls = crawler.collect_restaurant_urls(restaurant_types, cities)
+    # Phase 1: Collect restaurant URLs (resumable, searches that are already done are skipped)
+    planner = SearchPlanner(max_depth=args.tile_depth) if args.tiles else None
+    collector = UrlCollector(crawler, workers=args.collect_workers, mode=args.collect_mode,
+                             max_results=args.max_results_per_query, planner=planner)
     
-    # Phase 2: Crawl restaurant reviews
-    crawler.crawl_restaurants(restaurant_urls)
+    if coordinator is not None and not args.refresh:
+        # Phase 2 shared across hosts: every host leases batches from the same queue
+        if not args.worker_only:
+            coordinator.add_urls(collector.collect(restaurant_types, cities))
+        crawler.crawl_leased(coordinator, batch_size=args.lease_batch)
+        coordinator.close()
+    elif args.stream and not args.refresh:
+        # Phases 1 and 2 together: places are crawled as soon as their search finishes
+        ParallelCrawler(crawler, workers=args.workers).crawl_while_collecting(collector, restaurant_types, cities)
+    else:
+        restaurant_urls = collector.collect(restaurant_types, cities)
+        
+        # Phase 2: Crawl restaurant reviews
+        if args.refresh:
+            crawler.refresh_restaurants(restaurant_urls)
+        elif args.workers > 1:
+            ParallelCrawler(crawler, workers=args.workers).crawl_restaurants(restaurant_urls)
+        else:
+            crawler.crawl_restaurants(restaurant_urls)
     
     # Phase 3: Merge any existing individual files (if needed)
-    if os.path.exists("data/raw/restaurant_*.json"):
+    if data_processor.find_restaurant_files():
         data_processor.merge_existing_files()
     
+    METRICS.log_summary(logger)
+    crawler.write_metrics()
+    
+    totals = data_processor.get_totals()
+    data_processor.close()
+    logger.info(f"Master store: {totals['total_restaurants']} restaurants, {totals['total_reviews']} reviews "
+                f"(last updated {totals['last_updated']})")
+    
     logger.info("Crawling completed successfully!")
 
 if __name__ == "__main__":
@@ -4,9 +4,23 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import SessionNotCreatedException
 import random
 import logging
+import time
+from .browser_startup import DRIVER_RESOLVER, ProfileTemplate
+from .page_scripts import STEALTH_JS
+from .metrics import METRICS
+
+# 精簡模式下封鎖的請求 (Network.setBlockedURLs 萬用字元格式)：
+# 圖片、地圖圖磚、字型與影音；評論照片只需要 URL，不需要下載內容
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*googleusercontent.com/*",
+    "*/maps/vt*", "*/kh/v=*", "*khms*.google.com/*", "*/maps/sv/*", "*streetviewpixels*",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.gstatic.com/*",
+    "*.mp4", "*.webm", "*.m3u8"
+]
 
 class BrowserManager:
     def __init__(self):
@@ -19,25 +33,62 @@ class BrowserManager:
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.84 Safari/537.36"
         ]
+        # 偏好設定 -> 設定檔範本
+        self.profile_templates = {}
+        # id(driver) -> 該瀏覽器使用的設定檔副本
+        self.profile_dirs = {}
+        # 最近一次啟動各步驟的耗時 (秒)
+        self.last_startup = None
+    
+    def get_driver_path(self):
+        """取得 ChromeDriver 路徑 (整個行程只解析一次，並以 Chrome 版本為鍵快取在磁碟上)"""
+        return DRIVER_RESOLVER.resolve()
+    
+    def profile_template(self, prefs):
+        """返回偏好設定對應的設定檔範本"""
+        key = tuple(sorted(prefs.items()))
+        if key not in self.profile_templates:
+            self.profile_templates[key] = ProfileTemplate(prefs)
+        return self.profile_templates[key]
+        
+    def create_browser(self, headless=False, capture_network=False, lean=False, blocked_urls=None, multi_tab=False):
+        """創建並配置瀏覽器實例；lean=True 時封鎖圖片、圖磚、字型與影音並停用 GPU 繪製
+
+        偏好設定來自預先建好的設定檔範本，隱藏 WebDriver 與語言屬性的腳本在任何頁面載入前註冊。
+        multi_tab=True 時導航不等待載入完成，且背景分頁不被降速 (供 TabCrawler 同時驅動多個分頁)。
+        """
+        started = time.perf_counter()
+        driver_path = self.get_driver_path()
+        resolved = time.perf_counter()
         
-    def create_browser(self, headless=False):
-        """創建並配置瀏覽器實例"""
         options = Options()
         
         if headless:
             options.add_argument("--headless")
         
+        prefs = {
+            'intl.accept_languages': 'en-US,en',
+            'profile.default_content_setting_values.geolocation': 1,  # Allow geolocation
+            'profile.default_content_setting_values.notifications': 2  # Block notifications
+        }
+        
+        if lean:
+            options.add_argument("--disable-gpu")
+            # 沒有 WebGL 時地圖不會以畫布繪製
+            options.add_argument("--disable-webgl")
+            options.add_argument("--disable-3d-apis")
+            prefs['profile.managed_default_content_settings.images'] = 2
+        
+        # 開啟效能日誌以擷取網路回應 (評論 RPC)
+        if capture_network:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
         # 隨機選擇一個 User-Agent
         user_agent = random.choice(self.user_agents)
         options.add_argument(f"user-agent={user_agent}")
         
         # 設置語言為英文
         options.add_argument("--lang=en-US")
-        options.add_experimental_option('prefs', {
-            'intl.accept_languages': 'en-US,en',
-            'profile.default_content_setting_values.geolocation': 1,  # Allow geolocation
-            'profile.default_content_setting_values.notifications': 2  # Block notifications
-        })
         
         # 禁用自動化檢測特性
         options.add_argument("--disable-blink-features=AutomationControlled")
@@ -52,28 +103,71 @@ class BrowserManager:
         # 其他設置
         options.add_argument("--disable-notifications")  # 禁用通知
         options.add_argument("--disable-popup-blocking")  # 允許彈出窗口
+        options.add_argument("--no-first-run")
+        options.add_argument("--no-default-browser-check")
+        
+        if multi_tab:
+            options.page_load_strategy = "none"
+            options.add_argument("--disable-background-timer-throttling")
+            options.add_argument("--disable-backgrounding-occluded-windows")
+            options.add_argument("--disable-renderer-backgrounding")
         
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        # 偏好設定已寫在範本中，每個瀏覽器使用一份副本
+        profile_dir = self.profile_template(prefs).checkout()
+        options.add_argument(f"--user-data-dir={profile_dir}")
+        profiled = time.perf_counter()
         
-        # 隱藏 WebDriver
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        try:
+            driver = self.launch(driver_path, options)
+        except:
+            ProfileTemplate.release(profile_dir)
+            raise
+        self.profile_dirs[id(driver)] = profile_dir
+        launched = time.perf_counter()
         
-        # 設置語言相關的 JavaScript 屬性
-        driver.execute_script("""
-            Object.defineProperty(navigator, 'language', {
-                get: function() { return 'en-US'; }
-            });
-            Object.defineProperty(navigator, 'languages', {
-                get: function() { return ['en-US', 'en']; }
-            });
-        """)
+        self.setup_tab(driver, lean=lean, blocked_urls=blocked_urls)
+        ready = time.perf_counter()
+        
+        self.last_startup = {
+            "driver_resolve": round(resolved - started, 4),
+            "profile": round(profiled - resolved, 4),
+            "launch": round(launched - profiled, 4),
+            "setup": round(ready - launched, 4),
+            "total": round(ready - started, 4)
+        }
+        METRICS.observe("crawl_browser_launch_seconds", ready - started)
         
         self.logger.info(f"已創建瀏覽器實例 (User-Agent: {user_agent[:30]}...)")
-        self.logger.info(f"瀏覽器語言設置: en-US")
+        self.logger.info(f"Browser ready in {ready - started:.2f}s (driver {resolved - started:.2f}s, "
+                         f"profile {profiled - resolved:.2f}s, launch {launched - profiled:.2f}s, "
+                         f"setup {ready - launched:.2f}s)")
         
         return driver
     
+    def setup_tab(self, driver, lean=False, blocked_urls=None):
+        """設定目前分頁：註冊隱藏 WebDriver 與語言屬性的腳本 (對之後的每個文件生效)，精簡模式下封鎖請求
+
+        CDP 命令只作用於目前分頁，新開的分頁需要再設定一次。
+        """
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_JS})
+        if lean:
+            self.block_urls(driver, blocked_urls or LEAN_BLOCKED_URLS)
+    
+    def launch(self, driver_path, options):
+        """啟動 Chrome；快取的驅動與已更新的 Chrome 不相容時重新解析一次"""
+        try:
+            return webdriver.Chrome(service=Service(driver_path), options=options)
+        except SessionNotCreatedException as e:
+            self.logger.warning(f"Cached ChromeDriver could not start Chrome, resolving again: {str(e)}")
+            DRIVER_RESOLVER.invalidate()
+            return webdriver.Chrome(service=Service(self.get_driver_path()), options=options)
+    
+    def block_urls(self, driver, blocked_urls):
+        """透過 CDP 封鎖符合模式的請求"""
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+        self.logger.info(f"精簡模式: 已封鎖 {len(blocked_urls)} 種請求")
+    
     def close_browser(self, driver):
         """安全關閉瀏覽器"""
         if driver:
@@ -81,4 +175,7 @@ class BrowserManager:
                 driver.quit()
                 self.logger.info("瀏覽器已安全關閉")
             except Exception as e:
-                self.logger.error(f"關閉瀏覽器時出錯: {str(e)}")
\ No newline at end of file
+                self.logger.error(f"關閉瀏覽器時出錯: {str(e)}")
+            profile_dir = self.profile_dirs.pop(id(driver), None)
+            if profile_dir:
+                ProfileTemplate.release(profile_dir)
\ No newline at end of file
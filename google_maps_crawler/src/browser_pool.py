@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from selenium.common.exceptions import WebDriverException
+from .browser_manager import BrowserManager
+from .metrics import METRICS
+
+class BrowserPool:
+    """保持溫熱的瀏覽器實例，按餐廳借出並在使用後重置狀態"""
+
+    def __init__(self, browser_manager=None, max_pages_per_browser=15,
+                 max_memory_mb=1024, max_failures=3, headless=False, capture_network=False,
+                 lean=False, blocked_urls=None, multi_tab=False):
+        self.logger = logging.getLogger("BrowserPool")
+        self.browser_manager = browser_manager or BrowserManager()
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_mb = max_memory_mb
+        self.max_failures = max_failures
+        self.headless = headless
+        self.capture_network = capture_network
+        self.lean = lean
+        self.blocked_urls = blocked_urls
+        # True: 瀏覽器供 TabCrawler 同時驅動多個分頁
+        self.multi_tab = multi_tab
+
+        self.lock = threading.Lock()
+        self.idle_drivers = []
+        # id(driver) -> {"pages": 已處理頁數, "failures": 連續失敗次數}
+        self.driver_stats = {}
+
+    def acquire(self, worker=None):
+        """借出一個瀏覽器，沒有空閒實例時新建"""
+        with self.lock:
+            driver = self.idle_drivers.pop() if self.idle_drivers else None
+
+        if driver is None:
+            with METRICS.time_phase("browser_startup", worker=worker):
+                driver = self.browser_manager.create_browser(headless=self.headless,
+                                                             capture_network=self.capture_network,
+                                                             lean=self.lean,
+                                                             blocked_urls=self.blocked_urls,
+                                                             multi_tab=self.multi_tab)
+            with self.lock:
+                self.driver_stats[id(driver)] = {"pages": 0, "failures": 0}
+            self.logger.info("瀏覽器池新建瀏覽器實例")
+
+        return driver
+
+    def release(self, driver, failed=False):
+        """歸還瀏覽器；超過頁數、記憶體或失敗門檻時直接回收"""
+        stats = self.driver_stats.get(id(driver))
+        if stats is None:
+            self.browser_manager.close_browser(driver)
+            return
+
+        stats["pages"] += 1
+        stats["failures"] = stats["failures"] + 1 if failed else 0
+
+        reason = self.recycle_reason(driver, stats)
+        if reason is None:
+            try:
+                self.reset_driver(driver)
+            except WebDriverException as e:
+                reason = f"重置失敗: {str(e)}"
+
+        if reason is not None:
+            self.logger.info(f"回收瀏覽器實例 ({reason})")
+            self.discard(driver)
+            return
+
+        with self.lock:
+            self.idle_drivers.append(driver)
+
+    def recycle_reason(self, driver, stats):
+        """判斷瀏覽器是否應被回收，返回原因或 None"""
+        if stats["pages"] >= self.max_pages_per_browser:
+            return f"已處理 {stats['pages']} 頁"
+        if stats["failures"] >= self.max_failures:
+            return f"連續失敗 {stats['failures']} 次"
+
+        try:
+            used_bytes = driver.execute_script(
+                "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0;"
+            )
+        except WebDriverException:
+            return "瀏覽器無回應"
+
+        used_mb = (used_bytes or 0) / (1024 * 1024)
+        if used_mb > self.max_memory_mb:
+            return f"JS 記憶體 {used_mb:.0f} MB"
+
+        return None
+
+    def reset_driver(self, driver):
+        """清除 cookies 與儲存空間並回到空白頁"""
+        driver.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+        )
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def discard(self, driver):
+        """關閉並移除瀏覽器實例"""
+        with self.lock:
+            self.driver_stats.pop(id(driver), None)
+        self.browser_manager.close_browser(driver)
+
+    def rotate(self):
+        """關閉所有空閒實例，使下一次借出使用新的身份 (User-Agent、視窗大小)"""
+        with self.lock:
+            drivers = self.idle_drivers
+            self.idle_drivers = []
+
+        for driver in drivers:
+            self.discard(driver)
+
+        if drivers:
+            self.logger.info(f"已輪換 {len(drivers)} 個瀏覽器實例")
+
+    def close(self):
+        """關閉池中所有空閒瀏覽器"""
+        self.rotate()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from webdriver_manager.chrome import ChromeDriverManager
+
+# 用於讀取本機 Chrome 版本 (驅動快取的鍵) 的執行檔
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+]
+
+def detect_chrome_version():
+    """返回本機 Chrome 的完整版本號，找不到時返回 None"""
+    for binary in CHROME_BINARIES:
+        try:
+            output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+        if match:
+            return match.group(0)
+    return None
+
+def expand_prefs(prefs):
+    """把 "a.b.c" 形式的偏好設定展開為 Preferences 文件的巢狀結構 (與 ChromeDriver 的做法相同)"""
+    expanded = {}
+    for name, value in prefs.items():
+        node = expanded
+        parts = name.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return expanded
+
+class DriverResolver:
+    """解析 ChromeDriver 路徑：每個行程只解析一次，並以 Chrome 版本為鍵快取在磁碟上
+
+    快取命中時不呼叫 ChromeDriverManager，也就不做版本檢查與下載。
+    """
+
+    def __init__(self, cache_file="data/cache/chromedriver.json"):
+        self.logger = logging.getLogger("DriverResolver")
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.driver_path = None
+
+    def resolve(self):
+        """返回 ChromeDriver 路徑"""
+        with self.lock:
+            if self.driver_path is None:
+                self.driver_path = self.load_or_install()
+            return self.driver_path
+
+    def load_or_install(self):
+        """讀取磁碟快取；Chrome 版本改變或驅動文件不存在時重新安裝"""
+        version = detect_chrome_version() or "unknown"
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            cached = {}
+
+        if cached.get("chrome_version") == version and os.path.exists(cached.get("driver_path", "")):
+            self.logger.info(f"Using cached ChromeDriver for Chrome {version}: {cached['driver_path']}")
+            return cached["driver_path"]
+
+        driver_path = ChromeDriverManager().install()
+
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"chrome_version": version, "driver_path": driver_path}, f)
+        os.replace(tmp_file, self.cache_file)
+
+        self.logger.info(f"Resolved ChromeDriver for Chrome {version}: {driver_path}")
+        return driver_path
+
+    def invalidate(self):
+        """快取的驅動無法啟動瀏覽器時 (例如 Chrome 已自動更新) 清除快取"""
+        with self.lock:
+            self.driver_path = None
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+
+# 整個行程共用，所有瀏覽器管理器與工作執行緒只解析一次
+DRIVER_RESOLVER = DriverResolver()
+
+class ProfileTemplate:
+    """已寫好偏好設定的 Chrome user-data-dir 範本，每次啟動複製一份使用
+
+    偏好設定不同 (如精簡模式封鎖圖片) 時使用不同的範本目錄。
+    """
+
+    def __init__(self, prefs, base_dir="data/cache/chrome_profiles"):
+        self.prefs = prefs
+        key = hashlib.sha1(json.dumps(prefs, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.template_dir = os.path.join(base_dir, key)
+        self.lock = threading.Lock()
+
+    def ensure(self):
+        """建立範本 (已存在時不做任何事)"""
+        with self.lock:
+            if os.path.exists(os.path.join(self.template_dir, "Default", "Preferences")):
+                return
+
+            os.makedirs(os.path.dirname(self.template_dir), exist_ok=True)
+            build_dir = tempfile.mkdtemp(prefix="build_", dir=os.path.dirname(self.template_dir))
+            os.makedirs(os.path.join(build_dir, "Default"))
+            with open(os.path.join(build_dir, "Default", "Preferences"), "w", encoding="utf-8") as f:
+                json.dump(expand_prefs(self.prefs), f)
+            # 略過首次執行流程
+            open(os.path.join(build_dir, "First Run"), "w").close()
+
+            try:
+                os.replace(build_dir, self.template_dir)
+            except OSError:
+                # 其他行程已建好範本
+                shutil.rmtree(build_dir, ignore_errors=True)
+
+    def checkout(self):
+        """複製範本到新的暫存目錄並返回路徑 (每個瀏覽器實例需要自己的 user-data-dir)"""
+        self.ensure()
+        profile_dir = tempfile.mkdtemp(prefix="chrome_profile_")
+        shutil.copytree(self.template_dir, profile_dir, dirs_exist_ok=True)
+        return profile_dir
+
+    @staticmethod
+    def release(profile_dir):
+        """刪除瀏覽器使用過的設定檔副本"""
+        shutil.rmtree(profile_dir, ignore_errors=True)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import shutil
+from .utils import extract_rating_value, parse_count, parse_relative_date, parse_crawl_time
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+UNKNOWN_CATEGORY = "unknown"
+
+def places_schema():
+    return pa.schema([
+        ("place_id", pa.string()),
+        ("name", pa.string()),
+        ("address", pa.string()),
+        ("overall_rating", pa.float64()),
+        ("reviews_count", pa.int64()),
+        ("reviews_scraped", pa.int64()),
+        ("url", pa.string()),
+        ("crawl_time", pa.timestamp("s")),
+        ("city", pa.string()),
+        ("type", pa.string())
+    ])
+
+def reviews_schema():
+    return pa.schema([
+        ("place_id", pa.string()),
+        ("position", pa.int32()),
+        ("reviewer_name", pa.string()),
+        ("rating", pa.float64()),
+        ("date_text", pa.string()),
+        ("date_approx", pa.date32()),
+        ("text", pa.string()),
+        ("photos", pa.list_(pa.string())),
+        ("tags", pa.list_(pa.string())),
+        ("city", pa.string()),
+        ("type", pa.string())
+    ])
+
+def place_row(record, place_id, city, place_type, crawl_time):
+    """Typed place row from a master store record"""
+    return {
+        "place_id": place_id,
+        "name": record.get("name"),
+        "address": record.get("address"),
+        "overall_rating": extract_rating_value(record.get("overall_rating")),
+        "reviews_count": parse_count(record.get("reviews_count")),
+        "reviews_scraped": len(record.get("reviews", [])),
+        "url": record.get("url"),
+        "crawl_time": crawl_time,
+        "city": city,
+        "type": place_type
+    }
+
+def review_rows(record, place_id, city, place_type, crawl_time):
+    """Typed review rows from a master store record; dates are resolved against crawl_time"""
+    for position, review in enumerate(record.get("reviews", [])):
+        date_approx = parse_relative_date(review.get("date"), crawl_time) if crawl_time else None
+        yield {
+            "place_id": place_id,
+            "position": position,
+            "reviewer_name": review.get("reviewer_name"),
+            "rating": extract_rating_value(review.get("rating")),
+            "date_text": review.get("date"),
+            "date_approx": date_approx.date() if date_approx else None,
+            "text": review.get("text"),
+            "photos": review.get("photos") or [],
+            "tags": review.get("tags") or [],
+            "city": city,
+            "type": place_type
+        }
+
+class ColumnarExporter:
+    """Export the master store as two Parquet datasets, places and reviews, joined on place_id.
+
+    Both datasets are hive-partitioned by city and type (taken from the search that found the place)
+    and written from record batches, so memory stays bounded by batch_size.
+    """
+
+    def __init__(self, store, categories=None, output_dir="data/processed/parquet", batch_size=5000):
+        self.logger = logging.getLogger("ColumnarExporter")
+        self.store = store
+        # place_id -> (city, type)
+        self.categories = categories or {}
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+
+    def iter_rows(self):
+        """Yield (place_row, review_rows) per crawled place"""
+        for record in self.store.iter_merged_records():
+            place_id = self.store.record_key(record)
+            city, place_type = self.categories.get(place_id, (UNKNOWN_CATEGORY, UNKNOWN_CATEGORY))
+            crawl_time = parse_crawl_time(record.get("crawl_time"))
+            yield (place_row(record, place_id, city, place_type, crawl_time),
+                   review_rows(record, place_id, city, place_type, crawl_time))
+
+    def iter_batches(self, schema, rows):
+        """Group rows into record batches of batch_size"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield pa.RecordBatch.from_pylist(batch, schema=schema)
+                batch = []
+        if batch:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+    def write_dataset(self, name, schema, rows):
+        """Write one partitioned dataset, replacing any previous export"""
+        base_dir = os.path.join(self.output_dir, name)
+        if os.path.exists(base_dir):
+            shutil.rmtree(base_dir)
+
+        ds.write_dataset(self.iter_batches(schema, rows), base_dir, schema=schema, format="parquet",
+                         partitioning=ds.partitioning(pa.schema([("city", pa.string()), ("type", pa.string())]),
+                                                      flavor="hive"),
+                         existing_data_behavior="overwrite_or_ignore")
+        return base_dir
+
+    def export(self):
+        """Write the places and reviews datasets, returning their row counts"""
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the Parquet export (pip install pyarrow)")
+
+        counts = {"places": 0, "reviews": 0}
+
+        def places():
+            for place, _ in self.iter_rows():
+                counts["places"] += 1
+                yield place
+
+        def reviews():
+            for _, rows in self.iter_rows():
+                for review in rows:
+                    counts["reviews"] += 1
+                    yield review
+
+        # Two passes over the store keep only one batch of each table in memory
+        places_dir = self.write_dataset("places", places_schema(), places())
+        reviews_dir = self.write_dataset("reviews", reviews_schema(), reviews())
+
+        self.logger.info(f"Exported {counts['places']} places to {places_dir} and "
+                         f"{counts['reviews']} reviews to {reviews_dir}")
+        return counts
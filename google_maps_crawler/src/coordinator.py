@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from .metrics import METRICS
+from .utils import place_key, canonical_place_url
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+def default_owner():
+    """租約持有者：主機名稱加行程 ID (同一台主機可執行多個爬蟲行程)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def host_throughput(stats):
+    """為每台主機的統計加上每分鐘完成的餐廳數 (以第一次租用到最後一次活動的時間計算)"""
+    elapsed = max(float(stats.get("last_seen") or 0) - float(stats.get("first_seen") or 0), 1)
+    stats["places_per_minute"] = round(int(stats.get("done") or 0) * 60 / elapsed, 2)
+    return stats
+
+class Lease:
+    """一批租用的餐廳：在 expires_at 之前必須提交或續約，否則會被放回佇列"""
+
+    def __init__(self, lease_id, owner, place_ids, urls, expires_at):
+        self.lease_id = lease_id
+        self.owner = owner
+        # URL -> 協調器中的地點鍵 (登記時的 place_key，提交時使用)
+        self.place_ids = dict(zip(urls, place_ids))
+        self.urls = urls
+        self.expires_at = expires_at
+        # 已提交的 URL
+        self.committed = set()
+
+    def uncommitted(self):
+        return [url for url in self.urls if url not in self.committed]
+
+    def place_id(self, url):
+        return self.place_ids.get(url) or place_key(url)
+
+class SQLiteCoordinator:
+    """以放在共享儲存 (NFS/SMB) 上的 SQLite 資料庫協調多台主機的爬取
+
+    共享儲存不支援 WAL 的共享記憶體，因此使用 DELETE 日誌模式，租用以 BEGIN IMMEDIATE 取得寫入鎖。
+    租約到期時間使用各主機的時鐘，主機之間需要以 NTP 同步。
+    """
+
+    def __init__(self, db_file="data/shared/coordinator.db", lease_ttl=300, max_attempts=3, owner=None):
+        self.logger = logging.getLogger("SQLiteCoordinator")
+        self.db_file = db_file
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.owner = owner or default_owner()
+        self.host = self.owner.split(":")[0]
+
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        # 續約在心跳執行緒中進行，所有操作以 lock 串行化
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.create_tables()
+
+    def create_tables(self):
+        """建立工作表與主機統計表"""
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS work (
+                    place_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    lease_id TEXT,
+                    owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    review_count INTEGER,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_status ON work (status, created_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_lease ON work (lease_id)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS hosts (
+                    host TEXT PRIMARY KEY,
+                    leases INTEGER NOT NULL DEFAULT 0,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    expired INTEGER NOT NULL DEFAULT 0,
+                    reviews INTEGER NOT NULL DEFAULT 0,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                )
+            """)
+
+    def transaction(self):
+        """取得資料庫寫入鎖的交易 (BEGIN IMMEDIATE)"""
+        return SQLiteTransaction(self.conn)
+
+    def add_urls(self, urls):
+        """登記待爬取的餐廳，已存在的地點不受影響"""
+        now = time.time()
+        with self.lock, self.transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO work (place_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(place_key(url), canonical_place_url(url), STATUS_PENDING, now, now) for url in urls]
+            )
+
+    def touch_host(self, now, **counters):
+        """累加本主機的統計 (呼叫時需在交易中)"""
+        columns = ", ".join(f"{name} = {name} + ?" for name in counters)
+        assignments = f"{columns}, last_seen = ?" if columns else "last_seen = ?"
+        self.conn.execute("INSERT OR IGNORE INTO hosts (host, first_seen, last_seen) VALUES (?, ?, ?)",
+                          (self.host, now, now))
+        self.conn.execute(f"UPDATE hosts SET {assignments} WHERE host = ?",
+                          (*counters.values(), now, self.host))
+
+    def requeue_expired_locked(self, now):
+        """把到期租約中的餐廳放回佇列，嘗試次數用完的記為失敗 (呼叫時需在交易中)"""
+        rows = self.conn.execute(
+            "SELECT owner, COUNT(*) FROM work WHERE status = ? AND lease_expires < ? GROUP BY owner",
+            (STATUS_LEASED, now)
+        ).fetchall()
+        if not rows:
+            return 0
+
+        self.conn.execute("""
+            UPDATE work SET
+                status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                last_error = CASE WHEN attempts >= ? THEN 'lease expired' ELSE last_error END,
+                lease_id = NULL, owner = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = ? AND lease_expires < ?
+        """, (self.max_attempts, STATUS_FAILED, STATUS_PENDING, self.max_attempts, now, STATUS_LEASED, now))
+
+        for owner, count in rows:
+            self.conn.execute("UPDATE hosts SET expired = expired + ? WHERE host = ?",
+                              (count, (owner or "").split(":")[0]))
+        return sum(count for _, count in rows)
+
+    def log_expired(self, expired):
+        if expired:
+            METRICS.inc("crawl_lease_expired_total", expired)
+            self.logger.warning(f"{expired} leased places expired and were requeued")
+
+    def requeue_expired(self):
+        """把到期租約中的餐廳放回佇列，返回數量"""
+        with self.lock, self.transaction():
+            expired = self.requeue_expired_locked(time.time())
+        self.log_expired(expired)
+        return expired
+
+    def lease(self, batch_size=5):
+        """租用最多 batch_size 家待爬取的餐廳 (先回收到期的租約)"""
+        now = time.time()
+        lease_id = uuid.uuid4().hex
+        expires_at = now + self.lease_ttl
+
+        with self.lock, self.transaction():
+            expired = self.requeue_expired_locked(now)
+            rows = self.conn.execute("""
+                SELECT place_id, url FROM work
+                WHERE status = ? OR (status = ? AND attempts < ?)
+                ORDER BY created_at LIMIT ?
+            """, (STATUS_PENDING, STATUS_FAILED, self.max_attempts, batch_size)).fetchall()
+
+            if rows:
+                self.conn.executemany("""
+                    UPDATE work SET status = ?, lease_id = ?, owner = ?, lease_expires = ?,
+                        attempts = attempts + 1, updated_at = ?
+                    WHERE place_id = ?
+                """, [(STATUS_LEASED, lease_id, self.owner, expires_at, now, place_id) for place_id, _ in rows])
+                self.touch_host(now, leases=1)
+
+        self.log_expired(expired)
+        return Lease(lease_id, self.owner, [place_id for place_id, _ in rows], [url for _, url in rows], expires_at)
+
+    def heartbeat(self, lease):
+        """續約，租約已到期並被回收時返回 False"""
+        now = time.time()
+        expires_at = now + self.lease_ttl
+        with self.lock, self.transaction():
+            updated = self.conn.execute(
+                "UPDATE work SET lease_expires = ? WHERE lease_id = ? AND status = ?",
+                (expires_at, lease.lease_id, STATUS_LEASED)
+            ).rowcount
+            self.touch_host(now)
+
+        if updated:
+            lease.expires_at = expires_at
+        # 提交後的餐廳不再屬於租約，全部提交後沒有可續約的記錄是正常的
+        return updated > 0 or not lease.uncommitted()
+
+    def commit(self, lease, url, review_count=None, error=None):
+        """提交一家餐廳的結果；餐廳已被其他主機租用或完成時返回 False"""
+        now = time.time()
+        done = error is None
+        with self.lock, self.transaction():
+            updated = self.conn.execute("""
+                UPDATE work SET status = ?, review_count = COALESCE(?, review_count), last_error = ?,
+                    lease_id = NULL, owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE place_id = ? AND status != ? AND (lease_id = ? OR status != ?)
+            """, (STATUS_DONE if done else STATUS_FAILED, review_count, error, now,
+                  lease.place_id(url), STATUS_DONE, lease.lease_id, STATUS_LEASED)).rowcount
+            lease.committed.add(url)
+            if updated:
+                if done:
+                    self.touch_host(now, done=1, reviews=review_count or 0)
+                else:
+                    self.touch_host(now, failed=1)
+        return updated > 0
+
+    def release(self, lease):
+        """歸還租約中尚未提交的餐廳 (不計入嘗試次數)"""
+        now = time.time()
+        with self.lock, self.transaction():
+            released = self.conn.execute("""
+                UPDATE work SET status = ?, attempts = attempts - 1,
+                    lease_id = NULL, owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE lease_id = ? AND status = ?
+            """, (STATUS_PENDING, now, lease.lease_id, STATUS_LEASED)).rowcount
+        return released
+
+    def remaining(self):
+        """尚未完成的餐廳數 (待處理、租用中與可重試的失敗)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM work WHERE status IN (?, ?) OR (status = ? AND attempts < ?)",
+                (STATUS_PENDING, STATUS_LEASED, STATUS_FAILED, self.max_attempts)
+            ).fetchone()
+        return row[0]
+
+    def counts(self):
+        """各狀態的餐廳數量"""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM work GROUP BY status").fetchall()
+        return dict(rows)
+
+    def host_stats(self):
+        """每台主機的租用、完成、失敗、到期次數與每分鐘完成的餐廳數"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM hosts ORDER BY host")
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        return [host_throughput(dict(zip(columns, row))) for row in rows]
+
+    def close(self):
+        """關閉資料庫連線"""
+        with self.lock:
+            self.conn.close()
+
+class SQLiteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT，發生例外時 ROLLBACK"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+# Redis 版本的共用 Lua 函數：把到期租約中的餐廳放回佇列，返回數量
+REDIS_REQUEUE_LUA = """
+local function requeue_expired(p, now, max_attempts)
+    local count = 0
+    for _, lease_id in ipairs(redis.call('ZRANGEBYSCORE', p .. ':leases', '-inf', '(' .. now)) do
+        local host = redis.call('HGET', p .. ':lease_hosts', lease_id)
+        for _, id in ipairs(redis.call('SMEMBERS', p .. ':lease:' .. lease_id)) do
+            if redis.call('HGET', p .. ':owner', id) == lease_id and redis.call('HGET', p .. ':status', id) == 'leased' then
+                redis.call('HDEL', p .. ':owner', id)
+                if tonumber(redis.call('HGET', p .. ':attempts', id) or '0') >= max_attempts then
+                    redis.call('HSET', p .. ':status', id, 'failed')
+                    redis.call('HSET', p .. ':errors', id, 'lease expired')
+                else
+                    redis.call('HSET', p .. ':status', id, 'pending')
+                    redis.call('RPUSH', p .. ':queue', id)
+                end
+                count = count + 1
+                if host then
+                    redis.call('HINCRBY', p .. ':host:' .. host, 'expired', 1)
+                end
+            end
+        end
+        redis.call('DEL', p .. ':lease:' .. lease_id)
+        redis.call('ZREM', p .. ':leases', lease_id)
+        redis.call('HDEL', p .. ':lease_hosts', lease_id)
+    end
+    return count
+end
+
+local function server_time()
+    local t = redis.call('TIME')
+    return tonumber(t[1]) + tonumber(t[2]) / 1000000
+end
+
+local function touch_host(p, host, now)
+    redis.call('SADD', p .. ':hosts', host)
+    redis.call('HSETNX', p .. ':host:' .. host, 'first_seen', tostring(now))
+    redis.call('HSET', p .. ':host:' .. host, 'last_seen', tostring(now))
+end
+"""
+
+# ARGV: prefix, place_id, url, place_id, url, ...
+REDIS_ADD_LUA = """
+local p = ARGV[1]
+local added = 0
+for i = 2, #ARGV, 2 do
+    if redis.call('HSETNX', p .. ':urls', ARGV[i], ARGV[i + 1]) == 1 then
+        redis.call('HSET', p .. ':status', ARGV[i], 'pending')
+        redis.call('RPUSH', p .. ':queue', ARGV[i])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# ARGV: prefix, lease_id, host, batch_size, lease_ttl, max_attempts
+# 返回 {到期數量, 到期時間, place_id, url, place_id, url, ...}
+REDIS_LEASE_LUA = REDIS_REQUEUE_LUA + """
+local p, lease_id, host = ARGV[1], ARGV[2], ARGV[3]
+local batch_size, ttl, max_attempts = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+local now = server_time()
+local result = {requeue_expired(p, now, max_attempts), tostring(now + ttl)}
+local leased = 0
+
+while leased < batch_size do
+    local id = redis.call('LPOP', p .. ':queue')
+    if not id then
+        break
+    end
+    local status = redis.call('HGET', p .. ':status', id)
+    if status == 'pending' or status == 'failed' then
+        redis.call('HSET', p .. ':status', id, 'leased')
+        redis.call('HSET', p .. ':owner', id, lease_id)
+        redis.call('HINCRBY', p .. ':attempts', id, 1)
+        redis.call('SADD', p .. ':lease:' .. lease_id, id)
+        table.insert(result, id)
+        table.insert(result, redis.call('HGET', p .. ':urls', id))
+        leased = leased + 1
+    end
+end
+
+if leased > 0 then
+    redis.call('ZADD', p .. ':leases', now + ttl, lease_id)
+    redis.call('HSET', p .. ':lease_hosts', lease_id, host)
+    touch_host(p, host, now)
+    redis.call('HINCRBY', p .. ':host:' .. host, 'leases', 1)
+end
+return result
+"""
+
+# ARGV: prefix, lease_id, host, lease_ttl；返回新的到期時間，租約已被回收時返回 false
+REDIS_HEARTBEAT_LUA = REDIS_REQUEUE_LUA + """
+local p, lease_id, host = ARGV[1], ARGV[2], ARGV[3]
+local now = server_time()
+touch_host(p, host, now)
+if not redis.call('ZSCORE', p .. ':leases', lease_id) then
+    return false
+end
+redis.call('ZADD', p .. ':leases', now + tonumber(ARGV[4]), lease_id)
+return tostring(now + tonumber(ARGV[4]))
+"""
+
+# ARGV: prefix, lease_id, host, place_id, review_count, error, max_attempts；返回 1 (已提交) 或 0
+REDIS_COMMIT_LUA = REDIS_REQUEUE_LUA + """
+local p, lease_id, host, id = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local status = redis.call('HGET', p .. ':status', id)
+if status == 'done' or (status == 'leased' and redis.call('HGET', p .. ':owner', id) ~= lease_id) then
+    return 0
+end
+
+redis.call('HDEL', p .. ':owner', id)
+redis.call('SREM', p .. ':lease:' .. lease_id, id)
+touch_host(p, host, server_time())
+if ARGV[6] == '' then
+    redis.call('HSET', p .. ':status', id, 'done')
+    redis.call('HSET', p .. ':review_counts', id, ARGV[5])
+    redis.call('HINCRBY', p .. ':host:' .. host, 'done', 1)
+    redis.call('HINCRBY', p .. ':host:' .. host, 'reviews', tonumber(ARGV[5]) or 0)
+else
+    redis.call('HSET', p .. ':status', id, 'failed')
+    redis.call('HSET', p .. ':errors', id, ARGV[6])
+    redis.call('HINCRBY', p .. ':host:' .. host, 'failed', 1)
+    -- 已在佇列中 (租約到期後被放回) 的餐廳不重複加入
+    if status == 'leased' and tonumber(redis.call('HGET', p .. ':attempts', id) or '0') < tonumber(ARGV[7]) then
+        redis.call('RPUSH', p .. ':queue', id)
+    end
+end
+return 1
+"""
+
+# ARGV: prefix, lease_id；返回歸還的數量
+REDIS_RELEASE_LUA = """
+local p, lease_id = ARGV[1], ARGV[2]
+local released = 0
+for _, id in ipairs(redis.call('SMEMBERS', p .. ':lease:' .. lease_id)) do
+    if redis.call('HGET', p .. ':owner', id) == lease_id and redis.call('HGET', p .. ':status', id) == 'leased' then
+        redis.call('HDEL', p .. ':owner', id)
+        redis.call('HSET', p .. ':status', id, 'pending')
+        redis.call('HINCRBY', p .. ':attempts', id, -1)
+        redis.call('LPUSH', p .. ':queue', id)
+        released = released + 1
+    end
+end
+redis.call('DEL', p .. ':lease:' .. lease_id)
+redis.call('ZREM', p .. ':leases', lease_id)
+redis.call('HDEL', p .. ':lease_hosts', lease_id)
+return released
+"""
+
+# ARGV: prefix, max_attempts
+REDIS_REQUEUE_EXPIRED_LUA = REDIS_REQUEUE_LUA + """
+return requeue_expired(ARGV[1], server_time(), tonumber(ARGV[2]))
+"""
+
+class RedisCoordinator:
+    """以 Redis (或相容的伺服器，如 KeyDB、Valkey) 協調多台主機的爬取
+
+    每個操作是一段 Lua 腳本，在伺服器上原子地執行；租約到期時間使用伺服器時鐘。
+    所有鍵以 prefix 開頭，需要 Redis 5 以上的單一實例 (不支援叢集分片)。client 為 redis-py 相容的客戶端。
+    """
+
+    def __init__(self, client, prefix="gmaps", lease_ttl=300, max_attempts=3, owner=None):
+        self.logger = logging.getLogger("RedisCoordinator")
+        self.client = client
+        self.prefix = prefix
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.owner = owner or default_owner()
+        self.host = self.owner.split(":")[0]
+
+        self.add_script = client.register_script(REDIS_ADD_LUA)
+        self.lease_script = client.register_script(REDIS_LEASE_LUA)
+        self.heartbeat_script = client.register_script(REDIS_HEARTBEAT_LUA)
+        self.commit_script = client.register_script(REDIS_COMMIT_LUA)
+        self.release_script = client.register_script(REDIS_RELEASE_LUA)
+        self.requeue_script = client.register_script(REDIS_REQUEUE_EXPIRED_LUA)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """從 redis://host:port/db 建立 (需要安裝 redis 套件)"""
+        if redis is None:
+            raise RuntimeError("Redis coordination needs the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def add_urls(self, urls, chunk_size=500):
+        """登記待爬取的餐廳，已存在的地點不受影響"""
+        urls = list(urls)
+        for start in range(0, len(urls), chunk_size):
+            args = [self.prefix]
+            for url in urls[start:start + chunk_size]:
+                args.extend([place_key(url), canonical_place_url(url)])
+            self.add_script(args=args)
+
+    def log_expired(self, expired):
+        if expired:
+            METRICS.inc("crawl_lease_expired_total", expired)
+            self.logger.warning(f"{expired} leased places expired and were requeued")
+
+    def requeue_expired(self):
+        """把到期租約中的餐廳放回佇列，返回數量"""
+        expired = int(self.requeue_script(args=[self.prefix, self.max_attempts]))
+        self.log_expired(expired)
+        return expired
+
+    def lease(self, batch_size=5):
+        """租用最多 batch_size 家待爬取的餐廳 (先回收到期的租約)"""
+        lease_id = uuid.uuid4().hex
+        result = self.lease_script(args=[self.prefix, lease_id, self.host, batch_size,
+                                         self.lease_ttl, self.max_attempts])
+        self.log_expired(int(result[0]))
+        return Lease(lease_id, self.owner, list(result[2::2]), list(result[3::2]), float(result[1]))
+
+    def heartbeat(self, lease):
+        """續約，租約已到期並被回收時返回 False"""
+        expires_at = self.heartbeat_script(args=[self.prefix, lease.lease_id, self.host, self.lease_ttl])
+        if not expires_at:
+            return False
+        lease.expires_at = float(expires_at)
+        return True
+
+    def commit(self, lease, url, review_count=None, error=None):
+        """提交一家餐廳的結果；餐廳已被其他主機租用或完成時返回 False"""
+        committed = self.commit_script(args=[self.prefix, lease.lease_id, self.host, lease.place_id(url),
+                                             review_count if review_count is not None else "",
+                                             "" if error is None else (error or "error"),
+                                             self.max_attempts])
+        lease.committed.add(url)
+        return int(committed) == 1
+
+    def release(self, lease):
+        """歸還租約中尚未提交的餐廳 (不計入嘗試次數)"""
+        return int(self.release_script(args=[self.prefix, lease.lease_id]))
+
+    def remaining(self):
+        """尚未完成的餐廳數 (待處理、租用中與可重試的失敗)"""
+        statuses = self.client.hgetall(f"{self.prefix}:status")
+        attempts = self.client.hgetall(f"{self.prefix}:attempts")
+        return sum(1 for place_id, status in statuses.items()
+                   if status in (STATUS_PENDING, STATUS_LEASED)
+                   or (status == STATUS_FAILED and int(attempts.get(place_id, 0)) < self.max_attempts))
+
+    def counts(self):
+        """各狀態的餐廳數量"""
+        counts = {}
+        for status in self.client.hvals(f"{self.prefix}:status"):
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def host_stats(self):
+        """每台主機的租用、完成、失敗、到期次數與每分鐘完成的餐廳數"""
+        stats = []
+        for host in sorted(self.client.smembers(f"{self.prefix}:hosts")):
+            entry = {"host": host, "leases": 0, "done": 0, "failed": 0, "expired": 0, "reviews": 0}
+            entry.update({key: float(value) if key.endswith("_seen") else int(value)
+                          for key, value in self.client.hgetall(f"{self.prefix}:host:{host}").items()})
+            stats.append(host_throughput(entry))
+        return stats
+
+    def close(self):
+        """關閉連線"""
+        self.client.close()
+
+def open_coordinator(url, **kwargs):
+    """按網址建立協調器：redis://host:port/db 或 sqlite:///path/to/coordinator.db (或直接使用文件路徑)"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCoordinator.from_url(url, **kwargs)
+    # 與 SQLAlchemy 相同：sqlite:///相對路徑、sqlite:////絕對路徑
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url
+    return SQLiteCoordinator(path, **kwargs)
+
+class LeaseHeartbeat:
+    """在背景執行緒中定期續約 (預設每 1/3 租約時間)，續約失敗時設定 lost
+
+    with LeaseHeartbeat(coordinator, lease) as heartbeat:
+        ... 檢查 heartbeat.lost 後再處理下一家餐廳
+    """
+
+    def __init__(self, coordinator, lease, interval=None):
+        self.logger = logging.getLogger("LeaseHeartbeat")
+        self.coordinator = coordinator
+        self.lease = lease
+        self.interval = interval or max(coordinator.lease_ttl / 3, 1)
+        self.stopped = threading.Event()
+        self.lost = False
+        self.thread = None
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                if not self.coordinator.heartbeat(self.lease):
+                    self.lost = True
+                    self.logger.warning(f"Lease {self.lease.lease_id} expired before it could be renewed")
+                    return
+            except Exception as e:
+                # 暫時無法連線時繼續嘗試，租約到期前恢復即可
+                self.logger.warning(f"Lease heartbeat failed: {str(e)}")
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.run, name="lease-heartbeat", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stopped.set()
+        self.thread.join()
+        return False
@@ -4,99 +4,119 @@
 import time
 import random
 import logging
-import json
-import os
+import queue
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 from .data_processor import DataProcessor
+from .master_store import ReviewSpool
+from .browser_pool import BrowserPool
+from .progress_store import ProgressStore
+from .page_scripts import (EXTRACT_REVIEWS_JS, REVIEW_KEYS_JS, DETECT_BLOCK_JS, HARVEST_RESULT_FEED_JS,
+                           TAB_HARVEST_STEP_JS)
+from .review_capture import ReviewCapture
+from .network_log import read_performance_log, bytes_transferred, blocked_requests
+from .review_index import ReviewIndex, review_key
+from .review_loader import ReviewLoader, REVIEW_CONTAINER_SELECTOR
+from .selector_registry import SELECTOR_REGISTRY
+from .tab_crawler import TabCrawler
+from .coordinator import LeaseHeartbeat
+from .pacing import HumanPacing
+from .metrics import METRICS
+from .rate_limiter import (AdaptiveRateLimiter, BlockedError, OUTCOME_OK, OUTCOME_BLOCKED,
+                           OUTCOME_EMPTY, OUTCOME_TIMEOUT, OUTCOME_ERROR)
+from .url_collector import UrlCollector
+from .utils import parse_count, place_key, canonical_place_url
+
+# 主數據文件寫入失敗時記錄的錯誤 (餐廳會被重試)
+WRITE_FAILED_ERROR = "could not write record to the master store"
+
+# 評論欄位缺失時的預設值
+REVIEW_DEFAULTS = {
+    "reviewer_name": "Anonymous",
+    "rating": "No rating",
+    "date": "Unknown date"
+}
 
 class RestaurantCrawler:
-    def __init__(self):
+    def __init__(self, bulk_extraction=True, max_pages_per_browser=15, capture_reviews=False, pacing=None,
+                 lean=False, measure_traffic=False, rate_limiter=None, stream_reviews=False, selector_registry=None,
+                 tabs=1):
         self.setup_logging()
+        # 人為節奏策略：HumanPacing (預設) 或 NoPacing
+        self.pacing = pacing or HumanPacing()
+        self.review_loader = ReviewLoader(pacing=self.pacing, logger=self.logger)
+        # 指標中的工作執行緒標籤 (ParallelCrawler 會改為 worker-N)
+        self.worker_name = "main"
+        self.review_loader.worker_name = self.worker_name
+        # 設定後每處理完一家餐廳就更新 Prometheus 指標文件
+        self.metrics_file = None
+        # 導航速率控制：AdaptiveRateLimiter (預設) 或 FixedRestLimiter
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
         self.session_count = 0
         self.max_session_requests = random.randint(8, 15)
         self.data_processor = DataProcessor()
+        self.browser_pool = BrowserPool(max_pages_per_browser=max_pages_per_browser,
+                                        capture_network=capture_reviews or measure_traffic,
+                                        lean=lean,
+                                        multi_tab=tabs > 1)
+        # True: 從評論 RPC 回應解碼評論，取代 DOM 展開與提取
+        self.capture_reviews = capture_reviews
+        # True: 在日誌中記錄每家餐廳的傳輸量
+        self.measure_traffic = measure_traffic
+        self.review_capture = ReviewCapture(REVIEW_DEFAULTS)
+        self.progress_store = None
+        self.review_index = None
+        # 已寫入主數據但尚未落盤的結果 (url, 評論數, 評論鍵, 是否為重新整理記錄)，落盤後才標記完成
+        self.unsynced = []
+        # True: 單次 JavaScript 批量提取評論；False: 逐元素提取
+        self.bulk_extraction = bulk_extraction
+        # True: 邊滾動邊提取評論並移除已處理的節點，評論暫存在磁碟而非記憶體
+        self.stream_reviews = stream_reviews
+        # 與 DataExtractor 共用的選擇器登記表 (上次命中的選擇器優先)
+        self.selector_registry = selector_registry or SELECTOR_REGISTRY
+        # 大於 1 時每個瀏覽器同時驅動多個餐廳分頁 (TabCrawler)
+        self.tabs = tabs
         
+    def create_worker(self, worker_name):
+        """建立設定相同的工作執行緒爬蟲 (各自的瀏覽器池、工作階段計數與導航速率)"""
+        worker = RestaurantCrawler(bulk_extraction=self.bulk_extraction,
+                                   max_pages_per_browser=self.browser_pool.max_pages_per_browser,
+                                   capture_reviews=self.capture_reviews,
+                                   pacing=self.pacing,
+                                   lean=self.browser_pool.lean,
+                                   measure_traffic=self.measure_traffic,
+                                   rate_limiter=self.rate_limiter.for_worker(),
+                                   stream_reviews=self.stream_reviews,
+                                   selector_registry=self.selector_registry,
+                                   tabs=self.tabs)
+        worker.browser_pool.headless = self.browser_pool.headless
+        worker.logger = logging.getLogger(f"RestaurantCrawler.{worker_name}")
+        worker.review_loader.logger = worker.logger
+        worker.worker_name = worker.review_loader.worker_name = worker_name
+        return worker
+    
     def setup_logging(self):
         """設置日誌"""
         self.logger = logging.getLogger("RestaurantCrawler")
     
     def create_browser(self, headless=False):
-        """創建並配置瀏覽器實例 - 強制英文設置"""
-        options = Options()
-        
-        if headless:
-            options.add_argument("--headless")
-        
-        # 模擬真實用戶
-        user_agents = [
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.4 Safari/605.1.15",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/101.0.4951.64 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/101.0.4951.67 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
-        ]
-        options.add_argument(f"user-agent={random.choice(user_agents)}")
-        
-        # 強制設置語言為英文
-        options.add_argument("--lang=en-US")
-        options.add_experimental_option('prefs', {
-            'intl.accept_languages': 'en-US,en',
-            'profile.default_content_setting_values.geolocation': 1,
-            'profile.default_content_setting_values.notifications': 2
-        })
-        
-        # 禁用自動化檢測特性
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
-        
-        # 添加隨機的視窗大小
-        window_width = random.randint(1024, 1920)
-        window_height = random.randint(768, 1080)
-        options.add_argument(f"--window-size={window_width},{window_height}")
-        
-        # 其他設置
-        options.add_argument("--disable-notifications")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--disable-infobars")
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # 執行 JavaScript 來設置語言屬性
-        driver.execute_script("""
-            Object.defineProperty(navigator, 'language', {
-                get: function() { return 'en-US'; }
-            });
-            Object.defineProperty(navigator, 'languages', {
-                get: function() { return ['en-US', 'en']; }
-            });
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
-        
-        self.logger.info("Browser created with English language settings")
-        
-        return driver
+        """創建並配置瀏覽器實例 - 強制英文設置 (與瀏覽器池使用相同的啟動路徑)"""
+        return self.browser_pool.browser_manager.create_browser(headless=headless,
+                                                                capture_network=self.browser_pool.capture_network,
+                                                                lean=self.browser_pool.lean)
     
     def human_like_delay(self, min_sec=3, max_sec=7):
-        """模擬人類操作的延遲時間"""
-        base_delay = random.uniform(min_sec, max_sec)
-        extra_delay = random.expovariate(0.5)
-        total_delay = base_delay + min(extra_delay, 5)
+        """模擬人類操作的延遲時間 (由 pacing 策略決定)"""
+        total_delay = self.pacing.delay(min_sec, max_sec)
+        if not total_delay:
+            return
         
         self.logger.info(f"Waiting {total_delay:.2f} seconds")
-        time.sleep(total_delay)
+        with METRICS.time_phase("sleep", worker=self.worker_name):
+            time.sleep(total_delay)
     
     def type_like_human(self, element, text):
         """模擬人類打字節奏"""
@@ -110,350 +130,769 @@ class RestaurantCrawler:
             if random.random() < 0.1:  # 10%機率
                 time.sleep(random.uniform(0.3, 0.7))
     
-    def slow_scroll(self, driver, max_scrolls=50):
-        """緩慢滾動頁面以載入更多評論"""
-        current_position = 0
-        last_review_count = 0
-        unchanged_count = 0
-        
+    def slow_scroll(self, driver, max_scrolls=50, stop_condition=None, target_count=None):
+        """滾動評論容器以載入更多評論，stop_condition(driver) 返回 True 時提前停止"""
+        with METRICS.time_phase("scroll", worker=self.worker_name):
+            return self.review_loader.load(driver, max_scrolls=max_scrolls, target_count=target_count,
+                                           stop_condition=stop_condition)
+    
+    def harvest_reviews(self, driver, target_count=None):
+        """串流收割所有評論到磁碟暫存 (ReviewSpool)，DOM 中的評論節點數量保持固定"""
+        spool = ReviewSpool()
         try:
-            review_container = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.m6QErb.DxyBCb.kA9KIf.dS8AEf"))
-            )
+            spool.extend(self.review_loader.harvest(driver, REVIEW_DEFAULTS, target_count=target_count))
         except:
-            self.logger.warning("找不到評論容器，無法滾動加載更多評論")
-            return
-        
-        for scroll_attempt in range(max_scrolls):
-            reviews = driver.find_elements(By.CSS_SELECTOR, "div.jftiEf")
-            current_review_count = len(reviews)
-            
-            if current_review_count == last_review_count:
-                unchanged_count += 1
-                if unchanged_count >= 3:
-                    self.logger.info(f"已載入所有評論: {current_review_count} 條 (連續 {unchanged_count} 次未變化)")
-                    break
-            else:
-                unchanged_count = 0
-                
-            last_review_count = current_review_count
-            self.logger.info(f"當前已加載 {current_review_count} 條評論 (滾動次數: {scroll_attempt + 1}/{max_scrolls})")
-            
-            scroll_distance = random.randint(300, 800)
-            current_position += scroll_distance
-            
-            driver.execute_script(f"arguments[0].scrollTop = {current_position};", review_container)
-            
-            if random.random() < 0.2:  # 20%機率
-                try:
-                    driver.execute_script("arguments[0].click();", review_container)
-                except:
-                    pass
-            
-            pause_time = random.uniform(1.5, 4.5)
-            time.sleep(pause_time)
+            spool.close()
+            raise
+        self.logger.info(f"Harvested {len(spool)} reviews")
+        return spool
+    
+    def harvest_step(self, driver, keep=20):
+        """分頁模式的單步收割 (不等待)，評論容器尚未出現時返回 None"""
+        return driver.execute_script(TAB_HARVEST_STEP_JS, REVIEW_CONTAINER_SELECTOR, REVIEW_DEFAULTS,
+                                     self.pacing.scroll_step(), keep)
     
     def expand_all_reviews(self, driver):
-        """展開所有評論的完整內容"""
+        """展開所有評論的完整內容，返回仍被截斷的評論數量"""
         try:
-            more_buttons = driver.find_elements(By.CSS_SELECTOR, "button.w8nwRe")
-            expanded_count = 0
-            
-            for button in more_buttons:
-                try:
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                    time.sleep(random.uniform(0.3, 0.7))
-                    button.click()
-                    expanded_count += 1
-                    time.sleep(random.uniform(0.5, 1.0))
-                except:
-                    continue
-            
+            with METRICS.time_phase("expand", worker=self.worker_name):
+                expanded_count, remaining = self.review_loader.expand_all(driver)
             self.logger.info(f"已展開 {expanded_count} 條評論的完整內容")
+            if remaining:
+                self.logger.warning(f"{remaining} 條評論仍未展開")
+            return remaining
         except Exception as e:
             self.logger.error(f"展開評論時出錯: {str(e)}")
+            return None
     
     def extract_review_text(self, review_element):
-        """提取評論文本，嘗試多種選擇器以獲取完整內容"""
+        """提取評論文本，按選擇器登記表的順序嘗試 (上次命中的選擇器優先)"""
         try:
+            return self.selector_registry.find_element(review_element, "review_text").text
+        except:
+            return ""
+
+    def extract_reviews(self, driver):
+        """提取頁面上所有已載入的評論，優先使用單次 JavaScript 批量提取"""
+        with METRICS.time_phase("extract", worker=self.worker_name):
+            if self.bulk_extraction:
+                try:
+                    return self.extract_reviews_bulk(driver)
+                except Exception as e:
+                    self.logger.warning(f"Bulk review extraction failed, falling back to per-element extraction: {str(e)}")
+
+            return self.extract_reviews_by_element(driver)
+
+    def extract_reviews_bulk(self, driver):
+        """以一次 execute_script 在瀏覽器內遍歷所有評論節點"""
+        reviews_data = driver.execute_script(EXTRACT_REVIEWS_JS, REVIEW_DEFAULTS)
+        if reviews_data is None:
+            raise ValueError("extraction script returned no data")
+
+        self.logger.info(f"Found {len(reviews_data)} reviews")
+        return reviews_data
+
+    def extract_reviews_by_element(self, driver):
+        """逐個元素提取評論 (每個欄位一次 WebDriver 請求)"""
+        review_elements = self.selector_registry.find_all(driver, "review")
+        self.logger.info(f"Found {len(review_elements)} reviews")
+
+        reviews_data = []
+
+        for review in review_elements:
             try:
-                review_text = review_element.find_element(By.CSS_SELECTOR, "span.wiI7pd").text
-            except:
                 try:
-                    review_text = review_element.find_element(By.CSS_SELECTOR, "div.MyEned").text
+                    reviewer_name = self.selector_registry.find_element(review, "reviewer_name").text
                 except:
-                    try:
-                        review_text = review_element.find_element(By.CSS_SELECTOR, "div[jsinstance]").text
-                    except:
-                        review_text = ""
-            
-            return review_text
-        except:
-            return ""
-    
-    def save_progress(self, processed_urls):
-        """保存當前進度"""
-        with open("data/raw/progress.json", "w", encoding='utf-8') as f:
-            json.dump({
-                "processed_urls": processed_urls,
-                "timestamp": time.time()
-            }, f, ensure_ascii=False)
-        self.logger.info("進度已保存")
+                    reviewer_name = REVIEW_DEFAULTS["reviewer_name"]
+
+                try:
+                    rating_element = self.selector_registry.find_element(review, "review_rating")
+                    review_rating = rating_element.get_attribute("aria-label")
+                except:
+                    review_rating = REVIEW_DEFAULTS["rating"]
+
+                try:
+                    review_date = self.selector_registry.find_element(review, "review_date").text
+                except:
+                    review_date = REVIEW_DEFAULTS["date"]
+
+                review_text = self.extract_review_text(review)
+
+                photos = []
+                try:
+                    photo_elements = self.selector_registry.find_all(review, "review_photos")
+                    for photo in photo_elements:
+                        try:
+                            photo_url = photo.get_attribute("src")
+                            if photo_url:
+                                photos.append(photo_url)
+                        except:
+                            pass
+                except:
+                    pass
+
+                tags = []
+                try:
+                    tag_elements = self.selector_registry.find_all(review, "review_tags")
+                    for tag in tag_elements:
+                        try:
+                            tag_text = tag.text
+                            if tag_text:
+                                tags.append(tag_text)
+                        except:
+                            pass
+                except:
+                    pass
+
+                review_data = {
+                    "reviewer_name": reviewer_name,
+                    "rating": review_rating,
+                    "date": review_date,
+                    "text": review_text,
+                    "photos": photos,
+                    "tags": tags,
+                    "review_id": review.get_attribute("data-review-id")
+                }
+
+                reviews_data.append(review_data)
+
+            except Exception as e:
+                self.logger.error(f"Error extracting single review: {str(e)}")
+
+        return reviews_data
 
-    def load_progress(self):
-        """載入上一次的進度"""
+    def open_progress(self):
+        """開啟進度資料庫，首次使用時匯入舊版 progress.json"""
+        if self.progress_store is None:
+            self.progress_store = ProgressStore()
+            self.progress_store.import_progress_json("data/raw/progress.json")
+            self.progress_store.canonicalize_urls()
+        return self.progress_store
+
+    def record_result(self, url, restaurant_data=None, error=None):
+        """保存單家餐廳的結果，返回評論數量；記錄未能寫入時標記為失敗並返回 None
+        
+        主數據每 fsync_every 筆落盤一次，這一批落盤之後才標記為完成並登記評論索引 (見 sync_results)，
+        中斷時最後一批尚未落盤的餐廳仍為待處理，會重新爬取。
+        """
+        progress_store = self.open_progress()
+        
+        if restaurant_data is None:
+            progress_store.mark_failed(url, error)
+            self.write_metrics()
+            return 0
+        
+        reviews = restaurant_data["reviews"]
+        refresh = bool(restaurant_data.get("refresh"))
+        written = self.data_processor.append_to_master_file(restaurant_data)
+        keys = [review_key(review) for review in reviews] if written else None
+        if isinstance(reviews, ReviewSpool):
+            reviews.close()
+        
+        if not written:
+            # 重新整理記錄不改變進度 (餐廳仍為已完成，下次重新整理時再抓取新評論)
+            if not refresh:
+                progress_store.mark_failed(url, WRITE_FAILED_ERROR)
+            self.write_metrics()
+            return None
+        
+        self.unsynced.append((url, len(keys), keys, refresh))
+        if self.data_processor.synced():
+            # 這次寫入觸發了批次落盤
+            self.commit_synced()
+        self.write_metrics()
+        return len(keys)
+    
+    def sync_results(self):
+        """立即落盤主數據並標記尚未標記的餐廳；落盤失敗時將它們標記為失敗並返回 False"""
+        if not self.unsynced:
+            return True
+        if self.data_processor.flush():
+            self.commit_synced()
+            return True
+        
+        progress_store = self.open_progress()
+        for url, _, _, refresh in self.unsynced:
+            if not refresh:
+                progress_store.mark_failed(url, WRITE_FAILED_ERROR)
+        self.unsynced = []
+        self.write_metrics()
+        return False
+    
+    def commit_synced(self):
+        """主數據已落盤：登記評論索引並將這一批餐廳標記為完成"""
+        progress_store = self.open_progress()
+        review_index = self.open_review_index()
+        with METRICS.time_phase("persist"):
+            for url, reviews_count, keys, refresh in self.unsynced:
+                review_index.add_keys(url, keys)
+                if not refresh:
+                    progress_store.mark_done(url, reviews_count)
+        self.unsynced = []
+    
+    def write_metrics(self):
+        """更新 Prometheus 指標文件 (未設定 metrics_file 時不做任何事)"""
+        if not self.metrics_file:
+            return
         try:
-            with open("data/raw/progress.json", "r", encoding='utf-8') as f:
-                progress = json.load(f)
-            self.logger.info(f"已載入進度，上次運行時間: {datetime.fromtimestamp(progress['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}")
-            return progress["processed_urls"]
-        except:
-            self.logger.info("沒有找到進度文件，將從頭開始")
-            return []
+            METRICS.write_prometheus(self.metrics_file)
+        except OSError as e:
+            self.logger.warning(f"Could not write metrics file: {str(e)}")
+    
+    def acquire_browser(self):
+        """從瀏覽器池借出瀏覽器並記錄等待時間"""
+        with METRICS.time_phase("browser_acquire", worker=self.worker_name):
+            return self.browser_pool.acquire(worker=self.worker_name)
+    
+    def open_review_index(self):
+        """開啟評論索引，首次使用時從主數據建立"""
+        if self.review_index is None:
+            self.review_index = ReviewIndex()
+            self.review_index.build_from_records(self.data_processor.iter_restaurants())
+        return self.review_index
+    
+    def rest_if_session_exhausted(self):
+        """達到本次工作階段的請求上限時輪換瀏覽器身份 (休息時間由速率控制器決定)"""
+        if self.session_count < self.max_session_requests:
+            return
+        
+        self.logger.info(f"已處理 {self.session_count} 個請求，開始新的工作階段")
+        with METRICS.time_phase("session_rest", worker=self.worker_name):
+            self.rate_limiter.session_ended()
+        
+        self.session_count = 0
+        self.max_session_requests = random.randint(8, 15)
+        # 新的工作階段使用新的瀏覽器身份
+        self.browser_pool.rotate()
+    
+    def check_blocked(self, driver):
+        """檢查頁面是否為 CAPTCHA 或異常流量頁面"""
+        if driver.execute_script(DETECT_BLOCK_JS):
+            raise BlockedError(f"blocked page at {driver.current_url}")
+    
+    def paced_scrape(self, driver, url, refresh=False):
+        """按速率控制器等待後爬取餐廳，並將頁面結果回報給速率控制器"""
+        with METRICS.time_phase("rate_limit_wait", worker=self.worker_name):
+            self.rate_limiter.wait("place")
+        
+        with METRICS.place_scope(worker=self.worker_name) as place_phases:
+            try:
+                if refresh:
+                    restaurant_data = self.refresh_restaurant(driver, url)
+                else:
+                    restaurant_data = self.scrape_restaurant(driver, url)
+            except BlockedError:
+                self.record_outcome(OUTCOME_BLOCKED)
+                raise
+            except TimeoutException:
+                self.record_outcome(OUTCOME_TIMEOUT)
+                raise
+            except Exception:
+                self.record_outcome(OUTCOME_ERROR)
+                raise
+        
+        expected_reviews = parse_count(restaurant_data["reviews_count"])
+        if not refresh and expected_reviews and not restaurant_data["reviews"]:
+            self.logger.warning(f"Review panel empty although {expected_reviews} reviews are listed")
+            self.record_outcome(OUTCOME_EMPTY)
+        else:
+            self.record_outcome(OUTCOME_OK)
+        
+        METRICS.inc("crawl_reviews_total", len(restaurant_data["reviews"]), worker=self.worker_name)
+        timings = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in place_phases.items())
+        self.logger.info(f"Timing for {restaurant_data['name']}: {timings}")
+        
+        return restaurant_data
+    
+    def record_outcome(self, outcome, rate_limiter=None):
+        """將頁面結果回報給速率控制器 (分頁模式為分頁各自的控制器) 並計數"""
+        (rate_limiter or self.rate_limiter).record(outcome)
+        METRICS.inc("crawl_places_total", outcome=outcome, worker=self.worker_name)
     
     def crawl_restaurants(self, restaurant_urls):
         """爬取多個餐廳的評論"""
         total_reviews = 0
         processed_count = 0
         
-        processed_urls = self.load_progress()
+        progress_store = self.open_progress()
+        progress_store.add_urls(restaurant_urls)
         
-        urls_to_process = [url for url in restaurant_urls if url not in processed_urls]
+        urls_to_process = progress_store.pending_urls()
         
         self.logger.info(f"共有 {len(urls_to_process)} 家餐廳待處理")
         
+        if self.tabs > 1:
+            return self.crawl_restaurants_in_tabs(urls_to_process)
+        
         for url in urls_to_process:
-            if self.session_count >= self.max_session_requests:
-                self.logger.info(f"已處理 {self.session_count} 個請求，休息一段時間...")
-                sleep_time = random.uniform(10*60, 13*60)
-                self.logger.info(f"休息 {sleep_time/60:.1f} 分鐘")
-                time.sleep(sleep_time)
-                
-                self.session_count = 0
-                self.max_session_requests = random.randint(8, 15)
+            self.rest_if_session_exhausted()
             
-            driver = self.create_browser()
+            driver = self.acquire_browser()
+            failed = False
             
             try:
-                reviews_count = self.extract_restaurant_data(driver, url)
+                try:
+                    restaurant_data = self.paced_scrape(driver, url)
+                except Exception as e:
+                    failed = True
+                    self.logger.error(f"Error processing restaurant: {str(e)}")
+                    self.record_result(url, error=str(e))
+                    continue
+                
+                reviews_count = self.record_result(url, restaurant_data)
+                if reviews_count is None:
+                    continue
                 total_reviews += reviews_count
                 processed_count += 1
                 
-                processed_urls.append(url)
-                
-                if processed_count % 3 == 0:  # 每處理3家餐廳保存一次進度
-                    self.save_progress(processed_urls)
-                
-                self.logger.info(f"已處理 {processed_count}/{len(urls_to_process)} 家餐廳，總計 {total_reviews} 條評論")
-                
-                rest_time = random.uniform(1*60, 4*60) 
-                self.logger.info(f"休息 {rest_time/60:.1f} 分鐘後繼續")
-                time.sleep(rest_time)
+                self.logger.info(f"已處理 {processed_count}/{len(urls_to_process)} 家餐廳，總計 {total_reviews} 條評論 "
+                                 f"(速率 {self.rate_limiter.current_rate():.2f} 次/分鐘)")
                 
             except Exception as e:
+                failed = True
                 self.logger.error(f"處理餐廳時發生錯誤: {str(e)}")
             
             finally:
-                driver.quit()
+                self.browser_pool.release(driver, failed=failed)
                 self.session_count += 1
         
-        self.save_progress(processed_urls)
+        self.browser_pool.close()
+        self.sync_results()
+        self.data_processor.close()
+        self.selector_registry.save()
         
         self.logger.info(f"爬取完成! 共處理 {processed_count} 家餐廳, {total_reviews} 條評論")
     
-    def collect_restaurant_urls(self, search_terms, locations):
-        """收集餐廳URL清單"""
-        restaurant_urls = []
+    def crawl_restaurants_in_tabs(self, urls_to_process):
+        """以單一瀏覽器的多個分頁同時爬取餐廳 (TabCrawler)"""
+        counts = {"processed": 0, "reviews": 0}
         
-        driver = self.create_browser()
+        url_queue = queue.Queue()
+        for url in urls_to_process:
+            url_queue.put(url)
+        url_queue.put(None)
         
-        try:
-            for location in locations:
-                for term in search_terms:
-                    search_query = f"{term} in {location}, USA"
-                    self.logger.info(f"Searching: {search_query}")
-                    
-                    driver.get("https://www.google.com/maps?hl=en")
-                    self.human_like_delay()
-                    
-                    search_box = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.ID, "searchboxinput"))
-                    )
-                    search_box.clear()
-                    self.type_like_human(search_box, search_query)
-                    
-                    search_button = driver.find_element(By.ID, "searchbox-searchbutton")
-                    search_button.click()
-                    self.human_like_delay()
-                    
-                    items = WebDriverWait(driver, 15).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.Nv2PK"))
-                    )
-                    
-                    for i, item in enumerate(items[:10]):
-                        try:
-                            item.click()
-                            self.human_like_delay()
-                            
-                            current_url = driver.current_url
-                            restaurant_urls.append(current_url)
-                            
-                            self.logger.info(f"Collected restaurant URL: {current_url}")
-                        except Exception as e:
-                            self.logger.error(f"Error collecting restaurant URL: {str(e)}")
-                    
-                    rest_time = random.uniform(1*60, 2*60)  
-                    self.logger.info(f"Resting for {rest_time/60:.1f} minutes")
-                    time.sleep(rest_time)
+        def on_result(url, restaurant_data, error):
+            reviews_count = self.record_result(url, restaurant_data, error)
+            if restaurant_data is None or reviews_count is None:
+                return
+            counts["reviews"] += reviews_count
+            counts["processed"] += 1
+            self.logger.info(f"已處理 {counts['processed']}/{len(urls_to_process)} 家餐廳，總計 {counts['reviews']} 條評論 "
+                             f"(速率 {self.rate_limiter.current_rate():.2f} 次/分鐘)")
         
-        except Exception as e:
-            self.logger.error(f"Error collecting restaurant URLs: {str(e)}")
+        TabCrawler(self, tabs=self.tabs).run(url_queue, on_result)
+        
+        self.browser_pool.close()
+        self.sync_results()
+        self.data_processor.close()
+        self.selector_registry.save()
+        
+        self.logger.info(f"爬取完成! 共處理 {counts['processed']} 家餐廳, {counts['reviews']} 條評論")
+    
+    def crawl_leased(self, coordinator, batch_size=5, idle_wait=30):
+        """從協調器租用餐廳批次爬取，多台主機共用同一個工作佇列
+        
+        結果仍寫入本機的主數據文件；協調器記錄每家餐廳由哪台主機完成，避免重複爬取。
+        佇列暫時為空但其他主機仍持有租約時等待 idle_wait 秒，到期的租約會被放回佇列。
+        """
+        counts = {"processed": 0, "reviews": 0}
+        
+        def on_result(lease, url, restaurant_data, error):
+            reviews_count = self.record_result(url, restaurant_data, error)
+            # 協調器的提交立即對其他主機生效，因此每家餐廳都先落盤
+            if restaurant_data is not None and (reviews_count is None or not self.sync_results()):
+                # 記錄沒有落盤：以失敗提交，餐廳會回到佇列重試
+                restaurant_data, error = None, WRITE_FAILED_ERROR
+            if not coordinator.commit(lease, url, reviews_count if restaurant_data is not None else None, error):
+                self.logger.warning(f"Lease for {url} was lost, another host may crawl it again")
+            if restaurant_data is None:
+                return
+            counts["processed"] += 1
+            counts["reviews"] += reviews_count
+            self.logger.info(f"已處理 {counts['processed']} 家餐廳，總計 {counts['reviews']} 條評論 "
+                             f"(速率 {self.rate_limiter.current_rate():.2f} 次/分鐘)")
+        
+        while True:
+            lease = coordinator.lease(batch_size)
+            if not lease.urls:
+                remaining = coordinator.remaining()
+                if not remaining:
+                    break
+                self.logger.info(f"其他主機仍在處理 {remaining} 家餐廳，{idle_wait} 秒後重試")
+                time.sleep(idle_wait)
+                continue
+        
+            METRICS.inc("crawl_leases_total", worker=self.worker_name)
+            with LeaseHeartbeat(coordinator, lease) as heartbeat:
+                try:
+                    self.crawl_lease(lease, heartbeat, on_result)
+                finally:
+                    # 租約遺失或發生例外時，未處理的餐廳立即交給其他主機
+                    coordinator.release(lease)
+        
+        self.browser_pool.close()
+        self.sync_results()
+        self.data_processor.close()
+        self.selector_registry.save()
+        
+        for stats in coordinator.host_stats():
+            self.logger.info(f"{stats['host']}: {stats['done']} 家完成, {stats['failed']} 家失敗, "
+                             f"{stats['expired']} 個租約到期, {stats['places_per_minute']} 家/分鐘")
+        self.logger.info(f"爬取完成! 共處理 {counts['processed']} 家餐廳, {counts['reviews']} 條評論")
+    
+    def crawl_lease(self, lease, heartbeat, on_result):
+        """爬取一個租約中的餐廳 (分頁模式時交給 TabCrawler)"""
+        if self.tabs > 1:
+            url_queue = queue.Queue()
+            for url in lease.urls:
+                url_queue.put(url)
+            url_queue.put(None)
+            TabCrawler(self, tabs=self.tabs).run(url_queue, lambda url, data, error: on_result(lease, url, data, error))
+            return
         
-        finally:
-            driver.quit()
+        for url in lease.urls:
+            if heartbeat.lost:
+                break
         
-        unique_urls = list(set(restaurant_urls))
-        self.logger.info(f"Collected {len(unique_urls)} restaurant URLs")
+            self.rest_if_session_exhausted()
         
-        with open("data/raw/restaurant_urls.json", "w", encoding='utf-8') as f:
-            json.dump(unique_urls, f, ensure_ascii=False)
+            driver = self.acquire_browser()
+            failed = False
+            try:
+                restaurant_data = self.paced_scrape(driver, url)
+            except Exception as e:
+                failed = True
+                self.logger.error(f"處理餐廳時發生錯誤: {str(e)}")
+                on_result(lease, url, None, str(e))
+                continue
+            finally:
+                self.browser_pool.release(driver, failed=failed)
+                self.session_count += 1
         
-        return unique_urls
+            on_result(lease, url, restaurant_data, None)
     
-    def extract_restaurant_data(self, driver, url):
-        """提取餐廳基本信息和評論"""
-        try:
-            english_url = url
-            if "?hl=" not in url:
-                english_url = url + "&hl=en"
-            driver.get(english_url)
-            self.human_like_delay(5, 8)
+    def refresh_restaurants(self, restaurant_urls):
+        """增量更新已爬取過的餐廳，只抓取新評論"""
+        new_reviews = 0
+        refreshed_count = 0
+        
+        progress_store = self.open_progress()
+        self.open_review_index()
+        
+        urls_to_refresh = [url for url in restaurant_urls if progress_store.is_done(url)]
+        
+        self.logger.info(f"共有 {len(urls_to_refresh)} 家餐廳待更新")
+        
+        for url in urls_to_refresh:
+            self.rest_if_session_exhausted()
             
-            try:
-                restaurant_name = driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf").text
-            except:
-                restaurant_name = "Unknown restaurant"
-                self.logger.warning("Could not get restaurant name")
+            driver = self.acquire_browser()
+            failed = False
             
             try:
-                address = driver.find_element(By.CSS_SELECTOR, "button[data-item-id='address']").text
-            except:
-                address = "Unknown address"
+                restaurant_data = self.paced_scrape(driver, url, refresh=True)
+                if restaurant_data["reviews"]:
+                    reviews_count = self.record_result(url, restaurant_data)
+                    if reviews_count is None:
+                        continue
+                else:
+                    # 沒有新評論時不寫入重新整理記錄
+                    reviews_count = 0
+                new_reviews += reviews_count
+                refreshed_count += 1
                 
+                self.logger.info(f"已更新 {refreshed_count}/{len(urls_to_refresh)} 家餐廳，新增 {new_reviews} 條評論")
+                
+            except Exception as e:
+                failed = True
+                self.logger.error(f"更新餐廳時發生錯誤: {str(e)}")
+            
+            finally:
+                self.browser_pool.release(driver, failed=failed)
+                self.session_count += 1
+        
+        self.browser_pool.close()
+        self.sync_results()
+        self.data_processor.close()
+        self.selector_registry.save()
+        
+        self.logger.info(f"更新完成! 共更新 {refreshed_count} 家餐廳, 新增 {new_reviews} 條評論")
+    
+    def collect_restaurant_urls(self, search_terms, locations, mode="feed", max_results=None):
+        """收集餐廳URL清單 (單一工作執行緒，可續傳)，參數見 search_places"""
+        return UrlCollector(self, workers=1, mode=mode, max_results=max_results).collect(search_terms, locations)
+    
+    def search_places(self, driver, term, location, mode="feed", max_results=None, search_url=None):
+        """搜尋一個 (餐廳類型, 城市) 並返回結果卡片，頁面被封鎖時拋出 BlockedError
+
+        mode="feed": 滾動結果列表並一次讀取所有結果卡片 (max_results 為上限，None 表示不限)
+        mode="click": 逐個點擊前 max_results (預設 10) 個結果
+        search_url: 地圖中心搜尋網址 (SearchPlanner 圖塊)，取代在搜尋框輸入城市名稱
+        """
+        search_query = f"{term} in {location}, USA"
+        self.logger.info(f"Searching: {search_query}" + (f" ({search_url})" if search_url else ""))
+        
+        with METRICS.time_phase("rate_limit_wait", worker=self.worker_name):
+            self.rate_limiter.wait("search")
+        
+        if search_url:
+            with METRICS.time_phase("page_load", worker=self.worker_name):
+                driver.get(search_url)
+            self.human_like_delay()
+        else:
+            driver.get("https://www.google.com/maps?hl=en")
+            self.human_like_delay()
+            
+            search_box = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.ID, "searchboxinput"))
+            )
+            search_box.clear()
+            self.type_like_human(search_box, search_query)
+            
+            search_button = driver.find_element(By.ID, "searchbox-searchbutton")
+            search_button.click()
+            self.human_like_delay()
+        
+        try:
+            self.check_blocked(driver)
+            # 只有一個結果時 Google 會直接打開地點頁
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.Nv2PK, h1.DUwDvf"))
+            )
+        except BlockedError:
+            self.record_outcome(OUTCOME_BLOCKED)
+            raise
+        except TimeoutException:
+            self.record_outcome(OUTCOME_TIMEOUT)
+            self.logger.error(f"No results for: {search_query}")
+            return []
+        self.record_outcome(OUTCOME_OK)
+        
+        if mode == "feed":
+            cards = self.harvest_result_feed(driver, max_results)
+        else:
+            cards = self.click_result_cards(driver, max_results or 10)
+        
+        self.logger.info(f"Collected {len(cards)} places for: {search_query}")
+        return cards
+    
+    def harvest_result_feed(self, driver, max_results=None, idle_timeout=3, max_time=120):
+        """滾動搜尋結果列表到底 (或達到上限)，一次讀取所有卡片的連結、名稱與評分"""
+        driver.set_script_timeout(max_time + 10)
+        with METRICS.time_phase("harvest", worker=self.worker_name):
+            result = driver.execute_async_script(HARVEST_RESULT_FEED_JS, max_results,
+                                                 int(idle_timeout * 1000), int(max_time * 1000))
+        
+        if result is None:
+            if "/maps/place/" not in driver.current_url:
+                self.logger.warning("Result feed not found")
+                return []
             try:
-                rating_element = driver.find_element(By.CSS_SELECTOR, "div.F7nice")
-                rating = rating_element.find_element(By.CSS_SELECTOR, "span.ceNzKf").text
-                reviews_count = rating_element.find_element(By.CSS_SELECTOR, "span.HHrUdb").text
+                name = driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf").text
             except:
-                rating = "No rating"
-                reviews_count = "0"
-            
+                name = None
+            return [{"url": driver.current_url, "name": name, "rating": None, "reviews_count": None}]
+        
+        cards = result["cards"]
+        if not result["reached_end"] and (max_results is None or len(cards) < max_results):
+            self.logger.warning(f"Result feed stopped loading before the end of the list ({len(cards)} places)")
+        
+        for card in cards:
+            self.logger.info(f"Collected restaurant URL: {card['name']} ({card['rating']}) {card['url']}")
+        return cards
+    
+    def click_result_cards(self, driver, max_results=10):
+        """逐個點擊結果卡片並讀取地點頁網址 (舊方式)"""
+        cards = []
+        items = driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+        
+        for item in items[:max_results]:
             try:
-                review_selectors = [
-                    "//button[contains(@aria-label, 'Reviews')]", 
-                    "//div[contains(text(), 'Reviews')]",
-                    "//button[contains(., 'Reviews')]",
-                    "//button[contains(@aria-label, 'review')]",
-                    "//div[contains(text(), 'review')]"
-                ]
+                item.click()
+                self.human_like_delay()
                 
-                for selector in review_selectors:
-                    try:
-                        reviews_tab = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        reviews_tab.click()
-                        self.logger.info("Successfully clicked reviews tab")
-                        self.human_like_delay(3, 5)
-                        break
-                    except:
-                        continue
+                current_url = driver.current_url
+                cards.append({"url": current_url, "name": None, "rating": None, "reviews_count": None})
+                
+                self.logger.info(f"Collected restaurant URL: {current_url}")
             except Exception as e:
-                self.logger.warning(f"Could not click reviews tab: {str(e)}")
-            
-            self.slow_scroll(driver, max_scrolls=50)
-            
+                self.logger.error(f"Error collecting restaurant URL: {str(e)}")
+        
+        return cards
+    
+    def extract_restaurant_data(self, driver, url):
+        """提取餐廳基本信息和評論，並寫入主數據文件"""
+        try:
+            restaurant_data = self.scrape_restaurant(driver, url)
+            written = self.data_processor.append_to_master_file(restaurant_data)
+            reviews_count = len(restaurant_data["reviews"]) if written else 0
+            if isinstance(restaurant_data["reviews"], ReviewSpool):
+                restaurant_data["reviews"].close()
+            return reviews_count
+        
+        except Exception as e:
+            self.logger.error(f"Error processing restaurant: {str(e)}")
+            return 0
+    
+    def scrape_restaurant(self, driver, url):
+        """打開餐廳頁面並返回餐廳數據 (不寫入文件)"""
+        restaurant_data = self.open_restaurant_page(driver, url)
+        
+        if self.stream_reviews:
+            restaurant_data["reviews"] = self.harvest_reviews(driver, parse_count(restaurant_data["reviews_count"]))
+            if self.measure_traffic:
+                self.log_traffic(restaurant_data["name"], read_performance_log(driver))
+            return restaurant_data
+        
+        self.slow_scroll(driver, max_scrolls=50, target_count=parse_count(restaurant_data["reviews_count"]))
+        
+        network_messages = []
+        if self.browser_pool.capture_network:
+            network_messages = read_performance_log(driver)
+        
+        reviews_data = []
+        if self.capture_reviews:
+            try:
+                with METRICS.time_phase("capture", worker=self.worker_name):
+                    reviews_data = self.review_capture.collect(driver, network_messages)
+            except Exception as e:
+                self.logger.warning(f"Review capture failed, falling back to DOM extraction: {str(e)}")
+        
+        if not reviews_data:
             self.expand_all_reviews(driver)
+            reviews_data = self.extract_reviews(driver)
+        
+        if self.measure_traffic:
+            network_messages += read_performance_log(driver)
+            self.log_traffic(restaurant_data["name"], network_messages)
+        
+        restaurant_data["reviews"] = reviews_data
+        
+        return restaurant_data
+    
+    def log_traffic(self, place_name, network_messages):
+        """記錄單家餐廳的網路傳輸量"""
+        transferred = bytes_transferred(network_messages)
+        blocked = blocked_requests(network_messages)
+        self.logger.info(f"Traffic for {place_name}: {transferred / 1024:.1f} KB transferred, {blocked} requests blocked")
+        return transferred
+    
+    def open_restaurant_page(self, driver, url):
+        """載入餐廳頁面、讀取基本信息並打開評論標籤"""
+        if self.browser_pool.capture_network:
+            # 評論標籤被點擊時就會發出第一批評論請求，需在載入頁面前清空舊日誌
+            read_performance_log(driver)
+        
+        english_url = canonical_place_url(url)
+        with METRICS.time_phase("page_load", worker=self.worker_name):
+            driver.get(english_url)
+        self.human_like_delay(5, 8)
+        self.check_blocked(driver)
+        
+        restaurant_data = self.read_place_info(driver, url)
+        
+        tab_clicked = False
+        try:
+            # 所有候選選擇器共用一次等待，上次命中的選擇器最先檢查
+            with METRICS.time_phase("reviews_tab", worker=self.worker_name):
+                reviews_tab = self.selector_registry.wait_for(driver, "reviews_tab", timeout=10)
+                reviews_tab.click()
+            self.logger.info("Successfully clicked reviews tab")
+            tab_clicked = True
+        except Exception as e:
+            self.logger.warning(f"Could not click reviews tab: {str(e)}")
+        
+        if tab_clicked:
+            self.human_like_delay(3, 5)
+        
+        return restaurant_data
+    
+    def read_place_info(self, driver, url):
+        """讀取已載入的餐廳頁面的基本信息，返回尚無評論的餐廳記錄"""
+        try:
+            restaurant_name = self.selector_registry.find_element(driver, "place_name").text
+        except:
+            restaurant_name = "Unknown restaurant"
+            self.logger.warning("Could not get restaurant name")
+        
+        try:
+            address = self.selector_registry.find_element(driver, "address").text
+        except:
+            address = "Unknown address"
             
-            review_elements = driver.find_elements(By.CSS_SELECTOR, "div.jftiEf")
-            self.logger.info(f"Found {len(review_elements)} reviews")
-            
-            reviews_data = []
-            
-            for review in review_elements:
-                try:
-                    try:
-                        reviewer_name = review.find_element(By.CSS_SELECTOR, "div.d4r55").text
-                    except:
-                        reviewer_name = "Anonymous"
-                    
-                    try:
-                        rating_element = review.find_element(By.CSS_SELECTOR, "span.kvMYJc")
-                        rating = rating_element.get_attribute("aria-label")
-                    except:
-                        rating = "No rating"
-                    
-                    try:
-                        review_date = review.find_element(By.CSS_SELECTOR, "span.rsqaWe").text
-                    except:
-                        review_date = "Unknown date"
-                    
-                    review_text = self.extract_review_text(review)
-                    
-                    photos = []
-                    try:
-                        photo_elements = review.find_elements(By.CSS_SELECTOR, "div.KtCyie img.STQFb")
-                        for photo in photo_elements:
-                            try:
-                                photo_url = photo.get_attribute("src")
-                                if photo_url:
-                                    photos.append(photo_url)
-                            except:
-                                pass
-                    except:
-                        pass
-                    
-                    tags = []
-                    try:
-                        tag_elements = review.find_elements(By.CSS_SELECTOR, "div.m6QErb div.NGLBjb")
-                        for tag in tag_elements:
-                            try:
-                                tag_text = tag.text
-                                if tag_text:
-                                    tags.append(tag_text)
-                            except:
-                                pass
-                    except:
-                        pass
-                    
-                    review_data = {
-                        "reviewer_name": reviewer_name,
-                        "rating": rating,
-                        "date": review_date,
-                        "text": review_text,
-                        "photos": photos,
-                        "tags": tags
-                    }
-                    
-                    reviews_data.append(review_data)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error extracting single review: {str(e)}")
-            
-            restaurant_data = {
-                "name": restaurant_name,
-                "address": address,
-                "overall_rating": rating,
-                "reviews_count": reviews_count,
-                "url": url,
-                "crawl_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "reviews": reviews_data
-            }
+        try:
+            rating_element = self.selector_registry.find_element(driver, "rating_block")
+            rating = self.selector_registry.find_element(rating_element, "overall_rating").text
+            reviews_count = self.selector_registry.find_element(rating_element, "reviews_count").text
+        except:
+            rating = "No rating"
+            reviews_count = "0"
+        
+        return {
+            "name": restaurant_name,
+            "address": address,
+            "overall_rating": rating,
+            "reviews_count": reviews_count,
+            "url": canonical_place_url(url),
+            "place_id": place_key(url),
+            "crawl_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "reviews": []
+        }
+    
+    def sort_reviews_by_newest(self, driver):
+        """將評論排序方式切換為最新"""
+        try:
+            sort_button = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.XPATH, "//button[contains(@aria-label, 'Sort')]"))
+            )
+            sort_button.click()
+            newest_option = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.XPATH, "//div[@role='menuitemradio'][contains(., 'Newest')]"))
+            )
+            newest_option.click()
+            self.human_like_delay(2, 4)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not sort reviews by newest: {str(e)}")
+            return False
+    
+    def refresh_restaurant(self, driver, url):
+        """增量更新：按最新排序，遇到已知評論即停止，只返回新評論"""
+        review_index = self.open_review_index()
+        known_keys = review_index.known_keys(url)
+        
+        restaurant_data = self.open_restaurant_page(driver, url)
+        
+        if not self.sort_reviews_by_newest(driver):
+            raise RuntimeError("reviews could not be sorted by newest, refresh would not be incremental")
+        
+        if self.stream_reviews:
+            # 收割順序即最新排序，遇到第一條已知評論就關閉生成器，不再滾動
+            reviews_data = self.review_loader.harvest(driver, REVIEW_DEFAULTS, max_scrolls=50)
+        else:
+            def known_review_loaded(driver):
+                loaded = driver.execute_script(REVIEW_KEYS_JS, REVIEW_DEFAULTS)
+                return any(review_index.is_known(review, known_keys) for review in loaded)
             
-            self.data_processor.append_to_master_file(restaurant_data)
+            self.slow_scroll(driver, max_scrolls=50, stop_condition=known_review_loaded)
             
-            return len(reviews_data)
+            self.expand_all_reviews(driver)
+            reviews_data = self.extract_reviews(driver)
         
-        except Exception as e:
-            self.logger.error(f"Error processing restaurant: {str(e)}")
-            return 0
\ No newline at end of file
+        new_reviews = []
+        for review in reviews_data:
+            if review_index.is_known(review, known_keys):
+                # 評論按最新排序，之後的都是已知評論
+                break
+            new_reviews.append(review)
+        if self.stream_reviews:
+            reviews_data.close()
+        
+        self.logger.info(f"Found {len(new_reviews)} new reviews")
+        
+        restaurant_data["reviews"] = new_reviews
+        restaurant_data["refresh"] = True
+        
+        return restaurant_data
\ No newline at end of file
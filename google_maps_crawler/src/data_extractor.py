@@ -5,14 +5,16 @@ import logging
 import time
 import random
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from datetime import datetime
+from .review_loader import ReviewLoader
+from .selector_registry import SELECTOR_REGISTRY
 
 class DataExtractor:
-    def __init__(self):
+    def __init__(self, pacing=None, selector_registry=None):
         self.logger = logging.getLogger("DataExtractor")
+        self.review_loader = ReviewLoader(pacing=pacing, logger=self.logger)
+        # 與 RestaurantCrawler 共用的選擇器登記表
+        self.selector_registry = selector_registry or SELECTOR_REGISTRY
     
     def extract_restaurant_info(self, driver):
         """提取餐廳基本信息"""
@@ -21,23 +23,23 @@ class DataExtractor:
         try:
             # 餐廳名稱
             try:
-                restaurant_info["name"] = driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf").text
+                restaurant_info["name"] = self.selector_registry.find_element(driver, "place_name").text
             except Exception as e:
                 self.logger.error(f"獲取餐廳名稱時出錯: {str(e)}")
                 restaurant_info["name"] = "未知餐廳"
         
             # 嘗試獲取地址
             try:
-                address = driver.find_element(By.CSS_SELECTOR, "button[data-item-id='address']").text
+                address = self.selector_registry.find_element(driver, "address").text
                 restaurant_info["address"] = address
             except:
                 restaurant_info["address"] = "未知地址"
                 
             # 嘗試獲取評分
             try:
-                rating_element = driver.find_element(By.CSS_SELECTOR, "div.F7nice")
-                rating = rating_element.find_element(By.CSS_SELECTOR, "span.ceNzKf").text
-                reviews_count = rating_element.find_element(By.CSS_SELECTOR, "span.HHrUdb").text
+                rating_element = self.selector_registry.find_element(driver, "rating_block")
+                rating = self.selector_registry.find_element(rating_element, "overall_rating").text
+                reviews_count = self.selector_registry.find_element(rating_element, "reviews_count").text
                 restaurant_info["overall_rating"] = rating
                 restaurant_info["reviews_count"] = reviews_count
             except:
@@ -103,25 +105,11 @@ class DataExtractor:
         try:
             # 點擊"評論"標籤
             try:
-                # 嘗試多種可能的選擇器找到評論標籤
-                review_selectors = [
-                    "//button[contains(@aria-label, '評論')]", 
-                    "//button[contains(@aria-label, 'reviews')]",
-                    "//div[contains(text(), '評論')]",
-                    "//div[contains(text(), 'Reviews')]"
-                ]
-                
-                for selector in review_selectors:
-                    try:
-                        reviews_tab = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        reviews_tab.click()
-                        self.logger.info("成功點擊評論標籤")
-                        time.sleep(random.uniform(2, 4))
-                        break
-                    except:
-                        continue
+                # 所有候選選擇器共用一次等待，上次命中的選擇器最先檢查
+                reviews_tab = self.selector_registry.wait_for(driver, "reviews_tab", timeout=10)
+                reviews_tab.click()
+                self.logger.info("成功點擊評論標籤")
+                time.sleep(random.uniform(2, 4))
             except Exception as e:
                 self.logger.warning(f"點擊評論標籤時出錯: {str(e)}")
             
@@ -132,27 +120,27 @@ class DataExtractor:
             self._expand_all_reviews(driver)
             
             # 提取評論
-            review_elements = driver.find_elements(By.CSS_SELECTOR, "div.jftiEf")
+            review_elements = self.selector_registry.find_all(driver, "review")
             
             for review in review_elements:
                 review_data = {}
                 
                 # 提取評論者名稱
                 try:
-                    review_data["reviewer_name"] = review.find_element(By.CSS_SELECTOR, "div.d4r55").text
+                    review_data["reviewer_name"] = self.selector_registry.find_element(review, "reviewer_name").text
                 except:
                     review_data["reviewer_name"] = "匿名用戶"
                 
                 # 提取評分
                 try:
-                    rating_element = review.find_element(By.CSS_SELECTOR, "span.kvMYJc")
+                    rating_element = self.selector_registry.find_element(review, "review_rating")
                     review_data["rating"] = rating_element.get_attribute("aria-label")
                 except:
                     review_data["rating"] = "無評分"
                 
                 # 提取日期
                 try:
-                    review_data["date"] = review.find_element(By.CSS_SELECTOR, "span.rsqaWe").text
+                    review_data["date"] = self.selector_registry.find_element(review, "review_date").text
                 except:
                     review_data["date"] = "未知日期"
                 
@@ -161,14 +149,14 @@ class DataExtractor:
                 
                 # 提取評論照片(如果有)
                 try:
-                    photo_elements = review.find_elements(By.CSS_SELECTOR, "div.KtCyie img.STQFb")
+                    photo_elements = self.selector_registry.find_all(review, "review_photos")
                     review_data["photos"] = [photo.get_attribute("src") for photo in photo_elements if photo.get_attribute("src")]
                 except:
                     review_data["photos"] = []
                 
                 # 提取評論中的標籤
                 try:
-                    tags = review.find_elements(By.CSS_SELECTOR, "div.m6QErb div.NGLBjb")
+                    tags = self.selector_registry.find_all(review, "review_tags")
                     review_data["tags"] = [tag.text for tag in tags if tag.text]
                 except:
                     review_data["tags"] = []
@@ -183,94 +171,22 @@ class DataExtractor:
         return reviews_data
     
     def _extract_review_text(self, review_element):
-        """提取評論文本，嘗試多種選擇器以獲取完整內容"""
+        """提取評論文本，按選擇器登記表的順序嘗試 (上次命中的選擇器優先)"""
         try:
-            # 先嘗試獲取展開後的完整評論文本
-            try:
-                review_text = review_element.find_element(By.CSS_SELECTOR, "span.wiI7pd").text
-            except:
-                # 嘗試其他可能的選擇器
-                try:
-                    review_text = review_element.find_element(By.CSS_SELECTOR, "div.MyEned").text
-                except:
-                    try:
-                        review_text = review_element.find_element(By.CSS_SELECTOR, "div[jsinstance]").text
-                    except:
-                        review_text = ""
-            
-            return review_text
+            return self.selector_registry.find_element(review_element, "review_text").text
         except:
             return ""
     
     def _expand_all_reviews(self, driver):
         """展開所有評論的完整內容"""
-        # 找到所有"更多"按鈕並點擊
         try:
-            more_buttons = driver.find_elements(By.CSS_SELECTOR, "button.w8nwRe")
-            expanded_count = 0
-            
-            for button in more_buttons:
-                try:
-                    # 確保按鈕在視野內
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                    time.sleep(random.uniform(0.3, 0.7))
-                    button.click()
-                    expanded_count += 1
-                    time.sleep(random.uniform(0.5, 1.0))
-                except:
-                    continue
-            
+            expanded_count, remaining = self.review_loader.expand_all(driver)
             self.logger.info(f"已展開 {expanded_count} 條評論的完整內容")
+            if remaining:
+                self.logger.warning(f"{remaining} 條評論仍未展開")
         except Exception as e:
             self.logger.error(f"展開評論時出錯: {str(e)}")
     
     def _scroll_for_reviews(self, driver, max_scrolls=50):
         """滾動頁面以載入更多評論"""
-        current_position = 0
-        last_review_count = 0
-        unchanged_count = 0
-        
-        # 尋找評論容器
-        try:
-            review_container = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.m6QErb.DxyBCb.kA9KIf.dS8AEf"))
-            )
-        except:
-            self.logger.warning("找不到評論容器，無法滾動加載更多評論")
-            return
-        
-        # 緩慢滾動並檢查是否已到底部
-        for scroll_attempt in range(max_scrolls):
-            # 獲取當前評論數量
-            reviews = driver.find_elements(By.CSS_SELECTOR, "div.jftiEf")
-            current_review_count = len(reviews)
-            
-            # 如果連續三次滾動後評論數量沒變，可能已到底部
-            if current_review_count == last_review_count:
-                unchanged_count += 1
-                if unchanged_count >= 3:
-                    self.logger.info(f"已載入所有評論: {current_review_count} 條 (連續 {unchanged_count} 次未變化)")
-                    break
-            else:
-                unchanged_count = 0
-                
-            last_review_count = current_review_count
-            self.logger.info(f"當前已加載 {current_review_count} 條評論 (滾動次數: {scroll_attempt + 1}/{max_scrolls})")
-            
-            # 計算滾動距離 (模擬人類不規則滾動)
-            scroll_distance = random.randint(300, 800)
-            current_position += scroll_distance
-            
-            # 執行滾動
-            driver.execute_script(f"arguments[0].scrollTop = {current_position};", review_container)
-            
-            # 隨機點擊一下空白處來確保焦點在頁面上
-            if random.random() < 0.2:  # 20%機率
-                try:
-                    driver.execute_script("arguments[0].click();", review_container)
-                except:
-                    pass
-            
-            # 模擬人類閱讀行為的暫停
-            pause_time = random.uniform(1.5, 4.5)
-            time.sleep(pause_time)
\ No newline at end of file
+        return self.review_loader.load(driver, max_scrolls=max_scrolls)
@@ -5,77 +5,156 @@ import logging
 import json
 import glob
 import os
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .master_store import MasterStore
+from .metrics import METRICS
+from .columnar_export import ColumnarExporter
+from .search_units import SearchUnitStore
 
 class DataProcessor:
     def __init__(self):
         self.logger = logging.getLogger("DataProcessor")
         self.master_file = "data/processed/all_restaurants.json"
+        self.store = MasterStore("data/processed/all_restaurants.jsonl")
+    
+    def open_store(self):
+        """Open the JSONL store, importing a legacy master JSON file on first use"""
+        if self.store.handle is not None:
+            return
+        
+        if not os.path.exists(self.store.path) and os.path.exists(self.master_file):
+            self.logger.info(f"Migrating {self.master_file} to {self.store.path}")
+            self.store.import_master_json(self.master_file)
+        
+        self.store.open()
     
     def append_to_master_file(self, restaurant_data):
-        """Append restaurant data to single master file instead of creating separate files"""
+        """Append restaurant data to the append-only master store. Returns False if the record was not written"""
         try:
-            # Load existing data
-            if os.path.exists(self.master_file):
-                with open(self.master_file, 'r', encoding='utf-8') as f:
-                    master_data = json.load(f)
-            else:
-                master_data = {
-                    "restaurants": [],
-                    "total_restaurants": 0,
-                    "total_reviews": 0,
-                    "last_updated": ""
-                }
-            
-            # Append new restaurant data
-            master_data["restaurants"].append(restaurant_data)
-            master_data["total_restaurants"] = len(master_data["restaurants"])
-            master_data["total_reviews"] = sum(len(r.get("reviews", [])) for r in master_data["restaurants"])
-            master_data["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with METRICS.time_phase("persist"):
+                self.open_store()
+                written = self.store.append(restaurant_data)
+            METRICS.inc("crawl_bytes_written_total", written)
             
-            # Save back to master file
-            os.makedirs(os.path.dirname(self.master_file), exist_ok=True)
-            with open(self.master_file, 'w', encoding='utf-8') as f:
-                json.dump(master_data, f, ensure_ascii=False, indent=2)
-            
-            self.logger.info(f"Restaurant data appended to master file: {self.master_file}")
+            self.logger.info(f"Restaurant data appended to master store: {self.store.path}")
+            return True
             
         except Exception as e:
             self.logger.error(f"Error appending to master file: {str(e)}")
+            return False
+    
+    def flush(self):
+        """Force buffered records to disk. Returns False if they could not be synced"""
+        try:
+            with METRICS.time_phase("persist"):
+                self.store.flush()
+            return True
+        except OSError as e:
+            self.logger.error(f"Error flushing master store: {str(e)}")
+            return False
     
-    def merge_existing_files(self, raw_data_dir="data/raw"):
-        """Merge existing separate JSON files into one master file"""
-        # Get all restaurant JSON files (excluding URL list)
+    def synced(self):
+        """True when every appended record has been fsynced (the store flushes every fsync_every records)"""
+        return self.store.pending == 0
+    
+    def close(self):
+        """Flush and close the master store"""
+        self.store.close()
+    
+    def get_totals(self):
+        """Return total_restaurants, total_reviews and last_updated without reading the records"""
+        self.open_store()
+        return self.store.get_stats()
+    
+    def iter_restaurants(self):
+        """Yield every stored restaurant record (including refresh records)"""
+        self.open_store()
+        self.store.flush()
+        return self.store.iter_records()
+    
+    def export_master_file(self, output_file=None):
+        """Compact the JSONL store into the {"restaurants": [...]} master document"""
+        self.open_store()
+        return self.store.export_master_json(output_file or self.master_file)
+    
+    def find_restaurant_files(self, raw_data_dir="data/raw"):
+        """Return the separate restaurant_*.json files (excluding the URL list)"""
         json_files = glob.glob(os.path.join(raw_data_dir, "restaurant_*.json"))
-        json_files = [f for f in json_files if not f.endswith("restaurant_urls.json")]
-        
-        all_data = []
+        return sorted(f for f in json_files if not f.endswith("restaurant_urls.json"))
+    
+    def read_restaurant_file(self, file):
+        """Load one restaurant file, returning (file, data, error)"""
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                return file, json.load(f), None
+        except Exception as e:
+            return file, None, e
+    
+    def iter_restaurant_files(self, json_files, workers=4):
+        """Yield (file, data, error) in file order, reading at most 2 * workers files ahead"""
+        window = max(1, workers) * 2
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending = deque()
+            for file in json_files:
+                pending.append(executor.submit(self.read_restaurant_file, file))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def export_parquet(self, output_dir="data/processed/parquet", units_db="data/raw/search_units.db"):
+        """Export places and reviews as Parquet datasets partitioned by city and type (requires pyarrow)"""
+        self.open_store()
         
-        for file in json_files:
+        categories = {}
+        if os.path.exists(units_db):
+            unit_store = SearchUnitStore(units_db)
             try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    all_data.append(data)
-            except Exception as e:
-                self.logger.error(f"Error reading {file}: {str(e)}")
+                categories = unit_store.place_categories()
+            finally:
+                unit_store.close()
+        
+        return ColumnarExporter(self.store, categories, output_dir).export()
+    
+    def merge_existing_files(self, raw_data_dir="data/raw", workers=4):
+        """Stream separate restaurant JSON files into the master store, then export the master file.
+        
+        Files are read by a thread pool but only a bounded window is held in memory at a time;
+        places that are already in the store are skipped, so the merge can be re-run safely.
+        """
+        json_files = self.find_restaurant_files(raw_data_dir)
+        
+        self.open_store()
+        known_places = set(self.store.record_key(record) for record in self.iter_restaurants())
         
-        # Create merged data structure
-        merged_data = {
-            "restaurants": all_data,
-            "total_restaurants": len(all_data),
-            "total_reviews": sum(len(r.get("reviews", [])) for r in all_data),
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        merged = {"files": len(json_files), "restaurants": 0, "reviews": 0, "skipped": 0, "failed": 0}
+        
+        for file, data, error in self.iter_restaurant_files(json_files, workers):
+            if error is not None:
+                merged["failed"] += 1
+                self.logger.error(f"Error reading {file}: {str(error)}")
+                continue
+            
+            key = self.store.record_key(data)
+            if key in known_places:
+                merged["skipped"] += 1
+                continue
+            known_places.add(key)
+            
+            METRICS.inc("crawl_bytes_written_total", self.store.append(data))
+            merged["restaurants"] += 1
+            merged["reviews"] += len(data.get("reviews", []))
         
-        # Save merged data
-        os.makedirs(os.path.dirname(self.master_file), exist_ok=True)
-        with open(self.master_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
+        self.store.flush()
+        self.logger.info(f"Merged {merged['restaurants']} restaurant files ({merged['reviews']} reviews) into "
+                         f"{self.store.path}, skipped {merged['skipped']} already stored, {merged['failed']} unreadable")
         
-        self.logger.info(f"Successfully merged {len(all_data)} restaurant files into {self.master_file}")
+        if merged["restaurants"]:
+            self.export_master_file()
         
         # Optionally, delete individual files after merging
         # for file in json_files:
         #     os.remove(file)
         
-        return merged_data
\ No newline at end of file
+        return merged
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import json
+import os
+import tempfile
+import textwrap
+from datetime import datetime
+from .utils import place_key
+
+class ReviewSpool:
+    """Reviews of one place staged in a temporary JSONL file while the place is harvested.
+
+    Behaves like a read-only list for the persistence code (len() and repeated
+    iteration), so a place with any number of reviews is never held in memory.
+    """
+
+    def __init__(self, directory="data/raw/spool"):
+        os.makedirs(directory, exist_ok=True)
+        handle, self.path = tempfile.mkstemp(prefix="reviews_", suffix=".jsonl", dir=directory)
+        self.handle = os.fdopen(handle, "wb")
+        self.count = 0
+
+    def append(self, review):
+        self.handle.write(json.dumps(review, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def extend(self, reviews):
+        for review in reviews:
+            self.append(review)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if not self.handle.closed:
+            self.handle.flush()
+        with open(self.path, "rb") as f:
+            for raw_line in f:
+                yield json.loads(raw_line)
+
+    def close(self):
+        """Delete the spool file"""
+        if not self.handle.closed:
+            self.handle.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def encode_record(record):
+    """Yield a record as JSON line chunks; non-list reviews (a ReviewSpool) are streamed one review at a time"""
+    reviews = record.get("reviews")
+    if reviews is None or isinstance(reviews, list):
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        return
+
+    fields = {key: value for key, value in record.items() if key != "reviews"}
+    head = json.dumps(fields, ensure_ascii=False)[:-1]
+    yield (head + (", " if fields else "") + '"reviews": [').encode("utf-8")
+    for index, review in enumerate(reviews):
+        yield ((", " if index else "") + json.dumps(review, ensure_ascii=False)).encode("utf-8")
+    yield b"]}\n"
+
+class MasterStore:
+    """Append-only JSONL store holding one restaurant record per line.
+
+    Running totals live in a small sidecar file that also records how many
+    bytes of the JSONL file it covers, so a stale sidecar can be brought up
+    to date by scanning only the unseen tail.
+    """
+
+    def __init__(self, path="data/processed/all_restaurants.jsonl", fsync_every=10):
+        self.logger = logging.getLogger("MasterStore")
+        self.path = path
+        self.stats_file = os.path.splitext(path)[0] + ".stats.json"
+        # Records are only durable after the batched fsync; callers that track progress
+        # mark records done once pending drops back to 0 (RestaurantCrawler.commit_synced)
+        self.fsync_every = fsync_every
+        self.handle = None
+        self.pending = 0
+        self.stats = None
+
+    def open(self):
+        """Open the store for appending, repairing a torn last line if needed"""
+        if self.handle is not None:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.truncate_partial_line()
+        self.stats = self.load_stats()
+        self.handle = open(self.path, "ab")
+
+    def truncate_partial_line(self):
+        """Drop bytes after the last newline left behind by an interrupted write"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+
+            # Walk backwards to the last complete record
+            position = size
+            block = 4096
+            while position > 0:
+                start = max(0, position - block)
+                f.seek(start)
+                chunk = f.read(position - start)
+                index = chunk.rfind(b"\n")
+                if index != -1:
+                    position = start + index + 1
+                    break
+                position = start
+            f.truncate(position)
+
+        self.logger.warning(f"Removed incomplete trailing record from {self.path}")
+
+    def load_stats(self):
+        """Load the sidecar totals and catch up on any records it has not seen"""
+        stats = {"total_restaurants": 0, "total_reviews": 0, "last_updated": "", "offset": 0}
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                stats.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if stats["offset"] > size:
+            stats = {"total_restaurants": 0, "total_reviews": 0, "last_updated": "", "offset": 0}
+
+        if stats["offset"] < size:
+            for record in self.iter_records(start=stats["offset"]):
+                self.count_record(stats, record)
+            stats["offset"] = size
+            self.write_stats(stats)
+
+        return stats
+
+    def count_record(self, stats, record):
+        """Add one record to the running totals; refresh records only add reviews"""
+        if not record.get("refresh"):
+            stats["total_restaurants"] += 1
+        stats["total_reviews"] += len(record.get("reviews", []))
+
+    def write_stats(self, stats):
+        """Atomically replace the sidecar file"""
+        tmp_file = self.stats_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False)
+        os.replace(tmp_file, self.stats_file)
+
+    def append(self, restaurant_data):
+        """Append one restaurant record; fsync every `fsync_every` records. Returns the bytes written"""
+        self.open()
+
+        start = self.handle.tell()
+        written = 0
+        try:
+            for chunk in encode_record(restaurant_data):
+                self.handle.write(chunk)
+                written += len(chunk)
+        except Exception:
+            # Never leave half a record behind; the next append would extend the torn line
+            self.handle.flush()
+            self.handle.truncate(start)
+            raise
+
+        self.count_record(self.stats, restaurant_data)
+        self.stats["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.flush()
+
+        return written
+
+    def flush(self):
+        """Flush buffered records to disk and publish the totals"""
+        if self.handle is None:
+            return
+
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        self.stats["offset"] = self.handle.tell()
+        self.write_stats(self.stats)
+        self.pending = 0
+
+    def close(self):
+        """Flush and close the store"""
+        if self.handle is None:
+            return
+
+        self.flush()
+        self.handle.close()
+        self.handle = None
+
+    def get_stats(self):
+        """Return the running totals"""
+        self.open()
+        return {
+            "total_restaurants": self.stats["total_restaurants"],
+            "total_reviews": self.stats["total_reviews"],
+            "last_updated": self.stats["last_updated"]
+        }
+
+    def iter_records(self, start=0):
+        """Yield stored restaurant records, skipping lines that cannot be decoded"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    yield json.loads(raw_line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Skipping unreadable record in {self.path}")
+
+    def import_master_json(self, json_file):
+        """Load records from a legacy {"restaurants": [...]} document"""
+        with open(json_file, "r", encoding="utf-8") as f:
+            master_data = json.load(f)
+
+        for restaurant_data in master_data.get("restaurants", []):
+            self.append(restaurant_data)
+        self.flush()
+
+        self.logger.info(f"Imported {len(master_data.get('restaurants', []))} restaurants from {json_file}")
+
+    def record_key(self, record):
+        """The place key of a record (older records only carry the URL)"""
+        return record.get("place_id") or place_key(record.get("url", ""))
+
+    def collect_refreshes(self):
+        """Gather the new reviews from refresh records, newest refresh first, keyed by place"""
+        refreshes = {}
+        for record in self.iter_records():
+            if record.get("refresh"):
+                key = self.record_key(record)
+                refreshes[key] = record.get("reviews", []) + refreshes.get(key, [])
+        return refreshes
+
+    def iter_merged_records(self):
+        """Yield one record per crawled place with its refresh records merged in, new reviews first"""
+        if self.handle is not None:
+            self.flush()
+
+        refreshes = self.collect_refreshes()
+
+        for record in self.iter_records():
+            if record.get("refresh"):
+                continue
+            new_reviews = refreshes.pop(self.record_key(record), None)
+            if new_reviews:
+                record["reviews"] = new_reviews + record.get("reviews", [])
+            yield record
+
+    def export_master_json(self, json_file):
+        """Write the legacy master document, streaming one restaurant at a time.
+
+        Refresh records are merged into their place's record, new reviews first.
+        """
+        total_restaurants = 0
+        total_reviews = 0
+
+        os.makedirs(os.path.dirname(json_file) or ".", exist_ok=True)
+        tmp_file = json_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write('{\n  "restaurants": [')
+            for record in self.iter_merged_records():
+                if total_restaurants:
+                    f.write(",")
+                f.write("\n")
+                f.write(textwrap.indent(json.dumps(record, ensure_ascii=False, indent=2), "    "))
+                total_restaurants += 1
+                total_reviews += len(record.get("reviews", []))
+            f.write("\n  ]" if total_restaurants else "]")
+            f.write(f',\n  "total_restaurants": {total_restaurants}')
+            f.write(f',\n  "total_reviews": {total_reviews}')
+            f.write(',\n  "last_updated": ' + json.dumps(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            f.write("\n}")
+        os.replace(tmp_file, json_file)
+
+        self.logger.info(f"Exported {total_restaurants} restaurants to {json_file}")
+
+        return {"total_restaurants": total_restaurants, "total_reviews": total_reviews}
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+HELP_TEXT = {
+    "crawl_phase_seconds": "Time spent in each crawl phase",
+    "crawl_place_seconds": "Total time spent per place",
+    "crawl_places_total": "Places finished, by outcome",
+    "crawl_reviews_total": "Reviews extracted",
+    "crawl_bytes_written_total": "Bytes appended to the master store"
+}
+
+def label_key(labels):
+    """將標籤字典轉為可雜湊的排序元組"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+def format_labels(key, extra=None):
+    """輸出 Prometheus 標籤字串"""
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+class Metrics:
+    """執行緒安全的計數器與直方圖，可輸出為 Prometheus 文字格式與運行摘要"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.logger = logging.getLogger("Metrics")
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}
+        # (name, labels) -> {"buckets": [...], "sum": 秒數, "count": 次數}
+        self.histograms = {}
+        self.started = time.time()
+        # 每個執行緒的巢狀階段堆疊與目前餐廳的階段耗時
+        self.local = threading.local()
+
+    def inc(self, name, amount=1, **labels):
+        """累加計數器"""
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """記錄一個直方圖樣本"""
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self.histograms[key] = histogram
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def time_phase(self, phase, worker=None):
+        """以 with 語句計時一個爬取階段
+
+        階段可以巢狀 (例如滾動中的停頓)，內層階段的時間不會重複計入外層。
+        """
+        stack = self.local_state("stack", list)
+        frame = {"children": 0.0}
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1]["children"] += elapsed
+
+            own_time = max(0.0, elapsed - frame["children"])
+            self.observe("crawl_phase_seconds", own_time, phase=phase, worker=worker)
+
+            place_phases = getattr(self.local, "place_phases", None)
+            if place_phases is not None:
+                place_phases[phase] = place_phases.get(phase, 0.0) + own_time
+
+    @contextmanager
+    def place_scope(self, worker=None):
+        """記錄單家餐廳內各階段的耗時，結束時記錄 crawl_place_seconds"""
+        place_phases = {}
+        self.local.place_phases = place_phases
+        start = time.perf_counter()
+        try:
+            yield place_phases
+        finally:
+            self.local.place_phases = None
+            self.observe("crawl_place_seconds", time.perf_counter() - start, worker=worker)
+
+    def local_state(self, name, factory):
+        """取得目前執行緒的狀態"""
+        value = getattr(self.local, name, None)
+        if value is None:
+            value = factory()
+            setattr(self.local, name, value)
+        return value
+
+    def render_prometheus(self):
+        """輸出 Prometheus 文字格式"""
+        lines = []
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: dict(value, buckets=list(value["buckets"])) for key, value in self.histograms.items()}
+
+        for metric_name in sorted(set(name for name, _ in counters)):
+            lines.append(f"# HELP {metric_name} {HELP_TEXT.get(metric_name, metric_name)}")
+            lines.append(f"# TYPE {metric_name} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric_name:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for metric_name in sorted(set(name for name, _ in histograms)):
+            lines.append(f"# HELP {metric_name} {HELP_TEXT.get(metric_name, metric_name)}")
+            lines.append(f"# TYPE {metric_name} histogram")
+            for (name, labels), histogram in sorted(histograms.items()):
+                if name != metric_name:
+                    continue
+                for bound, count in zip(self.buckets, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{format_labels(labels, [('le', str(bound))])} {count}")
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """以原子方式寫入 Prometheus 文字文件 (可供 node_exporter textfile collector 讀取)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_file, path)
+
+    def phase_totals(self):
+        """各階段 (合併所有工作執行緒) 的總耗時與次數"""
+        totals = {}
+        with self.lock:
+            for (name, labels), histogram in self.histograms.items():
+                if name != "crawl_phase_seconds":
+                    continue
+                phase = dict(labels).get("phase")
+                total = totals.setdefault(phase, {"seconds": 0.0, "count": 0})
+                total["seconds"] += histogram["sum"]
+                total["count"] += histogram["count"]
+        return totals
+
+    def summary(self):
+        """運行摘要：各階段耗時佔比與計數器"""
+        totals = self.phase_totals()
+        measured = sum(total["seconds"] for total in totals.values())
+        phases = {}
+        for phase, total in sorted(totals.items(), key=lambda item: -item[1]["seconds"]):
+            phases[phase] = {
+                "seconds": round(total["seconds"], 2),
+                "count": total["count"],
+                "mean_seconds": round(total["seconds"] / total["count"], 3) if total["count"] else 0,
+                "share": round(total["seconds"] / measured, 4) if measured else 0
+            }
+
+        counters = {}
+        with self.lock:
+            for (name, labels), value in self.counters.items():
+                counters[name] = counters.get(name, 0) + value
+
+        return {
+            "wall_seconds": round(time.time() - self.started, 2),
+            "phases": phases,
+            "counters": counters
+        }
+
+    def log_summary(self, logger=None):
+        """在日誌中輸出運行摘要"""
+        logger = logger or self.logger
+        summary = self.summary()
+        logger.info(f"運行摘要: 總耗時 {summary['wall_seconds']:.1f} 秒")
+        for phase, stats in summary["phases"].items():
+            logger.info(f"  {phase:<16} {stats['seconds']:>10.1f} 秒  {stats['share']*100:5.1f}%  "
+                        f"{stats['count']:>6} 次  平均 {stats['mean_seconds']:.3f} 秒")
+        for name, value in sorted(summary["counters"].items()):
+            logger.info(f"  {name}: {value}")
+        return summary
+
+# 全域共用的指標 (所有爬蟲與工作執行緒)
+METRICS = Metrics()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""讀取 Chrome 效能日誌 (需以 goog:loggingPrefs performance 建立瀏覽器)"""
+
+import json
+
+def read_performance_log(driver):
+    """取出並清空目前累積的效能日誌，返回 DevTools 事件列表"""
+    messages = []
+    for entry in driver.get_log("performance"):
+        try:
+            messages.append(json.loads(entry["message"])["message"])
+        except (KeyError, ValueError):
+            continue
+    return messages
+
+def bytes_transferred(messages):
+    """累計所有已完成請求實際傳輸的位元組數 (含標頭、壓縮後大小)"""
+    total = 0
+    for message in messages:
+        if message.get("method") == "Network.loadingFinished":
+            total += message.get("params", {}).get("encodedDataLength", 0) or 0
+    return total
+
+def blocked_requests(messages):
+    """被 Network.setBlockedURLs 攔截的請求數量"""
+    count = 0
+    for message in messages:
+        if message.get("method") == "Network.loadingFailed":
+            if message.get("params", {}).get("blockedReason"):
+                count += 1
+    return count
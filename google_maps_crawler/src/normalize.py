@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Batch normalization of raw place and review fields with NumPy/pandas.
+
+The raw columns have very few distinct values (a few dozen rating labels, a few hundred
+relative dates), so every column is factorized first, only the distinct values are parsed
+with vectorized string operations, and the results are broadcast back with one take.
+The scalar equivalents are utils.extract_rating_value, utils.parse_count and
+utils.parse_relative_date, which share the date patterns and unit tables defined in utils.
+"""
+
+import numpy as np
+import pandas as pd
+from .utils import (RELATIVE_DATE_UNITS, RELATIVE_DATE_PATTERN, CHINESE_RELATIVE_DATE_PATTERN, CHINESE_DATE_UNITS,
+                    WORD_AMOUNTS)
+
+# Placeholders written by the crawler (English) and by older Chinese versions
+RATING_PLACEHOLDERS = ("No rating", "無評分")
+DATE_PLACEHOLDERS = ("Unknown date", "未知日期")
+
+RATING_REGEX = r"^\s*(\d+(?:\.\d+)?)"
+
+def factorize(values):
+    """Integer codes (-1 for missing) and the distinct values as strings"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return codes, pd.Series(uniques, dtype=object).astype(str)
+
+def broadcast(parsed, codes, fill=np.nan):
+    """Map per-distinct-value results back to every row"""
+    parsed = np.append(np.asarray(parsed, dtype=np.float64), fill)
+    # code -1 (missing) selects the trailing fill value
+    return parsed[codes]
+
+def parse_ratings(uniques):
+    ratings = pd.to_numeric(uniques.str.extract(RATING_REGEX, expand=False), errors="coerce")
+    ratings[uniques.isin(RATING_PLACEHOLDERS)] = np.nan
+    return ratings.to_numpy(dtype=np.float64)
+
+def normalize_ratings(values):
+    """"5 stars" / "4.3" -> float64 array, placeholders and missing values -> NaN"""
+    codes, uniques = factorize(values)
+    return broadcast(parse_ratings(uniques), codes)
+
+def normalize_counts(values):
+    """"(1,234)" -> nullable Int64 array, values without digits -> <NA>"""
+    codes, uniques = factorize(values)
+    counts = pd.to_numeric(uniques.str.replace(r"[^\d]", "", regex=True).replace("", np.nan), errors="coerce")
+    return pd.array(broadcast(counts, codes)).astype("Int64")
+
+def parse_relative_dates(uniques):
+    """Distinct date texts -> (amount, days per unit), NaN where the text is not a relative date"""
+    # Same patterns as utils.relative_date_days, English first
+    english = uniques.str.extract(RELATIVE_DATE_PATTERN.pattern, flags=RELATIVE_DATE_PATTERN.flags)
+    chinese = uniques.str.extract(CHINESE_RELATIVE_DATE_PATTERN.pattern)
+
+    amount_text = english[0].str.lower().fillna(chinese[0])
+    unit = english[1].str.lower().fillna(chinese[1].map(CHINESE_DATE_UNITS))
+
+    amount = pd.to_numeric(amount_text.replace(WORD_AMOUNTS), errors="coerce")
+    unit_days = unit.map(RELATIVE_DATE_UNITS)
+
+    placeholder = uniques.isin(DATE_PLACEHOLDERS)
+    amount[placeholder] = np.nan
+    return amount.to_numpy(dtype=np.float64), unit_days.to_numpy(dtype=np.float64)
+
+def to_timedelta(days):
+    """Per-distinct-value day counts -> timedelta64[ns], with a trailing NaT for missing rows"""
+    nanoseconds = np.round(np.append(days, np.nan) * 86400e9)
+    offsets = np.where(np.isnan(nanoseconds), 0, nanoseconds).astype(np.int64).astype("timedelta64[ns]")
+    offsets[np.isnan(nanoseconds)] = np.timedelta64("NaT")
+    return offsets
+
+def normalize_crawl_times(values):
+    """"%Y-%m-%d %H:%M:%S" -> datetime64[ns] array (NaT when unparseable)"""
+    codes, uniques = factorize(values)
+    parsed = pd.to_datetime(uniques, format="%Y-%m-%d %H:%M:%S", errors="coerce").to_numpy(dtype="datetime64[ns]")
+    parsed = np.append(parsed, np.datetime64("NaT", "ns"))
+    return parsed[codes]
+
+def normalize_relative_dates(values, reference):
+    """"2 months ago" -> (earliest, latest) datetime64[ns] arrays relative to reference
+
+    Google rounds down, so "2 months ago" lies between 3 and 2 months before the crawl;
+    latest matches utils.parse_relative_date. reference is a crawl_time string, a datetime or a
+    column of either (strings or datetime64 values).
+    """
+    codes, uniques = factorize(values)
+    amount, unit_days = parse_relative_dates(uniques)
+    latest_offset = to_timedelta(amount * unit_days)[codes]
+    earliest_offset = to_timedelta((amount + 1) * unit_days)[codes]
+
+    if isinstance(reference, str):
+        reference = np.full(len(codes), reference, dtype=object)
+    elif np.ndim(reference) == 0:
+        reference = np.full(len(codes), np.datetime64(reference, "ns"))
+    reference = np.asarray(reference)
+    if reference.dtype.kind == "M":
+        reference = reference.astype("datetime64[ns]")
+    else:
+        reference = normalize_crawl_times(reference)
+
+    return reference - earliest_offset, reference - latest_offset
+
+def normalize_reviews(reviews):
+    """Add rating_value, date_earliest and date_latest to a frame with rating, date and crawl_time columns"""
+    reviews = reviews.copy()
+    reviews["rating_value"] = normalize_ratings(reviews["rating"])
+    reviews["date_earliest"], reviews["date_latest"] = normalize_relative_dates(reviews["date"],
+                                                                               reviews["crawl_time"].to_numpy())
+    return reviews
+
+def normalize_places(places):
+    """Add overall_rating_value and reviews_count_value to a frame of place records"""
+    places = places.copy()
+    places["overall_rating_value"] = normalize_ratings(places["overall_rating"])
+    places["reviews_count_value"] = normalize_counts(places["reviews_count"])
+    return places
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+class HumanPacing:
+    """模擬人類操作節奏：隨機延遲、不規則滾動距離與偶爾的點擊"""
+
+    def __init__(self, scroll_pause=(1.5, 4.5), scroll_distance=(300, 800), click_probability=0.2):
+        self.scroll_pause_range = scroll_pause
+        self.scroll_distance_range = scroll_distance
+        self.click_probability = click_probability
+
+    def delay(self, min_sec, max_sec):
+        """頁面操作之間的延遲秒數"""
+        base_delay = random.uniform(min_sec, max_sec)
+        extra_delay = random.expovariate(0.5)
+        return base_delay + min(extra_delay, 5)
+
+    def scroll_pause(self):
+        """每次滾動後額外的閱讀停頓秒數 (在評論載入之後)"""
+        return random.uniform(*self.scroll_pause_range)
+
+    def scroll_step(self):
+        """每次滾動的距離 (像素)，None 表示直接滾到底"""
+        return random.randint(*self.scroll_distance_range)
+
+    def should_click(self):
+        """是否隨機點擊評論容器以保持焦點"""
+        return random.random() < self.click_probability
+
+class NoPacing:
+    """不加入任何人為延遲，只等待頁面本身的載入 (用於基準測試或本地頁面)"""
+
+    def delay(self, min_sec, max_sec):
+        return 0
+
+    def scroll_pause(self):
+        return 0
+
+    def scroll_step(self):
+        return None
+
+    def should_click(self):
+        return False
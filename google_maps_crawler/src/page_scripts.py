@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""在頁面內執行的 JavaScript 片段，供 execute_script 使用"""
+
+# 單一評論節點的欄位提取函數，供 EXTRACT_REVIEWS_JS 與 HARVEST_REVIEWS_JS 共用
+# 文字取法與 WebElement.text 一致 (innerText 去除首尾空白)，
+# 評論文本沿用 span.wiI7pd -> div.MyEned -> div[jsinstance] 的順序
+REVIEW_EXTRACTOR_JS = """
+function textOf(el) {
+    if (!el) { return null; }
+    return (el.innerText || '').trim();
+}
+function extractReview(review, defaults) {
+    var nameEl = review.querySelector('div.d4r55');
+    var ratingEl = review.querySelector('span.kvMYJc');
+    var dateEl = review.querySelector('span.rsqaWe');
+    var textEl = review.querySelector('span.wiI7pd')
+        || review.querySelector('div.MyEned')
+        || review.querySelector('div[jsinstance]');
+    var photos = [];
+    var photoEls = review.querySelectorAll('div.KtCyie img.STQFb');
+    for (var p = 0; p < photoEls.length; p++) {
+        if (photoEls[p].src) { photos.push(photoEls[p].src); }
+    }
+    var tags = [];
+    var tagEls = review.querySelectorAll('div.m6QErb div.NGLBjb');
+    for (var t = 0; t < tagEls.length; t++) {
+        var tagText = textOf(tagEls[t]);
+        if (tagText) { tags.push(tagText); }
+    }
+    return {
+        reviewer_name: nameEl ? textOf(nameEl) : defaults.reviewer_name,
+        rating: ratingEl ? ratingEl.getAttribute('aria-label') : defaults.rating,
+        date: dateEl ? textOf(dateEl) : defaults.date,
+        text: textEl ? textOf(textEl) : '',
+        photos: photos,
+        tags: tags,
+        review_id: review.getAttribute('data-review-id')
+    };
+}
+"""
+
+# 一次性提取所有評論節點
+# arguments[0]: 預設值 {reviewer_name, rating, date}
+EXTRACT_REVIEWS_JS = REVIEW_EXTRACTOR_JS + """
+var defaults = arguments[0];
+var results = [];
+var nodes = document.querySelectorAll('div.jftiEf');
+for (var i = 0; i < nodes.length; i++) {
+    results.push(extractReview(nodes[i], defaults));
+}
+return results;
+"""
+
+# 輕量讀取已載入評論的識別資訊，用於增量更新時判斷是否遇到已知評論
+# arguments[0]: 預設值 {reviewer_name, rating, date} (與 extractReview 相同)
+REVIEW_KEYS_JS = """
+var defaults = arguments[0];
+var keys = [];
+var nodes = document.querySelectorAll('div.jftiEf');
+for (var i = 0; i < nodes.length; i++) {
+    var review = nodes[i];
+    var nameEl = review.querySelector('div.d4r55');
+    var ratingEl = review.querySelector('span.kvMYJc');
+    var dateEl = review.querySelector('span.rsqaWe');
+    var textEl = review.querySelector('span.wiI7pd')
+        || review.querySelector('div.MyEned')
+        || review.querySelector('div[jsinstance]');
+    keys.push({
+        review_id: review.getAttribute('data-review-id'),
+        reviewer_name: nameEl ? (nameEl.innerText || '').trim() : defaults.reviewer_name,
+        rating: ratingEl ? ratingEl.getAttribute('aria-label') : defaults.rating,
+        date: dateEl ? (dateEl.innerText || '').trim() : defaults.date,
+        text: textEl ? (textEl.innerText || '').trim() : ''
+    });
+}
+return keys;
+"""
+
+# 滾動評論容器一步；離底部超過 loadThreshold 像素時不會觸發延遲載入，立即返回。
+# 接近底部時滾到底並等待新評論節點出現 (MutationObserver)，或在閒置逾時後返回
+# execute_async_script 參數: arguments[0] 容器, arguments[1] 目前評論數,
+# arguments[2] 滾動距離 (null 表示滾到底), arguments[3] 閒置逾時 (毫秒), arguments[4] 接近底部的距離 (像素)
+SCROLL_AND_WAIT_FOR_REVIEWS_JS = """
+var container = arguments[0];
+var previousCount = arguments[1];
+var step = arguments[2];
+var idleTimeout = arguments[3];
+var loadThreshold = arguments[4];
+var done = arguments[arguments.length - 1];
+function countReviews() {
+    return container.querySelectorAll('div.jftiEf').length;
+}
+function finish(observer, timer) {
+    if (observer) { observer.disconnect(); }
+    if (timer) { clearTimeout(timer); }
+    done({
+        count: countReviews(),
+        at_bottom: container.scrollTop + container.clientHeight >= container.scrollHeight - 2
+    });
+}
+if (step === null) {
+    container.scrollTop = container.scrollHeight;
+} else {
+    container.scrollTop = container.scrollTop + step;
+}
+if (countReviews() > previousCount) {
+    finish(null, null);
+    return;
+}
+if (container.scrollHeight - container.scrollTop - container.clientHeight > loadThreshold) {
+    finish(null, null);
+    return;
+}
+container.scrollTop = container.scrollHeight;
+var timer = null;
+var observer = new MutationObserver(function() {
+    if (countReviews() > previousCount) {
+        finish(observer, timer);
+    }
+});
+observer.observe(container, {childList: true, subtree: true});
+timer = setTimeout(function() { finish(observer, null); }, idleTimeout);
+"""
+
+# 把已處理的評論節點 (data-harvested) 換成一個等高的占位元素，只保留最後 keep 個，返回移除數量
+REVIEW_PRUNER_JS = """
+function pruneHarvested(container, keep) {
+    var harvested = container.querySelectorAll('div.jftiEf[data-harvested]');
+    var count = harvested.length - keep;
+    if (count <= 0) { return 0; }
+    var first = harvested[0];
+    var spacer = container.querySelector('div[data-harvest-spacer]');
+    if (!spacer) {
+        spacer = document.createElement('div');
+        spacer.setAttribute('data-harvest-spacer', '');
+        spacer.style.height = '0px';
+        first.parentNode.insertBefore(spacer, first);
+    }
+    var height = parseFloat(spacer.style.height) || 0;
+    for (var i = 0; i < count; i++) {
+        height += harvested[i].getBoundingClientRect().height;
+        harvested[i].parentNode.removeChild(harvested[i]);
+    }
+    spacer.style.height = height + 'px';
+    return count;
+}
+"""
+
+# 串流收割：滾動一步，接近底部時滾到底並等待新評論節點 (離底部超過 loadThreshold 像素時不等待)，
+# 展開並提取尚未處理的評論，再把已處理的節點換成一個等高的占位元素，讓 DOM 中的評論節點數量保持固定
+# execute_async_script 參數: arguments[0] 容器, arguments[1] 預設值 {reviewer_name, rating, date},
+# arguments[2] 滾動距離 (null 表示滾到底), arguments[3] 閒置逾時 (毫秒),
+# arguments[4] 展開後的 DOM 穩定時間 (毫秒), arguments[5] 保留的已處理節點數量,
+# arguments[6] 接近底部的距離 (像素)
+# 返回 {reviews, at_bottom, dom_reviews, pruned}
+HARVEST_REVIEWS_JS = REVIEW_EXTRACTOR_JS + REVIEW_PRUNER_JS + """
+var container = arguments[0];
+var defaults = arguments[1];
+var step = arguments[2];
+var idleTimeout = arguments[3];
+var quietMs = arguments[4];
+var keep = arguments[5];
+var loadThreshold = arguments[6];
+var done = arguments[arguments.length - 1];
+function freshNodes() {
+    return container.querySelectorAll('div.jftiEf:not([data-harvested])');
+}
+function atBottom() {
+    return container.scrollTop + container.clientHeight >= container.scrollHeight - 2;
+}
+function harvest() {
+    var nodes = freshNodes();
+    var reviews = [];
+    for (var i = 0; i < nodes.length; i++) {
+        reviews.push(extractReview(nodes[i], defaults));
+        nodes[i].setAttribute('data-harvested', '1');
+    }
+    var pruned = pruneHarvested(container, keep);
+    done({
+        reviews: reviews,
+        at_bottom: atBottom(),
+        dom_reviews: container.querySelectorAll('div.jftiEf').length,
+        pruned: pruned
+    });
+}
+function expandThenHarvest() {
+    var nodes = freshNodes();
+    var clicked = 0;
+    for (var i = 0; i < nodes.length; i++) {
+        var buttons = nodes[i].querySelectorAll('button.w8nwRe');
+        for (var b = 0; b < buttons.length; b++) {
+            try {
+                buttons[b].click();
+                clicked++;
+            } catch (e) {}
+        }
+    }
+    if (!clicked) {
+        harvest();
+        return;
+    }
+    var quietTimer = null;
+    var maxTimer = null;
+    var observer = new MutationObserver(function() {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(finish, quietMs);
+    });
+    function finish() {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(maxTimer);
+        harvest();
+    }
+    observer.observe(container, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(finish, quietMs);
+    maxTimer = setTimeout(finish, quietMs * 10);
+}
+if (step === null) {
+    container.scrollTop = container.scrollHeight;
+} else {
+    container.scrollTop = container.scrollTop + step;
+}
+if (freshNodes().length) {
+    expandThenHarvest();
+    return;
+}
+if (container.scrollHeight - container.scrollTop - container.clientHeight > loadThreshold) {
+    harvest();
+    return;
+}
+container.scrollTop = container.scrollHeight;
+var timer = null;
+var observer = new MutationObserver(function() {
+    if (freshNodes().length) {
+        observer.disconnect();
+        clearTimeout(timer);
+        expandThenHarvest();
+    }
+});
+observer.observe(container, {childList: true, subtree: true});
+timer = setTimeout(function() {
+    observer.disconnect();
+    harvest();
+}, idleTimeout);
+"""
+
+# 分頁模式的單步收割 (同步、立即返回)：提取上一步已點擊「更多」的評論，
+# 對新節點點擊「更多」留到下一步提取，移除已處理的節點後再滾動一步
+# 參數: arguments[0] 評論容器選擇器, arguments[1] 預設值 {reviewer_name, rating, date},
+# arguments[2] 滾動距離 (null 表示滾到底), arguments[3] 保留的已處理節點數量
+# 返回 {reviews, at_bottom, pending}；評論容器尚未出現時返回 null
+TAB_HARVEST_STEP_JS = REVIEW_EXTRACTOR_JS + REVIEW_PRUNER_JS + """
+var container = document.querySelector(arguments[0]);
+if (!container) { return null; }
+var defaults = arguments[1];
+var step = arguments[2];
+var keep = arguments[3];
+var reviews = [];
+var ready = container.querySelectorAll('div.jftiEf[data-expanded]:not([data-harvested])');
+for (var i = 0; i < ready.length; i++) {
+    reviews.push(extractReview(ready[i], defaults));
+    ready[i].setAttribute('data-harvested', '1');
+}
+var fresh = container.querySelectorAll('div.jftiEf:not([data-expanded])');
+for (var j = 0; j < fresh.length; j++) {
+    var buttons = fresh[j].querySelectorAll('button.w8nwRe');
+    for (var b = 0; b < buttons.length; b++) {
+        try { buttons[b].click(); } catch (e) {}
+    }
+    fresh[j].setAttribute('data-expanded', '1');
+}
+pruneHarvested(container, keep);
+if (step === null) {
+    container.scrollTop = container.scrollHeight;
+} else {
+    container.scrollTop = container.scrollTop + step;
+}
+return {
+    reviews: reviews,
+    at_bottom: container.scrollTop + container.clientHeight >= container.scrollHeight - 2,
+    pending: fresh.length
+};
+"""
+
+# 分頁模式：導航前標記目前的文件，用於辨認新頁面是否已經取代舊頁面
+MARK_STALE_DOCUMENT_JS = """
+if (document.documentElement) { document.documentElement.setAttribute('data-stale-document', '1'); }
+"""
+
+# 分頁模式：新頁面已取代舊頁面且 DOM 已開始可用
+NEW_DOCUMENT_READY_JS = """
+var root = document.documentElement;
+return !!root && !root.hasAttribute('data-stale-document') && document.readyState !== 'loading';
+"""
+
+# 一次點擊所有評論的「更多」按鈕，返回點擊數量
+CLICK_MORE_BUTTONS_JS = """
+var buttons = document.querySelectorAll('button.w8nwRe');
+var clicked = 0;
+for (var i = 0; i < buttons.length; i++) {
+    try {
+        buttons[i].click();
+        clicked++;
+    } catch (e) {}
+}
+return clicked;
+"""
+
+# 等待 DOM 在 quietMs 毫秒內沒有變化 (最多 maxMs)，返回仍未展開的評論數量
+# execute_async_script 參數: arguments[0] quietMs, arguments[1] maxMs
+WAIT_FOR_DOM_SETTLE_JS = """
+var quietMs = arguments[0];
+var maxMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var quietTimer = null;
+var maxTimer = null;
+var observer = null;
+function finish() {
+    if (observer) { observer.disconnect(); }
+    clearTimeout(quietTimer);
+    clearTimeout(maxTimer);
+    done(document.querySelectorAll('button.w8nwRe').length);
+}
+observer = new MutationObserver(function() {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(finish, quietMs);
+});
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+quietTimer = setTimeout(finish, quietMs);
+maxTimer = setTimeout(finish, maxMs);
+"""
+
+# 檢查頁面是否為 CAPTCHA 或 "unusual traffic" 頁面
+DETECT_BLOCK_JS = """
+if (location.href.indexOf('/sorry/') !== -1) { return true; }
+if (document.querySelector('iframe[src*="recaptcha"], #captcha-form')) { return true; }
+var text = document.body ? document.body.innerText.slice(0, 5000) : '';
+return /unusual traffic|not a robot/i.test(text);
+"""
+
+# 滾動搜尋結果列表到底 (或達到數量上限)，再一次讀取所有結果卡片
+# execute_async_script 參數: arguments[0] 數量上限 (null 表示不限),
+# arguments[1] 閒置逾時 (毫秒), arguments[2] 總逾時 (毫秒)
+# 返回 {cards: [{url, name, rating, reviews_count}], reached_end}；找不到結果列表時返回 null
+HARVEST_RESULT_FEED_JS = """
+var maxResults = arguments[0];
+var idleTimeout = arguments[1];
+var maxTime = arguments[2];
+var done = arguments[arguments.length - 1];
+var feed = document.querySelector('div[role="feed"]');
+if (!feed) { done(null); return; }
+var started = Date.now();
+function textOf(el) {
+    return el ? (el.innerText || '').trim() : null;
+}
+function countCards() {
+    return feed.querySelectorAll('a.hfpxzc').length;
+}
+function reachedEnd() {
+    return !!feed.querySelector('span.HlvSq') || /reached the end of the list/i.test(feed.innerText.slice(-500));
+}
+function finish() {
+    var cards = [];
+    var seen = {};
+    var links = feed.querySelectorAll('a.hfpxzc');
+    for (var i = 0; i < links.length; i++) {
+        var href = links[i].href;
+        if (!href || seen[href]) { continue; }
+        seen[href] = true;
+        var card = links[i].closest('div.Nv2PK') || links[i].parentElement;
+        cards.push({
+            url: href,
+            name: links[i].getAttribute('aria-label') || textOf(card.querySelector('div.qBF1Pd')),
+            rating: textOf(card.querySelector('span.MW4etd')),
+            reviews_count: textOf(card.querySelector('span.UY7F9'))
+        });
+        if (maxResults !== null && cards.length >= maxResults) { break; }
+    }
+    done({cards: cards, reached_end: reachedEnd()});
+}
+function scrollOnce() {
+    var previousCount = countCards();
+    if (reachedEnd() || (maxResults !== null && previousCount >= maxResults) || Date.now() - started > maxTime) {
+        finish();
+        return;
+    }
+    feed.scrollTop = feed.scrollHeight;
+    var timer = null;
+    var observer = new MutationObserver(function() {
+        if (countCards() > previousCount || reachedEnd()) {
+            observer.disconnect();
+            clearTimeout(timer);
+            scrollOnce();
+        }
+    });
+    observer.observe(feed, {childList: true, subtree: true});
+    timer = setTimeout(function() {
+        observer.disconnect();
+        finish();
+    }, idleTimeout);
+}
+scrollOnce();
+"""
+
+# 以 Page.addScriptToEvaluateOnNewDocument 註冊，在每個新文件的任何頁面腳本之前執行：
+# 隱藏 WebDriver 並固定語言屬性為英文
+STEALTH_JS = """
+Object.defineProperty(navigator, 'webdriver', {
+    get: function() { return undefined; }
+});
+Object.defineProperty(navigator, 'language', {
+    get: function() { return 'en-US'; }
+});
+Object.defineProperty(navigator, 'languages', {
+    get: function() { return ['en-US', 'en']; }
+});
+"""
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import queue
+import threading
+from .tab_crawler import TabCrawler
+from .utils import place_key
+
+class ParallelCrawler:
+    """多個工作執行緒各自使用獨立瀏覽器爬取餐廳，由單一寫入者負責保存結果與進度"""
+
+    def __init__(self, crawler, workers=2):
+        self.logger = logging.getLogger("ParallelCrawler")
+        # 寫入者：持有 DataProcessor 與進度資料庫
+        self.crawler = crawler
+        self.workers = max(1, workers)
+
+    def create_worker_crawler(self, worker_id):
+        """為每個工作執行緒建立獨立的爬蟲 (各自的瀏覽器池與工作階段計數)"""
+        return self.crawler.create_worker(f"worker-{worker_id}")
+
+    def worker_loop(self, worker_id, url_queue, result_queue):
+        """從共享佇列取出 URL 爬取 (收到 None 時結束)，結果交給寫入者"""
+        worker = self.create_worker_crawler(worker_id)
+
+        try:
+            if worker.tabs > 1:
+                # 分頁模式：同一個瀏覽器的多個分頁共用佇列
+                TabCrawler(worker, tabs=worker.tabs).run(
+                    url_queue,
+                    lambda url, restaurant_data, error: result_queue.put(("result", url, restaurant_data, error))
+                )
+                return
+
+            while True:
+                url = url_queue.get()
+                if url is None:
+                    break
+
+                worker.rest_if_session_exhausted()
+
+                driver = None
+                failed = False
+                try:
+                    driver = worker.acquire_browser()
+                    restaurant_data = worker.paced_scrape(driver, url)
+                    result_queue.put(("result", url, restaurant_data, None))
+                except Exception as e:
+                    failed = True
+                    worker.logger.error(f"處理餐廳時發生錯誤: {str(e)}")
+                    result_queue.put(("result", url, None, str(e)))
+                finally:
+                    if driver is not None:
+                        worker.browser_pool.release(driver, failed=failed)
+                    worker.session_count += 1
+        finally:
+            worker.browser_pool.close()
+            result_queue.put(("worker_done",))
+
+    def crawl_restaurants(self, restaurant_urls):
+        """以多個工作執行緒爬取餐廳評論"""
+        progress_store = self.crawler.open_progress()
+        progress_store.add_urls(restaurant_urls)
+
+        urls_to_process = progress_store.pending_urls()
+
+        self.logger.info(f"共有 {len(urls_to_process)} 家餐廳待處理，使用 {self.workers} 個工作執行緒")
+
+        url_queue = queue.Queue()
+        for url in urls_to_process:
+            url_queue.put(url)
+
+        workers = min(self.workers, len(urls_to_process))
+        for _ in range(workers):
+            url_queue.put(None)
+
+        self.run(workers, url_queue, queue.Queue(), total=len(urls_to_process))
+
+    def crawl_while_collecting(self, collector, search_terms, locations):
+        """一邊收集 URL 一邊爬取：每個搜尋單元完成後，其新地點立即加入爬取佇列"""
+        progress_store = self.crawler.open_progress()
+
+        url_queue = queue.Queue()
+        result_queue = queue.Queue()
+        queued = set()
+
+        for url in progress_store.pending_urls():
+            queued.add(place_key(url))
+            url_queue.put(url)
+
+        def collect():
+            try:
+                collector.collect(search_terms, locations, on_urls=lambda urls: result_queue.put(("urls", urls)))
+            except Exception as e:
+                self.logger.error(f"URL 收集失敗: {str(e)}")
+            finally:
+                result_queue.put(("collection_done",))
+
+        collector_thread = threading.Thread(target=collect, name="url-collector", daemon=True)
+        collector_thread.start()
+
+        self.logger.info(f"一邊收集 URL 一邊爬取，已有 {len(queued)} 家餐廳待處理，使用 {self.workers} 個工作執行緒")
+
+        def on_message(message):
+            if message[0] == "urls":
+                progress_store.add_urls(message[1])
+                for url in message[1]:
+                    key = place_key(url)
+                    if key not in queued and not progress_store.is_done(url):
+                        queued.add(key)
+                        url_queue.put(url)
+            elif message[0] == "collection_done":
+                for _ in range(self.workers):
+                    url_queue.put(None)
+
+        self.run(self.workers, url_queue, result_queue, on_message=on_message)
+        collector_thread.join()
+
+    def run(self, workers, url_queue, result_queue, total=None, on_message=None):
+        """啟動工作執行緒並在本執行緒保存結果，直到所有工作執行緒結束"""
+        total_reviews = 0
+        processed_count = 0
+
+        threads = []
+        for worker_id in range(workers):
+            thread = threading.Thread(target=self.worker_loop,
+                                      args=(worker_id, url_queue, result_queue),
+                                      name=f"crawler-worker-{worker_id}",
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        running = len(threads)
+        while running:
+            message = result_queue.get()
+            if message[0] == "worker_done":
+                running -= 1
+                continue
+            if message[0] != "result":
+                on_message(message)
+                continue
+
+            _, url, restaurant_data, error = message
+            reviews_count = self.crawler.record_result(url, restaurant_data, error)
+            if restaurant_data is None or reviews_count is None:
+                continue
+            total_reviews += reviews_count
+
+            processed_count += 1
+
+            progress = f"{processed_count}/{total}" if total is not None else f"{processed_count}"
+            self.logger.info(f"已處理 {progress} 家餐廳，總計 {total_reviews} 條評論 "
+                             f"(速率 {self.crawler.rate_limiter.current_rate():.2f} 次/分鐘)")
+
+        for thread in threads:
+            thread.join()
+
+        self.crawler.sync_results()
+        self.crawler.data_processor.close()
+        self.crawler.selector_registry.save()
+
+        self.logger.info(f"爬取完成! 共處理 {processed_count} 家餐廳, {total_reviews} 條評論")
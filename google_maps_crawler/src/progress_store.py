@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import json
+import os
+import sqlite3
+import time
+from .utils import place_key, canonical_place_url
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+class ProgressStore:
+    """以 SQLite (WAL 模式) 記錄每家餐廳的爬取狀態，每次更新立即提交"""
+
+    def __init__(self, db_file="data/raw/progress.db", max_attempts=3):
+        self.logger = logging.getLogger("ProgressStore")
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+    def create_tables(self):
+        """建立進度表與索引"""
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress (
+                    place_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    review_count INTEGER,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_status ON progress (status, created_at)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def add_urls(self, urls):
+        """登記待爬取的餐廳，已存在的地點不受影響"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO progress (place_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(place_key(url), canonical_place_url(url), STATUS_PENDING, now, now) for url in urls]
+            )
+
+    def pending_urls(self):
+        """返回尚未完成、且失敗次數未達上限的餐廳 URL"""
+        rows = self.conn.execute(
+            "SELECT url FROM progress WHERE status = ? OR (status = ? AND attempts < ?) ORDER BY created_at",
+            (STATUS_PENDING, STATUS_FAILED, self.max_attempts)
+        )
+        return [row[0] for row in rows]
+
+    def is_done(self, url):
+        """檢查餐廳是否已完成"""
+        row = self.conn.execute("SELECT status FROM progress WHERE place_id = ?", (place_key(url),)).fetchone()
+        return row is not None and row[0] == STATUS_DONE
+
+    def mark_done(self, url, review_count):
+        """記錄餐廳爬取完成"""
+        self.update_status(url, STATUS_DONE, review_count=review_count)
+
+    def mark_failed(self, url, error=None):
+        """記錄餐廳爬取失敗"""
+        self.update_status(url, STATUS_FAILED, error=error)
+
+    def update_status(self, url, status, review_count=None, error=None):
+        """更新狀態並累計嘗試次數"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO progress (place_id, url, status, attempts, review_count, last_error, created_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = progress.attempts + 1,
+                    review_count = COALESCE(excluded.review_count, progress.review_count),
+                    last_error = excluded.last_error,
+                    updated_at = excluded.updated_at
+            """, (place_key(url), canonical_place_url(url), status, review_count, error, now, now))
+
+    def canonicalize_urls(self):
+        """將舊記錄改為以地點 ID 為鍵、以標準網址保存 (只執行一次)
+
+        同一地點的重複記錄只保留狀態最好 (完成 > 待處理 > 失敗)、最近更新的一筆。
+        """
+        marker = "canonical_urls:v1"
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+            return 0
+
+        rank = {STATUS_DONE: 0, STATUS_PENDING: 1, STATUS_FAILED: 2}
+        groups = {}
+        for place_id, url, status, updated_at in self.conn.execute(
+                "SELECT place_id, url, status, updated_at FROM progress").fetchall():
+            groups.setdefault(place_key(url), []).append((rank.get(status, 3), -updated_at, place_id, url))
+
+        removed = 0
+        with self.conn:
+            for key, rows in groups.items():
+                rows.sort()
+                _, _, place_id, url = rows[0]
+                for _, _, duplicate_id, _ in rows[1:]:
+                    self.conn.execute("DELETE FROM progress WHERE place_id = ?", (duplicate_id,))
+                    removed += 1
+                self.conn.execute("UPDATE progress SET place_id = ?, url = ? WHERE place_id = ?",
+                                  (key, canonical_place_url(url), place_id))
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, str(time.time())))
+
+        if removed:
+            self.logger.info(f"已合併 {removed} 筆重複的地點記錄")
+        return removed
+
+    def counts(self):
+        """各狀態的餐廳數量"""
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM progress GROUP BY status")
+        return dict(rows.fetchall())
+
+    def import_progress_json(self, json_file="data/raw/progress.json"):
+        """匯入舊版 progress.json 中已處理的 URL (只匯入一次)"""
+        if not os.path.exists(json_file):
+            return 0
+
+        marker = f"imported:{os.path.abspath(json_file)}"
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+            return 0
+
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                progress = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"無法讀取 {json_file}: {str(e)}")
+            return 0
+
+        processed_urls = progress.get("processed_urls", [])
+        timestamp = progress.get("timestamp", time.time())
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO progress (place_id, url, status, attempts, created_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (place_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+            """, [(place_key(url), url, STATUS_DONE, timestamp, timestamp) for url in processed_urls])
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, str(time.time())))
+
+        self.logger.info(f"已從 {json_file} 匯入 {len(processed_urls)} 家已處理餐廳")
+        return len(processed_urls)
+
+    def close(self):
+        """關閉資料庫連線"""
+        self.conn.close()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import random
+import threading
+import time
+
+# 頁面結果分類
+OUTCOME_OK = "ok"
+OUTCOME_BLOCKED = "blocked"    # CAPTCHA / "unusual traffic" 頁面
+OUTCOME_EMPTY = "empty"        # 有評論數但評論面板為空
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+class BlockedError(Exception):
+    """Google 返回了 CAPTCHA 或異常流量頁面"""
+    pass
+
+class FixedRestLimiter:
+    """固定休息時間：每家餐廳 1-4 分鐘、每次搜尋 1-2 分鐘、每個工作階段結束 10-13 分鐘"""
+
+    def __init__(self, place_rest=(1*60, 4*60), search_rest=(1*60, 2*60), session_rest=(10*60, 13*60)):
+        self.logger = logging.getLogger("RateLimiter")
+        self.rests = {"place": place_rest, "search": search_rest}
+        self.session_rest = session_rest
+        self.last_kind = None
+        self.next_slot = 0
+
+    def for_worker(self):
+        """每個工作執行緒各自休息"""
+        return FixedRestLimiter(self.rests["place"], self.rests["search"], self.session_rest)
+
+    def reserve(self, kind="place"):
+        """取得下一次導航的時間 (時間戳)，不等待；第一次導航不休息"""
+        rest_time = random.uniform(*self.rests[self.last_kind]) if self.last_kind is not None else 0
+        self.last_kind = kind
+        self.next_slot = max(time.time(), self.next_slot) + rest_time
+        return self.next_slot
+
+    def wait(self, kind="place"):
+        """在導航前休息 (第一次導航不休息)"""
+        wait_time = self.reserve(kind) - time.time()
+        if wait_time > 0:
+            self.logger.info(f"休息 {wait_time/60:.1f} 分鐘後繼續")
+            time.sleep(wait_time)
+
+    def session_ended(self):
+        """工作階段結束時長時間休息"""
+        sleep_time = random.uniform(*self.session_rest)
+        self.logger.info(f"休息 {sleep_time/60:.1f} 分鐘")
+        time.sleep(sleep_time)
+        self.last_kind = None
+
+    def record(self, outcome):
+        pass
+
+    def current_rate(self):
+        """目前的導航速率 (次/分鐘)"""
+        low, high = self.rests["place"]
+        return 60 / ((low + high) / 2)
+
+class IPBudget:
+    """同一個 IP 的所有工作執行緒共用的狀態：封鎖退避與可選的總導航速率上限"""
+
+    def __init__(self, max_rate=None):
+        self.lock = threading.Lock()
+        # 所有工作執行緒合計的速率上限 (次/分鐘)，None 表示不限制
+        self.max_rate = max_rate
+        self.next_slot = 0
+        self.backoff_until = 0
+        self.consecutive_blocks = 0
+
+class AdaptiveRateLimiter:
+    """AIMD 速率控制：頁面正常時逐步加速，遇到封鎖訊號時減半並指數退避
+
+    速率以每分鐘導航次數表示，min_rate/max_rate 是每個工作執行緒 (或分頁) 的上下限：
+    for_worker() 為每個工作執行緒建立各自的速率，因此增加工作執行緒可以提高總速率。
+    同一個 IP 的工作執行緒共用封鎖退避，ip_max_rate 可另外限制所有工作執行緒合計的速率。
+    """
+
+    def __init__(self, initial_rate=0.5, min_rate=0.1, max_rate=6.0, increase=0.05, decrease=0.5,
+                 backoff_base=60, backoff_max=30*60, jitter=0.3, ip_max_rate=None, budget=None):
+        self.logger = logging.getLogger("RateLimiter")
+        self.initial_rate = initial_rate
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+
+        self.budget = budget or IPBudget(ip_max_rate)
+        self.next_slot = 0
+        # 由 for_worker() 建立的工作執行緒速率控制器
+        self.workers = []
+
+    def for_worker(self):
+        """為工作執行緒建立各自的速率 (設定相同，共用同一個 IP 的退避與總速率上限)"""
+        limiter = AdaptiveRateLimiter(self.initial_rate, self.min_rate, self.max_rate, self.increase,
+                                      self.decrease, self.backoff_base, self.backoff_max, self.jitter,
+                                      budget=self.budget)
+        with self.budget.lock:
+            self.workers.append(limiter)
+        return limiter
+
+    def reserve(self, kind="place"):
+        """取得下一個導航時段 (時間戳)，不等待"""
+        budget = self.budget
+        with budget.lock:
+            now = time.time()
+            slot = max(now, self.next_slot, budget.backoff_until)
+            if budget.max_rate:
+                slot = max(slot, budget.next_slot)
+                budget.next_slot = slot + 60 / budget.max_rate * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.next_slot = slot + 60 / self.rate * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return slot
+
+    def wait(self, kind="place"):
+        """取得下一個導航時段並等待到該時間"""
+        wait_time = self.reserve(kind) - time.time()
+        if wait_time > 0:
+            self.logger.info(f"等待 {wait_time:.1f} 秒 (目前速率 {self.rate:.2f} 次/分鐘)")
+            time.sleep(wait_time)
+
+    def session_ended(self):
+        pass
+
+    def record(self, outcome):
+        """根據頁面結果調整速率；封鎖時同一個 IP 的所有工作執行緒一起退避"""
+        budget = self.budget
+        with budget.lock:
+            old_rate = self.rate
+
+            if outcome == OUTCOME_OK:
+                budget.consecutive_blocks = 0
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                return
+
+            if outcome == OUTCOME_ERROR:
+                return
+
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+            if outcome in (OUTCOME_BLOCKED, OUTCOME_EMPTY):
+                budget.consecutive_blocks += 1
+                backoff = min(self.backoff_max, self.backoff_base * 2 ** (budget.consecutive_blocks - 1))
+                budget.backoff_until = max(budget.backoff_until, time.time() + backoff)
+                self.logger.warning(f"偵測到封鎖訊號 ({outcome})，暫停 {backoff/60:.1f} 分鐘，"
+                                    f"速率 {old_rate:.2f} -> {self.rate:.2f} 次/分鐘")
+            else:
+                self.logger.warning(f"頁面逾時，速率 {old_rate:.2f} -> {self.rate:.2f} 次/分鐘")
+
+    def current_rate(self):
+        """目前的導航速率 (次/分鐘)；建立過工作執行緒時為所有工作執行緒的合計"""
+        rate = self.total_rate()
+        if self.budget.max_rate:
+            rate = min(rate, self.budget.max_rate)
+        return rate
+
+    def total_rate(self):
+        """本控制器的速率，或其工作執行緒 (與分頁) 的速率合計"""
+        workers = list(self.workers)
+        return sum(worker.total_rate() for worker in workers) if workers else self.rate
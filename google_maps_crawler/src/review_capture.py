@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""從 Chrome 效能日誌中擷取 Google Maps 評論 RPC 回應，並解碼為評論字典"""
+
+import json
+import logging
+
+# 評論面板滾動時呼叫的內部端點
+REVIEW_RPC_PATTERNS = [
+    "/maps/rpc/listugcposts",
+    "/maps/preview/review/listentitiesreviews"
+]
+
+# 回應開頭的 XSSI 防護前綴
+XSSI_PREFIX = ")]}'"
+
+# listugcposts: payload[2] 為評論列表，每項的 [0] 為評論本體
+UGC_REVIEWS_PATH = (2,)
+UGC_FIELDS = {
+    "review_id": (0, 0),
+    "reviewer_name": (0, 1, 4, 5, 0),
+    "date": (0, 1, 6),
+    "rating": (0, 2, 0, 0),
+    "text": (0, 2, 15, 0, 0),
+    "photos": (0, 2, 2)
+}
+UGC_PHOTO_URL_PATH = (1, 6, 0)
+
+# listentitiesreviews (舊版端點): payload[2] 為評論列表
+LEGACY_REVIEWS_PATH = (2,)
+LEGACY_FIELDS = {
+    "review_id": (10,),
+    "reviewer_name": (0, 1),
+    "date": (1,),
+    "rating": (4,),
+    "text": (3,),
+    "photos": (14,)
+}
+LEGACY_PHOTO_URL_PATH = (6, 0)
+
+def dig(data, path):
+    """依索引路徑取出巢狀列表中的值，任何一層不存在時返回 None"""
+    for index in path:
+        try:
+            data = data[index]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return data
+
+def parse_rpc_body(body):
+    """去除 XSSI 前綴並解析 JSON"""
+    if body.startswith(XSSI_PREFIX):
+        body = body[len(XSSI_PREFIX):]
+    return json.loads(body)
+
+def format_rating(value, defaults):
+    """將數字評分轉為與頁面 aria-label 相同的格式 (如 "5 stars")"""
+    if not isinstance(value, (int, float)):
+        return defaults["rating"]
+    value = int(value) if float(value).is_integer() else value
+    return f"{value} star" if value == 1 else f"{value} stars"
+
+def decode_review(entry, fields, photo_url_path, defaults):
+    """將單條 RPC 評論解碼為與 DOM 提取相同的字典格式"""
+    reviewer_name = dig(entry, fields["reviewer_name"])
+    date = dig(entry, fields["date"])
+    text = dig(entry, fields["text"])
+
+    photos = []
+    for photo in dig(entry, fields["photos"]) or []:
+        photo_url = dig(photo, photo_url_path)
+        if isinstance(photo_url, str) and photo_url:
+            photos.append(photo_url)
+
+    return {
+        "review_id": dig(entry, fields["review_id"]),
+        "reviewer_name": reviewer_name if isinstance(reviewer_name, str) else defaults["reviewer_name"],
+        "rating": format_rating(dig(entry, fields["rating"]), defaults),
+        "date": date if isinstance(date, str) else defaults["date"],
+        "text": text if isinstance(text, str) else "",
+        "photos": photos,
+        "tags": []
+    }
+
+def decode_review_payload(body, defaults, url=""):
+    """解碼一個 RPC 回應主體，返回評論字典列表"""
+    payload = parse_rpc_body(body)
+
+    if "listentitiesreviews" in url:
+        reviews_path, fields, photo_url_path = LEGACY_REVIEWS_PATH, LEGACY_FIELDS, LEGACY_PHOTO_URL_PATH
+    else:
+        reviews_path, fields, photo_url_path = UGC_REVIEWS_PATH, UGC_FIELDS, UGC_PHOTO_URL_PATH
+
+    entries = dig(payload, reviews_path) or []
+    return [decode_review(entry, fields, photo_url_path, defaults) for entry in entries if isinstance(entry, list)]
+
+class ReviewCapture:
+    """解碼瀏覽器效能日誌中的評論 RPC 回應 (需以 capture_network=True 建立瀏覽器)"""
+
+    def __init__(self, defaults):
+        self.logger = logging.getLogger("ReviewCapture")
+        self.defaults = defaults
+
+    def review_responses(self, messages):
+        """從效能日誌事件中找出評論端點的回應 (requestId, url)"""
+        responses = []
+        for message in messages:
+            if message.get("method") != "Network.responseReceived":
+                continue
+
+            params = message.get("params", {})
+            url = params.get("response", {}).get("url", "")
+            if any(pattern in url for pattern in REVIEW_RPC_PATTERNS):
+                responses.append((params.get("requestId"), url))
+        return responses
+
+    def collect(self, driver, messages):
+        """讀取效能日誌事件中的評論回應並解碼，按評論 ID 去重"""
+        reviews = []
+        seen_ids = set()
+
+        for request_id, url in self.review_responses(messages):
+            try:
+                response = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                decoded = decode_review_payload(response.get("body", ""), self.defaults, url)
+            except Exception as e:
+                self.logger.warning(f"無法解碼評論回應: {str(e)}")
+                continue
+
+            for review in decoded:
+                # 保留評論 ID，評論索引以它比對已知評論
+                review_id = review["review_id"]
+                if review_id is not None:
+                    if review_id in seen_ids:
+                        continue
+                    seen_ids.add(review_id)
+                reviews.append(review)
+
+        self.logger.info(f"從網路回應擷取 {len(reviews)} 條評論")
+        return reviews
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from .utils import place_key, extract_rating_value
+
+# 只取評論開頭的文字：未展開的評論只顯示前段，展開後開頭不變
+FINGERPRINT_TEXT_LENGTH = 40
+# 指紋規則改變時遞增，舊版索引會清空並從主數據重建
+FINGERPRINT_VERSION = "2"
+
+def review_fingerprint(reviewer_name, text, rating=None, date=None):
+    """以評論者名稱、評分與評論開頭文字計算評論指紋 (評論沒有 ID 時使用)
+
+    "Anonymous"、"A Google user" 等共用名稱與只有評分的評論容易互相碰撞，因此納入評分，
+    沒有文字的評論再納入日期文字。相對日期 ("2 months ago") 會隨時間改變，有文字的評論不納入日期，
+    否則舊評論在重新整理時會被當成新評論。
+    """
+    normalized = re.sub(r"\s+", " ", text or "").strip().rstrip("…").strip()
+    rating_value = extract_rating_value(str(rating)) if rating is not None else None
+    date_text = "" if normalized else (date or "").strip()
+    key = f"{reviewer_name or ''}\x1f{rating_value}\x1f{date_text}\x1f{normalized[:FINGERPRINT_TEXT_LENGTH]}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def review_key(review):
+    """評論在索引中保存的鍵：有評論 ID 時使用 ID，否則使用指紋"""
+    if review.get("review_id"):
+        return f"id:{review['review_id']}"
+    return review_fingerprint(review.get("reviewer_name"), review.get("text"), review.get("rating"), review.get("date"))
+
+def review_keys(review):
+    """返回一條評論可用於比對的所有鍵 (評論 ID 與指紋)
+
+    只有沒有 ID 的評論以指紋保存，因此有 ID 的評論只會以指紋比對到沒有 ID 的舊記錄。
+    """
+    keys = [review_fingerprint(review.get("reviewer_name"), review.get("text"), review.get("rating"),
+                               review.get("date"))]
+    if review.get("review_id"):
+        keys.append(f"id:{review['review_id']}")
+    return keys
+
+class ReviewIndex:
+    """每家餐廳已知評論的索引，用於增量更新時判斷新評論"""
+
+    def __init__(self, db_file="data/raw/review_index.db"):
+        self.logger = logging.getLogger("ReviewIndex")
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_keys (
+                    place_id TEXT NOT NULL,
+                    review_key TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    PRIMARY KEY (place_id, review_key)
+                )
+            """)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint_version'").fetchone()
+            if row is None or row[0] != FINGERPRINT_VERSION:
+                # 舊版指紋無法與新的比對，清空後由 build_from_records 重建
+                self.conn.execute("DELETE FROM review_keys")
+                self.conn.execute("DELETE FROM meta WHERE key = 'built_from_store'")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint_version', ?)",
+                                  (FINGERPRINT_VERSION,))
+
+    def add_reviews(self, url, reviews):
+        """登記餐廳的評論"""
+        self.add_keys(url, [review_key(review) for review in reviews])
+
+    def add_keys(self, url, keys):
+        """登記餐廳的評論鍵 (review_key 的結果)"""
+        place_id = place_key(url)
+        now = time.time()
+        rows = [(place_id, key, now) for key in keys]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO review_keys (place_id, review_key, first_seen) VALUES (?, ?, ?)", rows
+            )
+
+    def known_keys(self, url):
+        """返回餐廳所有已知評論鍵"""
+        rows = self.conn.execute("SELECT review_key FROM review_keys WHERE place_id = ?", (place_key(url),))
+        return set(row[0] for row in rows)
+
+    def is_known(self, review, known_keys):
+        """評論是否已在索引中"""
+        return any(key in known_keys for key in review_keys(review))
+
+    def build_from_records(self, records):
+        """從已保存的餐廳記錄建立索引 (只執行一次)"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'built_from_store'").fetchone():
+            return
+
+        count = 0
+        for record in records:
+            self.add_reviews(record.get("url", ""), record.get("reviews", []))
+            count += 1
+
+        with self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('built_from_store', ?)", (str(time.time()),))
+        self.logger.info(f"已從 {count} 條餐廳記錄建立評論索引")
+
+    def close(self):
+        """關閉資料庫連線"""
+        self.conn.close()
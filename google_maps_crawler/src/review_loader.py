@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from .page_scripts import (SCROLL_AND_WAIT_FOR_REVIEWS_JS, CLICK_MORE_BUTTONS_JS, WAIT_FOR_DOM_SETTLE_JS,
+                           HARVEST_REVIEWS_JS)
+from .pacing import HumanPacing
+from .metrics import METRICS
+
+REVIEW_CONTAINER_SELECTOR = "div.m6QErb.DxyBCb.kA9KIf.dS8AEf"
+
+class ReviewLoader:
+    """事件驅動的評論載入：滾動後只等到新評論節點出現或短暫閒置逾時
+
+    人為節奏的滾動距離通常到不了延遲載入的位置，這些步驟不等待評論，立即返回；
+    只有接近底部時才滾到底並等待新評論。閱讀停頓是滾動之後另外的延遲。
+    """
+
+    def __init__(self, pacing=None, idle_timeout=2.5, max_idle_rounds=2, confirm_timeout=1.0, load_threshold=1000,
+                 logger=None):
+        self.logger = logger or logging.getLogger("ReviewLoader")
+        # 指標中的工作執行緒標籤
+        self.worker_name = None
+        self.pacing = pacing or HumanPacing()
+        # 滾到底後等待下一批評論出現的最長秒數
+        self.idle_timeout = idle_timeout
+        # 在底部連續幾次沒有新評論即視為載入完畢
+        self.max_idle_rounds = max_idle_rounds
+        # 確認沒有更多評論時 (第一次閒置之後) 每次等待的秒數，不加閱讀停頓
+        self.confirm_timeout = confirm_timeout
+        # 離底部多少像素以內才會觸發延遲載入
+        self.load_threshold = load_threshold
+
+    def end_wait(self):
+        """在底部判定沒有更多評論最多需要的秒數"""
+        return self.idle_timeout + self.confirm_timeout * (self.max_idle_rounds - 1)
+
+    def next_step(self, idle_rounds):
+        """下一次滾動的 (距離, 等待毫秒)：確認是否到底時直接滾到底並使用較短的等待"""
+        if idle_rounds:
+            return None, int(self.confirm_timeout * 1000)
+        return self.pacing.scroll_step(), int(self.idle_timeout * 1000)
+
+    def pause(self, driver, review_container):
+        """滾動之後的人為節奏：偶爾點擊評論容器，再停頓閱讀"""
+        if self.pacing.should_click():
+            try:
+                driver.execute_script("arguments[0].click();", review_container)
+            except:
+                pass
+
+        pause_time = self.pacing.scroll_pause()
+        if pause_time:
+            with METRICS.time_phase("sleep", worker=self.worker_name):
+                time.sleep(pause_time)
+
+    def load(self, driver, max_scrolls=50, target_count=None, stop_condition=None):
+        """滾動評論容器直到達到目標數量、沒有更多評論或 stop_condition(driver) 為真，返回已載入數量"""
+        try:
+            review_container = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, REVIEW_CONTAINER_SELECTOR))
+            )
+        except:
+            self.logger.warning("找不到評論容器，無法滾動加載更多評論")
+            return 0
+
+        driver.set_script_timeout(self.idle_timeout + 10)
+
+        current_count = 0
+        idle_rounds = 0
+
+        for scroll_attempt in range(max_scrolls):
+            step, wait_ms = self.next_step(idle_rounds)
+            result = driver.execute_async_script(
+                SCROLL_AND_WAIT_FOR_REVIEWS_JS,
+                review_container,
+                current_count,
+                step,
+                wait_ms,
+                self.load_threshold
+            )
+
+            if result["count"] > current_count:
+                idle_rounds = 0
+            elif result["at_bottom"]:
+                idle_rounds += 1
+            current_count = result["count"]
+
+            self.logger.info(f"當前已加載 {current_count} 條評論 (滾動次數: {scroll_attempt + 1}/{max_scrolls})")
+
+            if target_count and current_count >= target_count:
+                self.logger.info(f"已載入所有評論: {current_count}/{target_count} 條")
+                break
+
+            if idle_rounds >= self.max_idle_rounds:
+                self.logger.info(f"已載入所有評論: {current_count} 條 (連續 {idle_rounds} 次無新評論)")
+                break
+
+            if stop_condition is not None and stop_condition(driver):
+                self.logger.info(f"已到達停止條件: {current_count} 條評論")
+                break
+
+            if not idle_rounds:
+                self.pause(driver, review_container)
+
+        return current_count
+
+    def harvest(self, driver, defaults, max_scrolls=None, target_count=None, keep=20, quiet_ms=300):
+        """串流收割評論：每次滾動後展開並提取新載入的評論，逐條 yield，並從 DOM 移除已處理的節點
+
+        頁面中最多只保留 keep 個已處理的評論節點，因此評論再多，瀏覽器記憶體與每次查詢的成本都固定。
+        max_scrolls 為 None 時一直滾動到沒有更多評論或達到 target_count。
+        """
+        try:
+            review_container = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, REVIEW_CONTAINER_SELECTOR))
+            )
+        except:
+            self.logger.warning("找不到評論容器，無法滾動加載更多評論")
+            return
+
+        driver.set_script_timeout(self.idle_timeout + quiet_ms * 10 / 1000 + 10)
+
+        harvested = 0
+        pruned = 0
+        idle_rounds = 0
+        scroll_attempt = 0
+
+        try:
+            while max_scrolls is None or scroll_attempt < max_scrolls:
+                scroll_attempt += 1
+                step, wait_ms = self.next_step(idle_rounds)
+                with METRICS.time_phase("harvest", worker=self.worker_name):
+                    result = driver.execute_async_script(
+                        HARVEST_REVIEWS_JS,
+                        review_container,
+                        defaults,
+                        step,
+                        wait_ms,
+                        quiet_ms,
+                        keep,
+                        self.load_threshold
+                    )
+
+                if result["reviews"]:
+                    idle_rounds = 0
+                elif result["at_bottom"]:
+                    idle_rounds += 1
+                harvested += len(result["reviews"])
+                pruned += result["pruned"]
+
+                self.logger.info(f"已收割 {harvested} 條評論，頁面保留 {result['dom_reviews']} 個評論節點 "
+                                 f"(滾動次數: {scroll_attempt})")
+
+                for review in result["reviews"]:
+                    yield review
+
+                if target_count and harvested >= target_count:
+                    self.logger.info(f"已收割所有評論: {harvested}/{target_count} 條")
+                    break
+
+                if idle_rounds >= self.max_idle_rounds:
+                    self.logger.info(f"已收割所有評論: {harvested} 條 (連續 {idle_rounds} 次無新評論)")
+                    break
+
+                if not idle_rounds:
+                    self.pause(driver, review_container)
+        finally:
+            # 呼叫端可能提前關閉生成器 (增量更新遇到已知評論)
+            METRICS.inc("crawl_review_nodes_pruned_total", pruned, worker=self.worker_name)
+
+    def expand_all(self, driver, retries=2, quiet_ms=300, max_wait_ms=5000):
+        """一次點擊所有「更多」按鈕並等待 DOM 穩定，只對仍被截斷的評論重試
+
+        返回 (已展開數量, 仍被截斷的數量)
+        """
+        driver.set_script_timeout(max_wait_ms / 1000 + 10)
+
+        expanded_count = 0
+        remaining = 0
+
+        for attempt in range(retries + 1):
+            clicked = driver.execute_script(CLICK_MORE_BUTTONS_JS)
+            if not clicked:
+                break
+
+            remaining = driver.execute_async_script(WAIT_FOR_DOM_SETTLE_JS, quiet_ms, max_wait_ms)
+            expanded_count += clicked - remaining
+            if not remaining or attempt == retries:
+                break
+
+            self.logger.info(f"仍有 {remaining} 條評論未展開，重試 ({attempt + 1}/{retries})")
+
+        return expanded_count, remaining
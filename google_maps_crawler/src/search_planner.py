@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+from urllib.parse import quote_plus
+
+# 城市範圍 (南, 西, 北, 東)
+CITY_BOUNDS = {
+    "New York": (40.4774, -74.2591, 40.9176, -73.7004),
+    "Los Angeles": (33.7037, -118.6682, 34.3373, -118.1553),
+    "Chicago": (41.6445, -87.9401, 42.0230, -87.5237),
+    "Houston": (29.5237, -95.7881, 30.1107, -95.0146),
+    "Phoenix": (33.2903, -112.3241, 33.9199, -111.9256),
+    "Philadelphia": (39.8670, -75.2803, 40.1379, -74.9558),
+    "San Antonio": (29.2237, -98.8110, 29.7361, -98.2896),
+    "San Diego": (32.5343, -117.2823, 33.1143, -116.9087),
+    "Dallas": (32.6175, -96.9990, 33.0237, -96.4637),
+    "San Francisco": (37.7081, -122.5149, 37.8324, -122.3570)
+}
+
+def encode_tile(bounds, depth):
+    """圖塊鍵，如 "1:40.47740,-74.25910,40.69750,-73.97975" """
+    return f"{depth}:" + ",".join(f"{value:.5f}" for value in bounds)
+
+def decode_tile(tile):
+    """從圖塊鍵還原 (範圍, 深度)"""
+    depth, bounds = tile.split(":", 1)
+    return tuple(float(value) for value in bounds.split(",")), int(depth)
+
+class SearchPlanner:
+    """把城市切成地理圖塊，以地圖中心搜尋取代整個城市的文字搜尋
+
+    Google 每次搜尋只返回前一百多個結果。結果達到上限的圖塊會被切成四塊重新搜尋，
+    但如果該圖塊帶來的新地點比例過低就不再細分，避免在已覆蓋的區域浪費搜尋。
+    """
+
+    def __init__(self, city_bounds=None, grid_size=2, max_depth=3, result_cap=100, min_new_ratio=0.2,
+                 viewport=(1024, 768)):
+        self.logger = logging.getLogger("SearchPlanner")
+        self.city_bounds = city_bounds or CITY_BOUNDS
+        # 每個城市一開始切成 grid_size × grid_size 塊
+        self.grid_size = grid_size
+        # 最多細分幾層 (每層面積為上一層的四分之一)
+        self.max_depth = max_depth
+        # 結果數量達到此值即視為被 Google 截斷
+        self.result_cap = result_cap
+        # 新地點佔結果的比例低於此值時不再細分
+        self.min_new_ratio = min_new_ratio
+        self.viewport = viewport
+
+    def initial_tiles(self, location):
+        """城市的初始圖塊；不在 city_bounds 中的城市返回 [""] (使用原本的文字搜尋)"""
+        bounds = self.city_bounds.get(location)
+        if bounds is None:
+            self.logger.warning(f"No bounds for {location}, falling back to a city-wide text search")
+            return [""]
+        return [encode_tile(child, 0) for child in self.split(bounds, self.grid_size)]
+
+    def split(self, bounds, parts):
+        """把範圍切成 parts × parts 塊"""
+        south, west, north, east = bounds
+        lat_step = (north - south) / parts
+        lng_step = (east - west) / parts
+        return [
+            (south + row * lat_step, west + col * lng_step, south + (row + 1) * lat_step, west + (col + 1) * lng_step)
+            for row in range(parts) for col in range(parts)
+        ]
+
+    def zoom_for(self, bounds):
+        """讓整個圖塊落在視窗內的最大縮放等級"""
+        south, west, north, east = bounds
+        width, height = self.viewport
+        zoom_lng = math.log2(360 * width / 256 / max(east - west, 1e-6))
+        # 麥卡托投影下緯度方向需按 cos(緯度) 修正
+        lat_span = (north - south) / math.cos(math.radians((north + south) / 2))
+        zoom_lat = math.log2(360 * height / 256 / max(lat_span, 1e-6))
+        return max(3, min(18, int(min(zoom_lng, zoom_lat))))
+
+    def search_url(self, term, location, tile):
+        """圖塊的地圖中心搜尋網址；沒有圖塊時返回 None"""
+        if not tile:
+            return None
+        bounds, _ = decode_tile(tile)
+        south, west, north, east = bounds
+        return (f"https://www.google.com/maps/search/{quote_plus(term)}/"
+                f"@{(south + north) / 2:.6f},{(west + east) / 2:.6f},{self.zoom_for(bounds)}z?hl=en")
+
+    def children(self, tile, result_count, new_count):
+        """圖塊搜尋完成後需要追加的子圖塊 (不需細分時返回空列表)"""
+        if not tile or result_count < self.result_cap:
+            return []
+
+        bounds, depth = decode_tile(tile)
+        if depth >= self.max_depth:
+            self.logger.info(f"Tile {tile} is capped at {result_count} results but already at max depth")
+            return []
+
+        if new_count < result_count * self.min_new_ratio:
+            self.logger.info(f"Pruning tile {tile}: only {new_count}/{result_count} new places")
+            return []
+
+        return [encode_tile(child, depth + 1) for child in self.split(bounds, 2)]
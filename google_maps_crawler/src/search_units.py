@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sqlite3
+import time
+from .utils import place_key, canonical_place_url
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+class SearchUnitStore:
+    """以 SQLite 記錄每個 (城市, 餐廳類型, 圖塊) 搜尋單元的狀態與結果，每個單元完成時立即提交
+
+    圖塊為空字串時表示整個城市的文字搜尋。
+    """
+
+    def __init__(self, db_file="data/raw/search_units.db", max_attempts=3):
+        self.logger = logging.getLogger("SearchUnitStore")
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+    def create_tables(self):
+        """建立搜尋單元表與結果表"""
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_units (
+                    unit_id TEXT PRIMARY KEY,
+                    location TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    tile TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result_count INTEGER,
+                    new_count INTEGER,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_results (
+                    unit_id TEXT NOT NULL,
+                    place_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    name TEXT,
+                    rating TEXT,
+                    reviews_count TEXT,
+                    collected_at REAL NOT NULL,
+                    PRIMARY KEY (unit_id, place_id)
+                )
+            """)
+            # 早期版本的表沒有圖塊欄位
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(search_units)")]
+            if "tile" not in columns:
+                self.conn.execute("ALTER TABLE search_units ADD COLUMN tile TEXT NOT NULL DEFAULT ''")
+                self.conn.execute("ALTER TABLE search_units ADD COLUMN new_count INTEGER")
+
+    @staticmethod
+    def unit_id(location, term, tile=""):
+        """搜尋單元的唯一鍵"""
+        if tile:
+            return f"{location}|{term}|{tile}"
+        return f"{location}|{term}"
+
+    def is_empty(self):
+        """是否還沒有任何搜尋單元"""
+        return self.conn.execute("SELECT 1 FROM search_units LIMIT 1").fetchone() is None
+
+    def add_units(self, units, status=STATUS_PENDING):
+        """登記 (城市, 餐廳類型, 圖塊) 搜尋單元，已存在的單元不受影響"""
+        with self.conn:
+            self.insert_units(units, status)
+
+    def insert_units(self, units, status=STATUS_PENDING):
+        """在目前的交易中登記搜尋單元"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO search_units (unit_id, location, term, tile, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(self.unit_id(location, term, tile), location, term, tile, status, now, now)
+             for location, term, tile in units]
+        )
+
+    def pending_units(self):
+        """返回尚未完成、且失敗次數未達上限的 (城市, 餐廳類型, 圖塊)"""
+        rows = self.conn.execute(
+            "SELECT location, term, tile FROM search_units WHERE status = ? OR (status = ? AND attempts < ?) "
+            "ORDER BY created_at, rowid",
+            (STATUS_PENDING, STATUS_FAILED, self.max_attempts)
+        )
+        return [tuple(row) for row in rows]
+
+    def mark_done(self, unit, cards, children=None):
+        """保存搜尋單元的結果並標記完成，返回本單元新發現的地點網址
+
+        children 為需要追加的子單元 (或以新地點數量返回子單元的函數)，與結果在同一個交易中登記。
+        """
+        location, term, tile = unit
+        unit_id = self.unit_id(location, term, tile)
+        known = self.known_place_ids()
+        now = time.time()
+
+        new_urls = []
+        rows = []
+        for card in cards:
+            place_id = place_key(card["url"])
+            url = canonical_place_url(card["url"])
+            rows.append((unit_id, place_id, url, card.get("name"), card.get("rating"), card.get("reviews_count"), now))
+            if place_id not in known:
+                known.add(place_id)
+                new_urls.append(url)
+
+        if callable(children):
+            children = children(len(new_urls))
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("""
+                UPDATE search_units SET status = ?, attempts = attempts + 1, result_count = ?, new_count = ?,
+                    last_error = NULL, updated_at = ?
+                WHERE unit_id = ?
+            """, (STATUS_DONE, len(cards), len(new_urls), now, unit_id))
+            if children:
+                self.insert_units(children)
+
+        return new_urls
+
+    def mark_failed(self, unit, error=None):
+        """記錄搜尋單元失敗 (下次執行時重試，直到達到 max_attempts)"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE search_units SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? "
+                "WHERE unit_id = ?",
+                (STATUS_FAILED, error, time.time(), self.unit_id(*unit))
+            )
+
+    def known_place_ids(self):
+        """所有搜尋單元已收集到的地點 ID"""
+        return set(row[0] for row in self.conn.execute("SELECT DISTINCT place_id FROM search_results"))
+
+    def all_urls(self):
+        """所有已收集的標準網址 (按地點去重，保留收集順序)"""
+        unique = {}
+        for place_id, url in self.conn.execute("SELECT place_id, url FROM search_results ORDER BY collected_at, rowid"):
+            unique.setdefault(place_id, url)
+        return list(unique.values())
+
+    def place_categories(self):
+        """地點 ID -> 第一次找到它的 (城市, 餐廳類型)"""
+        categories = {}
+        rows = self.conn.execute("""
+            SELECT r.place_id, u.location, u.term FROM search_results r JOIN search_units u USING (unit_id)
+            WHERE u.term != 'imported' ORDER BY r.collected_at, r.rowid
+        """)
+        for place_id, location, term in rows:
+            categories.setdefault(place_id, (location, term))
+        return categories
+
+    def import_urls(self, urls, source):
+        """將舊版 URL 清單保存為一個已完成的單元"""
+        unit = (source, "imported", "")
+        self.add_units([unit])
+        return self.mark_done(unit, [{"url": url} for url in urls])
+
+    def counts(self):
+        """各狀態的搜尋單元數量"""
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM search_units GROUP BY status")
+        return dict(rows.fetchall())
+
+    def close(self):
+        """關閉資料庫連線"""
+        self.conn.close()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from .metrics import METRICS
+
+# 每個欄位的候選選擇器，按優先順序排列 (RestaurantCrawler 與 DataExtractor 共用)
+SELECTOR_ALTERNATIVES = {
+    "reviews_tab": [
+        (By.XPATH, "//button[contains(@aria-label, 'Reviews')]"),
+        (By.XPATH, "//div[contains(text(), 'Reviews')]"),
+        (By.XPATH, "//button[contains(., 'Reviews')]"),
+        (By.XPATH, "//button[contains(@aria-label, 'review')]"),
+        (By.XPATH, "//div[contains(text(), 'review')]"),
+        (By.XPATH, "//button[contains(@aria-label, '評論')]"),
+        (By.XPATH, "//div[contains(text(), '評論')]")
+    ],
+    "place_name": [(By.CSS_SELECTOR, "h1.DUwDvf")],
+    "address": [(By.CSS_SELECTOR, "button[data-item-id='address']")],
+    "rating_block": [(By.CSS_SELECTOR, "div.F7nice")],
+    "overall_rating": [(By.CSS_SELECTOR, "span.ceNzKf")],
+    "reviews_count": [(By.CSS_SELECTOR, "span.HHrUdb")],
+    "review": [(By.CSS_SELECTOR, "div.jftiEf")],
+    "reviewer_name": [(By.CSS_SELECTOR, "div.d4r55")],
+    "review_rating": [(By.CSS_SELECTOR, "span.kvMYJc")],
+    "review_date": [(By.CSS_SELECTOR, "span.rsqaWe")],
+    "review_text": [
+        (By.CSS_SELECTOR, "span.wiI7pd"),
+        (By.CSS_SELECTOR, "div.MyEned"),
+        (By.CSS_SELECTOR, "div[jsinstance]")
+    ],
+    "review_photos": [(By.CSS_SELECTOR, "div.KtCyie img.STQFb")],
+    "review_tags": [(By.CSS_SELECTOR, "div.m6QErb div.NGLBjb")]
+}
+
+# 按優先順序嘗試的後備鏈：後面的候選較泛用 (如 div[jsinstance] 會匹配評論中的其他區塊)，
+# 只在前面的候選都未命中時使用，不能因為某條評論命中而提前到其他評論之前
+FALLBACK_CHAINS = {"review_text"}
+
+def alternative_key(alternative):
+    """統計文件中候選選擇器的鍵，如 "css selector=h1.DUwDvf" """
+    by, value = alternative
+    return f"{by}={value}"
+
+class SelectorRegistry:
+    """共用的選擇器登記表：記錄每個欄位上次命中的候選選擇器並優先嘗試，命中/未命中次數跨執行保存
+
+    頁面改版時原本的命中者開始未命中、另一個候選成為新的命中者，會立即出現在日誌與統計文件中。
+    後備鏈 (fallback_chains) 中的欄位永遠按原本的順序嘗試，只記錄命中/未命中次數。
+    """
+
+    def __init__(self, stats_file="data/raw/selector_stats.json", alternatives=None, save_interval=60,
+                 fallback_chains=None):
+        self.logger = logging.getLogger("SelectorRegistry")
+        self.stats_file = stats_file
+        self.alternatives = alternatives or SELECTOR_ALTERNATIVES
+        self.fallback_chains = FALLBACK_CHAINS if fallback_chains is None else fallback_chains
+        # 兩次自動保存之間的最短秒數
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.stats = None
+        self.dirty = False
+        self.last_saved = time.time()
+
+    def load(self):
+        """讀取統計文件 (只執行一次)"""
+        with self.lock:
+            if self.stats is not None:
+                return
+            try:
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    self.stats = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.stats = {}
+            # 舊版統計文件可能為後備鏈記錄了命中者
+            for name in self.fallback_chains:
+                if name in self.stats:
+                    self.stats[name]["winner"] = None
+
+    def field_stats(self, name):
+        """欄位的統計 (呼叫時需持有鎖)"""
+        return self.stats.setdefault(name, {"winner": None, "lookups": 0, "failures": 0, "alternatives": {}})
+
+    def ordered(self, name):
+        """按嘗試順序返回 (鍵, 候選選擇器)：上次命中者優先，其餘保持原本的順序 (後備鏈不調整順序)"""
+        self.load()
+        candidates = [(alternative_key(alternative), alternative) for alternative in self.alternatives[name]]
+        if name in self.fallback_chains:
+            return candidates
+        with self.lock:
+            winner = self.stats.get(name, {}).get("winner")
+        for index, (key, _) in enumerate(candidates):
+            if key == winner:
+                return [candidates[index]] + candidates[:index] + candidates[index + 1:]
+        return candidates
+
+    def record(self, name, missed, hit=None):
+        """記錄一次查找：missed 為未命中的鍵，hit 為命中的鍵 (全部未命中時為 None)"""
+        with self.lock:
+            stats = self.field_stats(name)
+            stats["lookups"] += 1
+            for key in missed:
+                entry = stats["alternatives"].setdefault(key, {"hits": 0, "misses": 0, "last_hit": None})
+                entry["misses"] += 1
+            if hit is None:
+                stats["failures"] += 1
+            else:
+                entry = stats["alternatives"].setdefault(hit, {"hits": 0, "misses": 0, "last_hit": None})
+                entry["hits"] += 1
+                entry["last_hit"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                if name not in self.fallback_chains:
+                    previous = stats["winner"]
+                    stats["winner"] = hit
+                    if previous and previous != hit:
+                        self.logger.warning(f"Selector for {name} changed: {hit} matched after {previous} missed")
+            self.dirty = True
+            save_due = time.time() - self.last_saved >= self.save_interval
+
+        for key in missed:
+            METRICS.inc("crawl_selector_lookups_total", field=name, selector=key, result="miss")
+        if hit is not None:
+            METRICS.inc("crawl_selector_lookups_total", field=name, selector=hit, result="hit")
+
+        if save_due:
+            self.save()
+
+    def find_element(self, context, name):
+        """在 driver 或元素中查找欄位的第一個元素 (不等待)，所有候選都未命中時拋出 NoSuchElementException"""
+        missed = []
+        for key, (by, value) in self.ordered(name):
+            try:
+                elements = context.find_elements(by, value)
+            except StaleElementReferenceException:
+                elements = []
+            if elements:
+                self.record(name, missed, key)
+                return elements[0]
+            missed.append(key)
+        self.record(name, missed)
+        raise NoSuchElementException(f"no selector matched {name}")
+
+    def find_all(self, context, name):
+        """查找欄位的所有元素；結果為空是正常情況 (如沒有照片的評論)，不計入統計"""
+        for key, (by, value) in self.ordered(name):
+            elements = context.find_elements(by, value)
+            if elements:
+                self.record(name, [], key)
+                return elements
+        return []
+
+    def wait_for(self, driver, name, timeout=10, condition=EC.element_to_be_clickable):
+        """在同一個等待時間內輪詢所有候選選擇器 (上次命中者優先)，返回第一個符合條件的元素
+
+        逾時時拋出 TimeoutException。
+        """
+        candidates = self.ordered(name)
+        missed = []
+
+        try:
+            key, element = WebDriverWait(driver, timeout).until(
+                lambda driver: self.first_match(driver, candidates, condition, missed)
+            )
+        except:
+            self.record_failure(name)
+            raise
+        self.record(name, missed, key)
+        return element
+
+    def poll(self, driver, name, condition=EC.element_to_be_clickable):
+        """只檢查一次所有候選 (不等待)；命中時記錄並返回元素，否則返回 None 且不計入統計
+
+        供分頁模式在其他分頁工作時輪詢尚未出現的元素，最終逾時由呼叫端以 record_failure 記錄。
+        """
+        missed = []
+        match = self.first_match(driver, self.ordered(name), condition, missed)
+        if not match:
+            return None
+        self.record(name, missed, match[0])
+        return match[1]
+
+    def record_failure(self, name):
+        """記錄所有候選都未命中的一次查找"""
+        self.record(name, [key for key, _ in self.ordered(name)])
+
+    def first_match(self, driver, candidates, condition, missed):
+        """返回第一個符合條件的 (鍵, 元素)，並把之前未命中的鍵放進 missed"""
+        missed.clear()
+        for key, alternative in candidates:
+            try:
+                element = condition(alternative)(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                element = None
+            if element:
+                return key, element
+            missed.append(key)
+        return False
+
+    def save(self):
+        """原子地寫入統計文件"""
+        self.load()
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.stats, ensure_ascii=False, indent=2)
+            self.dirty = False
+            self.last_saved = time.time()
+
+        try:
+            os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+            tmp_file = f"{self.stats_file}.{threading.get_ident()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, self.stats_file)
+        except OSError as e:
+            self.logger.warning(f"Could not write selector stats: {str(e)}")
+
+SELECTOR_REGISTRY = SelectorRegistry()
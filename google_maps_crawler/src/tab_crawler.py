@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import queue
+import time
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from .master_store import ReviewSpool
+from .metrics import METRICS
+from .page_scripts import MARK_STALE_DOCUMENT_JS, NEW_DOCUMENT_READY_JS
+from .rate_limiter import BlockedError, OUTCOME_OK, OUTCOME_BLOCKED, OUTCOME_EMPTY, OUTCOME_TIMEOUT, OUTCOME_ERROR
+from .utils import parse_count, canonical_place_url
+
+# 每個瀏覽器最多同時驅動的分頁數 (分頁共用一個渲染行程池，過多時彼此拖慢)
+MAX_TABS_PER_BROWSER = 8
+
+# 分頁狀態
+TAB_IDLE = "idle"
+TAB_WAITING = "waiting"            # 等待導航時段 (速率控制)
+TAB_LOADING = "loading"            # 已導航，等待新頁面與餐廳名稱出現
+TAB_REVIEWS_TAB = "reviews_tab"    # 等待評論標籤可以點擊
+TAB_HARVESTING = "harvesting"      # 逐步滾動並收割評論
+
+class TabState:
+    """單一分頁的爬取狀態：目前的階段、下次可以繼續的時間與已收割的評論"""
+
+    def __init__(self, handle, rate_limiter):
+        self.handle = handle
+        # 分頁各自的導航速率 (同一個 IP 的分頁共用退避)
+        self.rate_limiter = rate_limiter
+        self.reset()
+
+    def reset(self):
+        """回到空閒狀態"""
+        self.state = TAB_IDLE
+        self.url = None
+        # 下一步最早的執行時間 (time.time())
+        self.ready_at = 0
+        # 目前階段的逾時時間
+        self.deadline = None
+        self.started = None
+        self.restaurant_data = None
+        self.spool = None
+        self.target_count = None
+        # 評論容器在底部且沒有新評論的開始時間
+        self.idle_since = None
+
+    def start(self, url, slot):
+        """指派一家餐廳，slot 為速率控制器分配的導航時間"""
+        self.reset()
+        self.state = TAB_WAITING
+        self.url = url
+        self.ready_at = slot
+
+class TabCrawler:
+    """以單一瀏覽器的多個分頁同時爬取餐廳，一個分頁等待頁面或評論載入時切換到其他分頁
+
+    每個分頁各自經過 導航 -> 載入 -> 評論標籤 -> 收割 的狀態機，每一步都是不等待的 WebDriver 命令；
+    排程器總是處理最早可以繼續的分頁，只有所有分頁都在等待時才休眠。評論以串流方式收割並暫存在磁碟，
+    已處理的評論節點會從頁面移除，因此每個分頁的記憶體固定。
+    """
+
+    def __init__(self, crawler, tabs=4, page_timeout=45, tab_timeout=10, poll_interval=0.5, keep=20):
+        self.crawler = crawler
+        self.logger = crawler.logger
+        if tabs > MAX_TABS_PER_BROWSER:
+            self.logger.warning(f"Limiting {tabs} tabs to {MAX_TABS_PER_BROWSER} per browser")
+        self.tabs = max(1, min(tabs, MAX_TABS_PER_BROWSER))
+        # 頁面載入與評論容器出現的最長秒數
+        self.page_timeout = page_timeout
+        # 評論標籤出現的最長秒數
+        self.tab_timeout = tab_timeout
+        # 等待中的分頁多久檢查一次
+        self.poll_interval = poll_interval
+        # 每個分頁保留的已處理評論節點數量
+        self.keep = keep
+        # 在底部連續多久沒有新評論即視為載入完畢 (與 ReviewLoader 相同)
+        self.idle_timeout = crawler.review_loader.end_wait()
+
+        self.driver = None
+        self.current_handle = None
+        self.tab_states = []
+        # 每個分頁位置各自的速率控制器，換新瀏覽器時沿用
+        self.rate_limiters = [crawler.rate_limiter.for_worker() for _ in range(self.tabs)]
+        # 目前的瀏覽器已開始的餐廳數與連續失敗次數
+        self.pages_started = 0
+        self.failures = 0
+
+    def run(self, url_queue, on_result):
+        """從 url_queue 取出 URL 直到收到 None 且所有分頁完成
+
+        每家餐廳完成或失敗時呼叫 on_result(url, restaurant_data, error)，失敗時 restaurant_data 為 None。
+        """
+        exhausted = False
+        try:
+            while True:
+                active = self.active_tabs()
+                if not exhausted:
+                    if not active and not self.accepting():
+                        self.recycle_browser()
+                    if self.accepting():
+                        exhausted = self.assign(url_queue, block=not active)
+                        active = self.active_tabs()
+
+                if not active:
+                    if exhausted:
+                        break
+                    continue
+
+                tab = min(active, key=lambda tab: tab.ready_at)
+                wait_time = tab.ready_at - time.time()
+                if wait_time > 0:
+                    # 所有分頁都在等待頁面載入、人為延遲或導航時段；短暫休眠以便接收新的 URL
+                    with METRICS.time_phase("tab_wait", worker=self.crawler.worker_name):
+                        time.sleep(min(wait_time, self.poll_interval))
+                    continue
+
+                self.step(tab, on_result)
+        finally:
+            for tab in self.tab_states:
+                if tab.spool is not None:
+                    tab.spool.close()
+            self.close_browser()
+
+    def active_tabs(self):
+        return [tab for tab in self.tab_states if tab.state != TAB_IDLE]
+
+    def accepting(self):
+        """目前的瀏覽器是否還能接新的餐廳 (頁數、工作階段與連續失敗的上限)"""
+        return (self.pages_started < self.crawler.browser_pool.max_pages_per_browser
+                and self.crawler.session_count < self.crawler.max_session_requests
+                and self.failures < self.crawler.browser_pool.max_failures)
+
+    def assign(self, url_queue, block):
+        """把 URL 指派給空閒分頁，收到 None 時返回 True"""
+        if self.driver is None:
+            self.open_browser()
+
+        for tab in self.tab_states:
+            if tab.state != TAB_IDLE:
+                continue
+            if not self.accepting():
+                break
+            try:
+                url = url_queue.get(block=block)
+            except queue.Empty:
+                return False
+            if url is None:
+                return True
+            block = False
+
+            tab.start(url, tab.rate_limiter.reserve("place"))
+            self.pages_started += 1
+            self.crawler.session_count += 1
+
+        return False
+
+    def open_browser(self):
+        """借出瀏覽器並開啟其餘分頁 (每個新分頁都需要重新註冊隱藏腳本)"""
+        self.driver = self.crawler.acquire_browser()
+        handles = [self.driver.current_window_handle]
+        pool = self.crawler.browser_pool
+        for _ in range(self.tabs - 1):
+            self.driver.switch_to.new_window("tab")
+            pool.browser_manager.setup_tab(self.driver, lean=pool.lean, blocked_urls=pool.blocked_urls)
+            handles.append(self.driver.current_window_handle)
+
+        self.current_handle = handles[-1]
+        self.tab_states = [TabState(handle, rate_limiter) for handle, rate_limiter in zip(handles, self.rate_limiters)]
+        self.logger.info(f"Opened {len(handles)} tabs")
+
+    def close_browser(self):
+        """關閉目前的瀏覽器 (分頁模式的瀏覽器不放回池中重用)"""
+        if self.driver is not None:
+            self.crawler.browser_pool.discard(self.driver)
+        self.driver = None
+        self.tab_states = []
+        self.pages_started = 0
+        self.failures = 0
+
+    def recycle_browser(self):
+        """所有分頁完成後換新的瀏覽器；工作階段用完時先休息"""
+        self.close_browser()
+        self.crawler.rest_if_session_exhausted()
+
+    def switch_to(self, tab):
+        if self.current_handle != tab.handle:
+            self.driver.switch_to.window(tab.handle)
+            self.current_handle = tab.handle
+
+    def step(self, tab, on_result):
+        """執行分頁狀態機的下一步"""
+        try:
+            self.switch_to(tab)
+            if tab.state == TAB_WAITING:
+                self.navigate(tab)
+            elif tab.state == TAB_LOADING:
+                self.check_loaded(tab)
+            elif tab.state == TAB_REVIEWS_TAB:
+                self.click_reviews_tab(tab)
+            elif tab.state == TAB_HARVESTING and self.harvest(tab):
+                self.complete(tab, on_result)
+        except BlockedError as e:
+            self.fail(tab, OUTCOME_BLOCKED, e, on_result)
+        except TimeoutException as e:
+            self.fail(tab, OUTCOME_TIMEOUT, e, on_result)
+        except Exception as e:
+            self.fail(tab, OUTCOME_ERROR, e, on_result)
+
+    def navigate(self, tab):
+        """開始載入餐廳頁面 (不等待載入完成)"""
+        with METRICS.time_phase("page_load", worker=self.crawler.worker_name):
+            self.driver.execute_script(MARK_STALE_DOCUMENT_JS)
+            self.driver.get(canonical_place_url(tab.url))
+
+        now = time.time()
+        tab.state = TAB_LOADING
+        tab.started = now
+        tab.deadline = now + self.page_timeout
+        tab.ready_at = now + max(self.poll_interval, self.crawler.pacing.delay(5, 8))
+
+    def check_loaded(self, tab):
+        """新頁面出現餐廳名稱後讀取基本信息"""
+        loaded = self.driver.execute_script(NEW_DOCUMENT_READY_JS)
+        if loaded:
+            self.crawler.check_blocked(self.driver)
+            loaded = self.crawler.selector_registry.poll(self.driver, "place_name",
+                                                         condition=EC.presence_of_element_located)
+
+        now = time.time()
+        if not loaded:
+            if now > tab.deadline:
+                self.crawler.selector_registry.record_failure("place_name")
+                raise TimeoutException(f"place page did not load within {self.page_timeout}s")
+            tab.ready_at = now + self.poll_interval
+            return
+
+        tab.restaurant_data = self.crawler.read_place_info(self.driver, tab.url)
+        tab.target_count = parse_count(tab.restaurant_data["reviews_count"])
+        tab.state = TAB_REVIEWS_TAB
+        tab.deadline = now + self.tab_timeout
+        tab.ready_at = now
+
+    def click_reviews_tab(self, tab):
+        """點擊評論標籤；逾時後仍嘗試收割 (與逐頁模式相同)"""
+        clicked = False
+        with METRICS.time_phase("reviews_tab", worker=self.crawler.worker_name):
+            reviews_tab = self.crawler.selector_registry.poll(self.driver, "reviews_tab")
+            if reviews_tab is not None:
+                try:
+                    reviews_tab.click()
+                    clicked = True
+                except Exception as e:
+                    self.logger.debug(f"Reviews tab not clickable yet: {str(e)}")
+
+        now = time.time()
+        if not clicked and now <= tab.deadline:
+            tab.ready_at = now + self.poll_interval
+            return
+
+        if clicked:
+            self.logger.info("Successfully clicked reviews tab")
+            tab.ready_at = now + max(self.poll_interval, self.crawler.pacing.delay(3, 5))
+        else:
+            self.crawler.selector_registry.record_failure("reviews_tab")
+            self.logger.warning(f"Could not click reviews tab for {tab.restaurant_data['name']}")
+            tab.ready_at = now
+
+        tab.state = TAB_HARVESTING
+        tab.spool = ReviewSpool()
+        tab.deadline = now + self.page_timeout
+
+    def harvest(self, tab):
+        """收割一步，所有評論都已收割時返回 True"""
+        with METRICS.time_phase("harvest", worker=self.crawler.worker_name):
+            result = self.crawler.harvest_step(self.driver, self.keep)
+
+        now = time.time()
+        if result is None:
+            if now > tab.deadline:
+                self.logger.warning(f"找不到評論容器: {tab.restaurant_data['name']}")
+                return True
+            tab.ready_at = now + self.poll_interval
+            return False
+
+        tab.spool.extend(result["reviews"])
+
+        if tab.target_count and len(tab.spool) >= tab.target_count:
+            return True
+
+        if result["reviews"] or result["pending"]:
+            tab.idle_since = None
+        elif result["at_bottom"]:
+            if tab.idle_since is None:
+                tab.idle_since = now
+            elif now - tab.idle_since >= self.idle_timeout:
+                return True
+
+        tab.ready_at = now + max(self.poll_interval, self.crawler.pacing.scroll_pause())
+        return False
+
+    def complete(self, tab, on_result):
+        """分頁完成一家餐廳，回報結果並讓分頁回到空閒狀態"""
+        restaurant_data = tab.restaurant_data
+        restaurant_data["reviews"] = tab.spool
+        worker = self.crawler.worker_name
+
+        if tab.target_count and not len(tab.spool):
+            self.logger.warning(f"Review panel empty although {tab.target_count} reviews are listed")
+            self.crawler.record_outcome(OUTCOME_EMPTY, tab.rate_limiter)
+        else:
+            self.crawler.record_outcome(OUTCOME_OK, tab.rate_limiter)
+
+        seconds = time.time() - tab.started
+        METRICS.inc("crawl_reviews_total", len(tab.spool), worker=worker)
+        METRICS.observe("crawl_place_seconds", seconds, worker=worker)
+        self.logger.info(f"Harvested {len(tab.spool)} reviews for {restaurant_data['name']} in {seconds:.1f}s")
+
+        url = tab.url
+        tab.reset()
+        self.failures = 0
+        on_result(url, restaurant_data, None)
+
+    def fail(self, tab, outcome, error, on_result):
+        """分頁處理失敗，回報錯誤並讓分頁回到空閒狀態"""
+        self.crawler.record_outcome(outcome, tab.rate_limiter)
+        self.logger.error(f"處理餐廳時發生錯誤: {str(error)}")
+
+        if tab.spool is not None:
+            tab.spool.close()
+        url = tab.url
+        tab.reset()
+        self.failures += 1
+
+        if outcome == OUTCOME_BLOCKED:
+            # 速率控制器已開始退避，尚未導航的分頁重新分配時段
+            for other in self.tab_states:
+                if other.state == TAB_WAITING:
+                    other.ready_at = other.rate_limiter.reserve("place")
+
+        on_result(url, None, str(error))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import queue
+import threading
+from .search_units import SearchUnitStore, STATUS_DONE
+from .utils import dedupe_place_urls
+
+class UrlCollector:
+    """把城市 × 餐廳類型的搜尋網格拆成可續傳的搜尋單元，由多個工作執行緒並行收集
+
+    每個單元完成後立即保存結果並更新 restaurant_urls.json，重新執行時跳過已完成的單元。
+    與 ParallelCrawler 相同，工作執行緒只負責搜尋，由呼叫 collect 的執行緒寫入資料庫。
+    設定 planner (SearchPlanner) 時每個城市改為按地理圖塊搜尋，結果達到上限的圖塊會追加子圖塊。
+    """
+
+    def __init__(self, crawler, workers=1, mode="feed", max_results=None, planner=None,
+                 db_file="data/raw/search_units.db", urls_file="data/raw/restaurant_urls.json"):
+        self.logger = logging.getLogger("UrlCollector")
+        self.crawler = crawler
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.max_results = max_results
+        self.planner = planner
+        self.db_file = db_file
+        self.urls_file = urls_file
+
+    def plan_units(self, search_terms, locations):
+        """初始搜尋單元 (城市, 餐廳類型, 圖塊)"""
+        units = []
+        for location in locations:
+            tiles = self.planner.initial_tiles(location) if self.planner else [""]
+            for term in search_terms:
+                units.extend((location, term, tile) for tile in tiles)
+        return units
+
+    def collect(self, search_terms, locations, on_urls=None):
+        """收集所有未完成的搜尋單元，返回全部已收集的網址
+
+        on_urls(urls) 會先收到之前已收集的網址，之後每完成一個單元收到該單元新發現的網址，
+        可用於在收集完成前就開始爬取。
+        """
+        units = self.plan_units(search_terms, locations)
+
+        store = SearchUnitStore(self.db_file)
+        try:
+            if store.is_empty():
+                self.import_url_list(store, search_terms, locations)
+            store.add_units(units)
+
+            restaurant_urls = store.all_urls()
+            if on_urls is not None and restaurant_urls:
+                on_urls(restaurant_urls)
+
+            pending = store.pending_units()
+            self.logger.info(f"搜尋單元: 初始 {len(units)} 個，待處理 {len(pending)} 個，"
+                             f"已收集 {len(restaurant_urls)} 個地點")
+            if not pending:
+                return restaurant_urls
+
+            unit_queue = queue.Queue()
+            for unit in pending:
+                unit_queue.put(unit)
+            # 已放入佇列但尚未返回結果的單元數量 (圖塊細分時會增加)
+            outstanding = len(pending)
+
+            result_queue = queue.Queue()
+            threads = []
+            for worker_id in range(min(self.workers, len(pending))):
+                thread = threading.Thread(target=self.worker_loop,
+                                          args=(worker_id, unit_queue, result_queue),
+                                          name=f"collector-worker-{worker_id}",
+                                          daemon=True)
+                thread.start()
+                threads.append(thread)
+
+            finished = 0
+            running = len(threads)
+            while running:
+                result = result_queue.get()
+                if result is None:
+                    running -= 1
+                    continue
+
+                unit, cards, error = result
+                location, term, tile = unit
+                outstanding -= 1
+
+                if error is not None:
+                    store.mark_failed(unit, error)
+                else:
+                    children = []
+
+                    def plan_children(new_count):
+                        if self.planner is not None:
+                            children.extend((location, term, child)
+                                            for child in self.planner.children(tile, len(cards), new_count))
+                        return children
+
+                    new_urls = store.mark_done(unit, cards, children=plan_children)
+                    restaurant_urls.extend(new_urls)
+                    self.write_urls_file(restaurant_urls)
+                    finished += 1
+
+                    for child in children:
+                        unit_queue.put(child)
+                    outstanding += len(children)
+
+                    self.logger.info(f"已完成 {finished} 個搜尋單元 ({term} in {location}{' ' + tile if tile else ''})，"
+                                     f"{len(cards)} 個結果，新增 {len(new_urls)} 個地點，共 {len(restaurant_urls)} 個"
+                                     f"{f'，細分為 {len(children)} 個圖塊' if children else ''}")
+                    if on_urls is not None and new_urls:
+                        on_urls(new_urls)
+
+                if outstanding == 0:
+                    for _ in threads:
+                        unit_queue.put(None)
+
+            for thread in threads:
+                thread.join()
+
+            self.logger.info(f"URL 收集完成: {store.counts()}，共 {len(restaurant_urls)} 個地點")
+            return restaurant_urls
+        finally:
+            store.close()
+
+    def worker_loop(self, worker_id, unit_queue, result_queue):
+        """從共享佇列取出搜尋單元搜尋 (收到 None 時結束)，結果交給寫入者"""
+        worker = self.crawler.create_worker(f"collector-{worker_id}")
+
+        try:
+            while True:
+                unit = unit_queue.get()
+                if unit is None:
+                    break
+
+                location, term, tile = unit
+                search_url = self.planner.search_url(term, location, tile) if self.planner else None
+                driver = None
+                failed = False
+                try:
+                    driver = worker.acquire_browser()
+                    cards = worker.search_places(driver, term, location, mode=self.mode,
+                                                 max_results=self.max_results, search_url=search_url)
+                    result_queue.put((unit, cards, None))
+                except Exception as e:
+                    failed = True
+                    worker.logger.error(f"Error collecting restaurant URLs for {term} in {location}: {str(e)}")
+                    result_queue.put((unit, None, str(e)))
+                finally:
+                    if driver is not None:
+                        worker.browser_pool.release(driver, failed=failed)
+        finally:
+            worker.browser_pool.close()
+            result_queue.put(None)
+
+    def import_url_list(self, store, search_terms, locations):
+        """首次使用時匯入舊版 restaurant_urls.json (舊版只在整個網格完成後才寫入，因此視為全部城市文字搜尋單元已完成)"""
+        if not os.path.exists(self.urls_file):
+            return
+
+        try:
+            with open(self.urls_file, "r", encoding="utf-8") as f:
+                restaurant_urls = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"無法讀取 {self.urls_file}，重新收集: {str(e)}")
+            return
+
+        canonical_urls = dedupe_place_urls(restaurant_urls)
+        store.import_urls(canonical_urls, os.path.basename(self.urls_file))
+        store.add_units([(location, term, "") for location in locations for term in search_terms], status=STATUS_DONE)
+        self.logger.info(f"已從 {self.urls_file} 匯入 {len(canonical_urls)} 個地點 "
+                         f"({len(restaurant_urls)} 個網址去重後)")
+        if canonical_urls != restaurant_urls:
+            self.write_urls_file(canonical_urls)
+
+    def write_urls_file(self, restaurant_urls):
+        """以原子方式更新 restaurant_urls.json"""
+        os.makedirs(os.path.dirname(self.urls_file) or ".", exist_ok=True)
+        tmp_file = self.urls_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(restaurant_urls, f, ensure_ascii=False)
+        os.replace(tmp_file, self.urls_file)
@@ -2,10 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import random
+import re
 import time
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+from urllib.parse import unquote, urlsplit, urlunsplit, parse_qsl, urlencode
 
 def ensure_directory_exists(directory):
     """確保目錄存在，如不存在則創建"""
@@ -44,4 +46,106 @@ def extract_rating_value(rating_text):
         parts = rating_text.split()
         return float(parts[0])
     except (ValueError, IndexError):
-        return None
\ No newline at end of file
+        return None
+
+# 資料段中的 feature ID (!1s0x...:0x...，或 ftid= 參數)
+FEATURE_ID_PATTERN = re.compile(r"(?:!1s|ftid=)(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE)
+# Places API 的 Place ID (ChIJ...)
+PLACE_ID_PATTERN = re.compile(r"ChIJ[A-Za-z0-9_-]+")
+
+def extract_place_id(url):
+    """從 Google Maps URL 提取穩定的地點 ID (feature ID 優先，其次 ChIJ Place ID)，找不到時返回 None"""
+    url = unquote(url or "")
+    match = FEATURE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1).lower()
+    match = PLACE_ID_PATTERN.search(url)
+    if match:
+        return match.group(0)
+    return None
+
+def place_key(url):
+    """以 URL 中的地點 ID 作為餐廳的唯一鍵，找不到時使用原 URL"""
+    return extract_place_id(url) or url
+
+def with_language(url, language="en"):
+    """設定 URL 的 hl 查詢參數 (無論原 URL 是否已有查詢字串)"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if any(key == "hl" for key, _ in query):
+        query = [(key, language if key == "hl" else value) for key, value in query]
+    else:
+        query.append(("hl", language))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, safe=":"), parts.fragment))
+
+def canonical_place_url(url, language="en"):
+    """以地點 ID 建立與視窗座標、縮放及搜尋字串無關的標準網址"""
+    place_id = extract_place_id(url)
+    if place_id is None:
+        return with_language(url, language)
+    if place_id.startswith("0x"):
+        return f"https://www.google.com/maps/place/data=!4m2!3m1!1s{place_id}?hl={language}"
+    return f"https://www.google.com/maps/place/?q=place_id:{place_id}&hl={language}"
+
+def dedupe_place_urls(urls):
+    """按地點 ID 去重並轉為標準網址，保留首次出現的順序"""
+    unique = {}
+    for url in urls:
+        unique.setdefault(place_key(url), canonical_place_url(url))
+    return list(unique.values())
+
+def parse_count(count_text):
+    """從評論數量文本中提取整數，如 "(1,234)" -> 1234"""
+    digits = re.sub(r"[^\d]", "", count_text or "")
+    return int(digits) if digits else None
+
+# 相對日期的單位換算為天數 (月與年取平均長度)
+RELATIVE_DATE_UNITS = {
+    "minute": 1 / 1440,
+    "hour": 1 / 24,
+    "day": 1,
+    "week": 7,
+    "month": 30.44,
+    "year": 365.25
+}
+RELATIVE_DATE_PATTERN = re.compile(r"\b(a|an|one|\d+)\s+(minute|hour|day|week|month|year)s?\s+ago\b", re.IGNORECASE)
+# 中文界面 (例如 "2 個月前"、"一年前")
+CHINESE_RELATIVE_DATE_PATTERN = re.compile(r"(\d+|一)\s*(分鐘|小時|天|週|星期|個月|月|年)前")
+CHINESE_DATE_UNITS = {
+    "分鐘": "minute",
+    "小時": "hour",
+    "天": "day",
+    "週": "week",
+    "星期": "week",
+    "個月": "month",
+    "月": "month",
+    "年": "year"
+}
+WORD_AMOUNTS = {"a": 1, "an": 1, "one": 1, "一": 1}
+
+def relative_date_days(date_text):
+    """把英文或中文的相對日期換算為天數，無法解析時返回 None (src.normalize 為相同規則的批量版本)"""
+    match = RELATIVE_DATE_PATTERN.search(date_text or "")
+    if match:
+        amount, unit = match.group(1).lower(), match.group(2).lower()
+    else:
+        match = CHINESE_RELATIVE_DATE_PATTERN.search(date_text or "")
+        if not match:
+            return None
+        amount, unit = match.group(1), CHINESE_DATE_UNITS[match.group(2)]
+    amount = WORD_AMOUNTS[amount] if amount in WORD_AMOUNTS else int(amount)
+    return amount * RELATIVE_DATE_UNITS[unit]
+
+def parse_relative_date(date_text, reference):
+    """把 "2 months ago" 或 "2 個月前" 之類的相對日期換算為相對於 reference 的大約時間，無法解析時返回 None"""
+    days = relative_date_days(date_text)
+    if days is None:
+        return None
+    return reference - timedelta(days=days)
+
+def parse_crawl_time(crawl_time):
+    """解析記錄中的 crawl_time ("%Y-%m-%d %H:%M:%S")，無法解析時返回 None"""
+    try:
+        return datetime.strptime(crawl_time, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""協調器測試：SQLite 使用暫存文件，Redis 使用 fakeredis (需安裝 fakeredis[lua]，未安裝時略過)"""
+
+import time
+import pytest
+from src.coordinator import SQLiteCoordinator, RedisCoordinator, LeaseHeartbeat
+
+URLS = [f"https://www.google.com/maps/place/Place+{i}/data=!4m2!3m1!1s0x0:0x{i:x}" for i in range(6)]
+
+# 到期測試使用的短租約 (秒)
+SHORT_TTL = 0.5
+
+def make_sqlite(tmp_path):
+    def make(owner, lease_ttl=30, max_attempts=3):
+        return SQLiteCoordinator(str(tmp_path / "shared" / "coordinator.db"), lease_ttl=lease_ttl,
+                                 max_attempts=max_attempts, owner=owner)
+    return make
+
+def make_redis(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+
+    def make(owner, lease_ttl=30, max_attempts=3):
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        return RedisCoordinator(client, lease_ttl=lease_ttl, max_attempts=max_attempts, owner=owner)
+    return make
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_coordinator(request, tmp_path):
+    """返回 make(owner, lease_ttl, max_attempts)，同一個測試中建立的協調器共用同一個後端"""
+    return make_sqlite(tmp_path) if request.param == "sqlite" else make_redis(tmp_path)
+
+def test_leases_are_disjoint(make_coordinator):
+    a = make_coordinator("host-a:1")
+    b = make_coordinator("host-b:2")
+    a.add_urls(URLS)
+    # 重複登記不影響已有的地點
+    b.add_urls(URLS[:3])
+
+    lease_a = a.lease(4)
+    lease_b = b.lease(4)
+
+    assert len(lease_a.urls) == 4
+    assert len(lease_b.urls) == 2
+    assert not set(lease_a.urls) & set(lease_b.urls)
+    assert a.counts() == {"leased": 6}
+    assert a.lease(4).urls == []
+
+def test_expired_lease_is_requeued_and_stale_commit_rejected(make_coordinator):
+    a = make_coordinator("host-a:1", lease_ttl=SHORT_TTL)
+    b = make_coordinator("host-b:2", lease_ttl=SHORT_TTL)
+    a.add_urls(URLS[:2])
+
+    stale = b.lease(2)
+    time.sleep(SHORT_TTL + 0.3)
+
+    fresh = a.lease(2)
+    assert sorted(fresh.urls) == sorted(stale.urls)
+    assert not b.heartbeat(stale)
+    # 原持有者在租約到期後提交，結果被拒絕
+    assert not b.commit(stale, stale.urls[0], 10)
+    assert a.commit(fresh, fresh.urls[0], 12)
+
+    stats = {entry["host"]: entry for entry in a.host_stats()}
+    assert stats["host-b"]["expired"] == 2
+    assert stats["host-b"]["done"] == 0
+    assert stats["host-a"]["done"] == 1
+    assert stats["host-a"]["reviews"] == 12
+
+def test_double_commit_is_rejected(make_coordinator):
+    a = make_coordinator("host-a:1")
+    a.add_urls(URLS[:1])
+    lease = a.lease(1)
+
+    assert a.commit(lease, lease.urls[0], 5)
+    assert not a.commit(lease, lease.urls[0], 5)
+    assert a.counts() == {"done": 1}
+    assert a.host_stats()[0]["done"] == 1
+    assert a.remaining() == 0
+
+def test_release_returns_unfinished_places_without_an_attempt(make_coordinator):
+    a = make_coordinator("host-a:1", max_attempts=1)
+    a.add_urls(URLS[:3])
+
+    lease = a.lease(3)
+    a.commit(lease, lease.urls[0], 1)
+    assert a.release(lease) == 2
+
+    # 只允許一次嘗試；歸還不計入，因此仍可再次租用
+    again = a.lease(3)
+    assert sorted(again.urls) == sorted(lease.urls[1:])
+    assert a.remaining() == 2
+
+def test_failed_places_are_retried_until_max_attempts(make_coordinator):
+    a = make_coordinator("host-a:1", max_attempts=2)
+    a.add_urls(URLS[:1])
+
+    for _ in range(2):
+        lease = a.lease(1)
+        assert len(lease.urls) == 1
+        assert a.commit(lease, lease.urls[0], error="timeout")
+
+    assert a.lease(1).urls == []
+    assert a.counts() == {"failed": 1}
+    assert a.remaining() == 0
+    assert a.host_stats()[0]["failed"] == 2
+
+def test_heartbeat_keeps_lease_alive(make_coordinator):
+    a = make_coordinator("host-a:1", lease_ttl=SHORT_TTL)
+    b = make_coordinator("host-b:2", lease_ttl=SHORT_TTL)
+    a.add_urls(URLS[:2])
+    lease = a.lease(2)
+
+    with LeaseHeartbeat(a, lease, interval=SHORT_TTL / 4) as heartbeat:
+        time.sleep(SHORT_TTL * 3)
+        assert b.lease(2).urls == []
+        assert not heartbeat.lost
+
+    for url in lease.urls:
+        assert a.commit(lease, url, 3)
+    assert a.counts() == {"done": 2}
+
+def test_host_throughput(make_coordinator):
+    a = make_coordinator("host-a:1")
+    a.add_urls(URLS)
+    lease = a.lease(6)
+    time.sleep(1.1)
+    for url in lease.urls:
+        a.commit(lease, url, 2)
+
+    stats = a.host_stats()[0]
+    assert stats["host"] == "host-a"
+    assert stats["leases"] == 1
+    assert stats["reviews"] == 12
+    assert 0 < stats["places_per_minute"] <= 6 * 60
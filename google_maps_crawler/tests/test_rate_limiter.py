@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""自適應速率控制器測試：每個工作執行緒各自的速率、共用的封鎖退避與 IP 總速率上限"""
+
+import time
+from src.rate_limiter import AdaptiveRateLimiter, OUTCOME_OK, OUTCOME_BLOCKED
+
+def test_workers_pace_independently():
+    root = AdaptiveRateLimiter(initial_rate=60, max_rate=120, jitter=0)
+    a, b = root.for_worker(), root.for_worker()
+    now = time.time()
+
+    slots = [limiter.reserve() - now for limiter in (a, b, a, b)]
+    assert [round(slot) for slot in slots] == [0, 0, 1, 1]
+
+    a.record(OUTCOME_OK)
+    assert a.current_rate() > b.current_rate() == 60
+    assert root.current_rate() == a.current_rate() + 60
+
+def test_block_pauses_every_worker():
+    root = AdaptiveRateLimiter(initial_rate=60, jitter=0, backoff_base=60)
+    a, b = root.for_worker(), root.for_worker()
+
+    b.record(OUTCOME_BLOCKED)
+    assert b.current_rate() == 30
+    assert a.current_rate() == 60
+    assert a.reserve() - time.time() > 50
+
+def test_ip_max_rate_caps_the_total():
+    root = AdaptiveRateLimiter(initial_rate=60, jitter=0, ip_max_rate=60)
+    workers = [root.for_worker() for _ in range(3)]
+    now = time.time()
+
+    slots = [worker.reserve() - now for worker in workers]
+    assert [round(slot) for slot in slots] == [0, 1, 2]
+    assert root.current_rate() == 60
+
+def test_tabs_add_to_the_worker_rate():
+    root = AdaptiveRateLimiter(initial_rate=0.5)
+    worker = root.for_worker()
+    [worker.for_worker() for _ in range(4)]
+    root.for_worker()
+
+    assert root.current_rate() == 0.5 * 5
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""結果保存測試：主數據批次落盤後才標記完成，落盤失敗時標記為失敗"""
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.crawler import RestaurantCrawler, WRITE_FAILED_ERROR
+from src.pacing import NoPacing
+
+def restaurant(index):
+    return {"name": f"Place {index}", "url": f"https://example.com/place/{index}",
+            "reviews": [{"reviewer_name": "A Google user", "rating": "5 stars", "date": "a week ago", "text": "Good"}]}
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    crawler = RestaurantCrawler(pacing=NoPacing())
+    crawler.data_processor.store.fsync_every = 3
+    urls = [restaurant(i)["url"] for i in range(5)]
+    crawler.open_progress().add_urls(urls)
+    yield crawler
+    crawler.data_processor.close()
+    crawler.progress_store.close()
+
+def test_places_are_marked_done_after_the_batched_fsync(crawler):
+    progress = crawler.open_progress()
+
+    for i in range(2):
+        assert crawler.record_result(restaurant(i)["url"], restaurant(i)) == 1
+    assert progress.counts() == {"pending": 5}
+
+    # 第三筆觸發批次落盤
+    crawler.record_result(restaurant(2)["url"], restaurant(2))
+    assert progress.counts() == {"done": 3, "pending": 2}
+
+    crawler.record_result(restaurant(3)["url"], restaurant(3))
+    assert crawler.sync_results()
+    assert progress.counts() == {"done": 4, "pending": 1}
+    assert len(crawler.open_review_index().known_keys(restaurant(3)["url"])) == 1
+
+def test_failed_sync_marks_the_batch_failed(crawler, monkeypatch):
+    crawler.record_result(restaurant(0)["url"], restaurant(0))
+
+    def fail():
+        raise OSError("disk full")
+    monkeypatch.setattr(crawler.data_processor.store, "flush", fail)
+
+    assert not crawler.sync_results()
+    assert crawler.open_progress().counts() == {"failed": 1, "pending": 4}
+    row = crawler.progress_store.conn.execute("SELECT last_error FROM progress WHERE status = 'failed'").fetchone()
+    assert row[0] == WRITE_FAILED_ERROR
+    monkeypatch.delattr(crawler.data_processor.store, "flush")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""相對日期解析測試：英文與中文界面的日期在純量、Parquet 匯出與批量路徑中結果一致"""
+
+from datetime import datetime, timedelta
+import pytest
+from src.columnar_export import review_rows
+from src.utils import parse_relative_date, relative_date_days
+
+CRAWL_TIME = datetime(2024, 6, 1, 12, 0, 0)
+
+DATES = {
+    "2 months ago": 2 * 30.44,
+    "a year ago": 365.25,
+    "an hour ago": 1 / 24,
+    "3 weeks ago": 21,
+    "2 個月前": 2 * 30.44,
+    "一年前": 365.25,
+    "5 天前": 5,
+    "3 週前": 21,
+    "10 分鐘前": 10 / 1440,
+    "Unknown date": None,
+    "未知日期": None,
+    "": None,
+}
+
+def test_relative_date_days():
+    for text, days in DATES.items():
+        if days is None:
+            assert relative_date_days(text) is None
+        else:
+            assert relative_date_days(text) == pytest.approx(days)
+    assert relative_date_days(None) is None
+
+def test_parse_relative_date_chinese():
+    assert parse_relative_date("2 個月前", CRAWL_TIME) == parse_relative_date("2 months ago", CRAWL_TIME)
+    assert parse_relative_date("一年前", CRAWL_TIME) == CRAWL_TIME - timedelta(days=365.25)
+
+def test_review_rows_resolve_chinese_dates():
+    record = {"reviews": [{"date": "2 個月前", "rating": "5 stars"}, {"date": "未知日期"}]}
+    rows = list(review_rows(record, "place", "Taipei", "Cafe", CRAWL_TIME))
+
+    assert rows[0]["date_approx"] == (CRAWL_TIME - timedelta(days=2 * 30.44)).date()
+    assert rows[0]["rating"] == 5
+    assert rows[1]["date_approx"] is None
+
+def test_vectorized_path_matches_scalar():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("pandas")
+    from src.normalize import normalize_relative_dates
+
+    texts = list(DATES)
+    _, latest = normalize_relative_dates(texts, CRAWL_TIME)
+    for text, value in zip(texts, latest):
+        expected = parse_relative_date(text, CRAWL_TIME)
+        if expected is None:
+            assert np.isnat(value)
+        else:
+            assert abs(value - np.datetime64(expected, "ns")) <= np.timedelta64(1, "ms")
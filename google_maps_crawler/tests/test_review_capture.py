@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""評論 RPC 解碼測試：以 tests/fixtures 中的回應主體解碼，不需要網路或瀏覽器"""
+
+import os
+from src.review_capture import ReviewCapture, decode_review_payload
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# 與 crawler.REVIEW_DEFAULTS 相同 (crawler 需要 selenium，這裡不匯入)
+DEFAULTS = {
+    "reviewer_name": "Anonymous",
+    "rating": "No rating",
+    "date": "Unknown date"
+}
+
+# DOM 提取 (EXTRACT_REVIEWS_JS) 的評論欄位，加上 RPC 提供的評論 ID
+DOM_RECORD_KEYS = {"reviewer_name", "rating", "date", "text", "photos", "tags", "review_id"}
+
+UGC_URL = "https://www.google.com/maps/rpc/listugcposts?authuser=0&hl=en"
+LEGACY_URL = "https://www.google.com/maps/preview/review/listentitiesreviews?authuser=0&hl=en"
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def test_decode_listugcposts():
+    reviews = decode_review_payload(read_fixture("listugcposts.txt"), DEFAULTS, UGC_URL)
+
+    assert len(reviews) == 3
+    assert all(set(review) == DOM_RECORD_KEYS for review in reviews)
+    assert reviews[0] == {
+        "review_id": "ChZDSUhNMG9nS0VJQ0FnSUQ3bjRTR0RREAE",
+        "reviewer_name": "Alice Chen",
+        "rating": "5 stars",
+        "date": "2 months ago",
+        "text": "Great ramen, rich broth and friendly staff.",
+        "photos": [
+            "https://lh5.googleusercontent.com/p/AF1QipN-ramen1=w300-h225",
+            "https://lh5.googleusercontent.com/p/AF1QipN-ramen2=w300-h225"
+        ],
+        "tags": []
+    }
+    assert reviews[1]["reviewer_name"] == "王小明"
+    assert reviews[1]["date"] == "3 週前"
+    assert reviews[1]["rating"] == "4 stars"
+    # 只有評分的評論：與 DOM 相同，文字為空字串
+    assert reviews[2]["rating"] == "1 star"
+    assert reviews[2]["text"] == ""
+    assert reviews[2]["photos"] == []
+
+def test_decode_listentitiesreviews():
+    reviews = decode_review_payload(read_fixture("listentitiesreviews.txt"), DEFAULTS, LEGACY_URL)
+
+    assert len(reviews) == 2
+    assert all(set(review) == DOM_RECORD_KEYS for review in reviews)
+    assert reviews[0]["review_id"] == "ChdDSUhNMG9nS0VJQ0FnSUNRMlBHaGNREAE"
+    assert reviews[0]["reviewer_name"] == "Carol Smith"
+    assert reviews[0]["rating"] == "3 stars"
+    assert reviews[0]["date"] == "5 months ago"
+    assert reviews[0]["photos"] == ["https://lh5.googleusercontent.com/p/AF1QipM-sushi=w300-h225"]
+    # 缺少評論者名稱時使用預設值，浮點評分與頁面格式一致
+    assert reviews[1]["reviewer_name"] == "Anonymous"
+    assert reviews[1]["rating"] == "4 stars"
+
+class FakeDriver:
+    """以請求 ID 返回固定回應主體"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]]}
+
+def response_event(request_id, url):
+    return {"method": "Network.responseReceived", "params": {"requestId": request_id, "response": {"url": url}}}
+
+def test_collect_keeps_review_ids_and_skips_duplicates():
+    body = read_fixture("listugcposts.txt")
+    driver = FakeDriver({"1": body, "2": body, "3": read_fixture("listentitiesreviews.txt")})
+    messages = [
+        response_event("1", UGC_URL),
+        # 同一頁評論被重複請求
+        response_event("2", UGC_URL),
+        response_event("3", LEGACY_URL),
+        response_event("4", "https://www.google.com/maps/vt/tile"),
+        {"method": "Network.requestWillBeSent", "params": {}}
+    ]
+
+    reviews = ReviewCapture(DEFAULTS).collect(driver, messages)
+
+    assert [review["review_id"] for review in reviews] == [
+        "ChZDSUhNMG9nS0VJQ0FnSUQ3bjRTR0RREAE",
+        "ChdDSUhNMG9nS0VJQ0FnSUQ3cV9fLUdnEAE",
+        "ChZDSUhNMG9nS0VJQ0FnSURINzdYX1pBEAE",
+        "ChdDSUhNMG9nS0VJQ0FnSUNRMlBHaGNREAE",
+        "ChZDSUhNMG9nS0VJQ0FnSURRdWZqS1VBEAE"
+    ]
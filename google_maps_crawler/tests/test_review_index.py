@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""評論索引測試：指紋不碰撞、優先使用評論 ID、舊版索引重建"""
+
+import sqlite3
+from src.review_index import ReviewIndex, review_fingerprint, review_key
+from src.utils import place_key
+
+URL = "https://www.google.com/maps/place/data=!4m2!3m1!1s0x0:0x1?hl=en"
+
+def review(name="A Google user", rating="5 stars", date="a month ago", text="", review_id=None):
+    return {"reviewer_name": name, "rating": rating, "date": date, "text": text, "review_id": review_id}
+
+def test_rating_only_reviews_do_not_collide():
+    keys = {review_key(review(rating=rating, date=date))
+            for rating in ("1 star", "4 stars", "5 stars")
+            for date in ("a week ago", "2 months ago")}
+    assert len(keys) == 6
+    assert review_key(review(name="Anonymous")) != review_key(review())
+
+def test_text_reviews_ignore_relative_date_changes():
+    text = "Great noodles and friendly staff, would come back again for the broth."
+    assert (review_fingerprint("Anonymous", text, "5 stars", "2 months ago")
+            == review_fingerprint("Anonymous", text, "5 stars", "5 months ago"))
+    assert (review_fingerprint("Anonymous", text, "5 stars", "2 months ago")
+            != review_fingerprint("Anonymous", text, "4 stars", "2 months ago"))
+
+def test_review_id_is_preferred(tmp_path):
+    index = ReviewIndex(str(tmp_path / "review_index.db"))
+    index.add_reviews(URL, [review(review_id="a"), review(rating="3 stars")])
+    known = index.known_keys(URL)
+
+    assert known == {"id:a", review_key(review(rating="3 stars"))}
+    # 指紋相同但 ID 不同的評論是新評論
+    assert not index.is_known(review(review_id="b"), known)
+    assert index.is_known(review(review_id="a", date="2 months ago"), known)
+    # 沒有 ID 的舊記錄仍以指紋比對
+    assert index.is_known(review(rating="3 stars", review_id="c"), known)
+
+def test_old_fingerprints_are_rebuilt(tmp_path):
+    db_file = str(tmp_path / "review_index.db")
+    index = ReviewIndex(db_file)
+    index.build_from_records([{"url": URL, "reviews": [review(review_id="a")]}])
+    index.close()
+
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute("UPDATE meta SET value = '1' WHERE key = 'fingerprint_version'")
+        conn.execute("INSERT INTO review_keys VALUES (?, 'stale', 0)", (place_key(URL),))
+    conn.close()
+
+    index = ReviewIndex(db_file)
+    assert index.known_keys(URL) == set()
+    index.build_from_records([{"url": URL, "reviews": [review(review_id="a")]}])
+    assert index.known_keys(URL) == {"id:a"}
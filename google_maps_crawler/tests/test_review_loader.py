@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""評論載入測試：遠離底部的滾動不等待，確認到底時使用較短的等待且不加閱讀停頓"""
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.review_loader import ReviewLoader
+
+class RecordingPacing:
+    def __init__(self):
+        self.pauses = 0
+
+    def scroll_step(self):
+        return 500
+
+    def scroll_pause(self):
+        self.pauses += 1
+        return 0
+
+    def should_click(self):
+        return False
+
+class FakeDriver:
+    """依序返回預先安排的腳本結果，並記錄每次的滾動距離與等待時間"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def find_element(self, by, value):
+        return object()
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, container, count, step, wait_ms, load_threshold):
+        self.calls.append((step, wait_ms))
+        return self.results.pop(0)
+
+def test_confirmation_rounds_are_short_and_unpaced():
+    pacing = RecordingPacing()
+    loader = ReviewLoader(pacing=pacing, idle_timeout=2.5, max_idle_rounds=3, confirm_timeout=0.5)
+    driver = FakeDriver([
+        {"count": 10, "at_bottom": False},
+        {"count": 10, "at_bottom": False},
+        {"count": 20, "at_bottom": True},
+        {"count": 20, "at_bottom": True},
+        {"count": 20, "at_bottom": True},
+        {"count": 20, "at_bottom": True},
+    ])
+
+    assert loader.load(driver, max_scrolls=10) == 20
+    assert driver.calls == [(500, 2500), (500, 2500), (500, 2500), (500, 2500), (None, 500), (None, 500)]
+    # 第一次在底部閒置之後就不再停頓
+    assert pacing.pauses == 3
+    assert loader.end_wait() == 3.5